@@ -0,0 +1,8 @@
+"""Benchmarks of the nereid tasks.
+
+Run them as modules from the directory that contains both the `nereid` package
+and this one, so that neither needs to be installed, e.g.:
+
+    cd nereid && python -m benchmarks.run_benchmarks run --sizes 100 1000
+
+"""
@@ -0,0 +1,208 @@
+"""Measure the peak and retained memory of each phase of a watershed solve.
+
+The phases are the ones timed by `nereid.core.timings`, e.g., the land surface
+loading and facility initialization of "initialize", "solve_state" and "results".
+Python allocations are traced with `tracemalloc`, and the resident set size (RSS)
+of the process is sampled by a background thread, so the RSS also includes the
+memory of numpy and the other extensions that tracemalloc may not see.
+
+The peak traced memory of the whole task per node of the watershed is checked
+against `--budget-kb-per-node`, and the script exits non-zero if any size is
+over budget. The default budget leaves about 40% of headroom over the ~22 KB per
+node of `solve_watershed` at 1k and 10k nodes with 30% treatment.
+
+Usage, from the directory that contains the `nereid` and `benchmarks` packages:
+    python -m benchmarks.memory_benchmarks [--sizes 1000 10000 100000]
+        [--task solve_watershed|solve_watershed_stream] [--pct-tmnt 0.3]
+        [--budget-kb-per-node 32] [--output results.json]
+
+"""
+
+import argparse
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from copy import deepcopy
+
+from nereid.core.context import get_request_context
+from nereid.core.timings import Timings, activate
+from nereid.src import tasks
+
+from benchmarks.run_benchmarks import dump, watershed_request
+
+MB = 1024**2
+BUDGET_KB_PER_NODE = 32
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # not linux, this is the peak rss instead.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryTimings(Timings):
+    """Timings that also record the memory of each phase.
+
+    For each phase, `peak_bytes` is the largest traced memory above the memory
+    at the start of the phase, `retained_bytes` is the traced memory that is
+    still allocated at its end, and `peak_rss_bytes` is the largest sampled RSS
+    above the RSS at its start. If a phase is run more than once, its peaks are
+    the largest of any run and its retained memory is the sum of all runs.
+    `tracemalloc` must be tracing.
+    """
+
+    def __init__(self, task, interval=0.005):
+        super().__init__(task)
+        self.memory = {}
+        self._open = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(interval,), daemon=True
+        )
+        self._sampler.start()
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            rss = rss_bytes()
+            for record in list(self._open):
+                record["peak_rss"] = max(record["peak_rss"], rss)
+
+    def close(self):
+        self._stop.set()
+        self._sampler.join()
+
+    @contextmanager
+    def phase(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        # the enclosing phases keep the peak that is reset for this one.
+        for outer in self._open:
+            outer["peak"] = max(outer["peak"], peak)
+        tracemalloc.reset_peak()
+
+        rss = rss_bytes()
+        record = {"start": current, "peak": current, "rss": rss, "peak_rss": rss}
+        self._open.append(record)
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            end, peak = tracemalloc.get_traced_memory()
+            self._open.remove(record)
+            record["peak"] = max(record["peak"], peak)
+            record["peak_rss"] = max(record["peak_rss"], rss_bytes())
+            for outer in self._open:
+                outer["peak"] = max(outer["peak"], record["peak"])
+
+            memory = self.memory.setdefault(
+                name, {"peak_bytes": 0, "retained_bytes": 0, "peak_rss_bytes": 0}
+            )
+            memory["peak_bytes"] = max(
+                memory["peak_bytes"], record["peak"] - record["start"]
+            )
+            memory["retained_bytes"] += end - record["start"]
+            memory["peak_rss_bytes"] = max(
+                memory["peak_rss_bytes"], record["peak_rss"] - record["rss"]
+            )
+
+    def to_dict(self):
+        report = super().to_dict()
+        for name, memory in self.memory.items():
+            report["phases"][name].update(memory)
+        return report
+
+
+def profile_memory(task, request, context):
+    watershed = deepcopy(request)
+    timings = MemoryTimings(task)
+    try:
+        with activate(timings), timings.phase("total"):
+            kwargs = {
+                "watershed": watershed,
+                "treatment_pre_validated": False,
+                "context": context,
+            }
+            if task == "solve_watershed_stream":
+                response = list(tasks.solve_watershed_stream(**kwargs))
+            else:
+                response = tasks.solve_watershed(**kwargs)
+            del response
+    finally:
+        timings.close()
+
+    return timings.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument(
+        "--task",
+        choices=["solve_watershed", "solve_watershed_stream"],
+        default="solve_watershed",
+    )
+    parser.add_argument("--pct-tmnt", type=float, default=0.3)
+    parser.add_argument("--budget-kb-per-node", type=float, default=BUDGET_KB_PER_NODE)
+    parser.add_argument("--output", help="write the results to this json file")
+    args = parser.parse_args()
+
+    context = get_request_context()
+    # fill the per-process caches, so that they are not counted as the first solve.
+    tasks.solve_watershed(
+        watershed=watershed_request(10, context, args.pct_tmnt),
+        treatment_pre_validated=False,
+        context=context,
+    )
+
+    print(f"task: {args.task}, pct_tmnt: {args.pct_tmnt}")
+    print("| nodes | phase | peak (MB) | retained (MB) | peak rss (MB) |")
+    print("|---|---|---|---|---|")
+
+    results = {}
+    over_budget = []
+    tracemalloc.start()
+    for n_nodes in args.sizes:
+        request = watershed_request(n_nodes, context, args.pct_tmnt)
+        report = profile_memory(args.task, request, context)
+
+        for name, ph in report["phases"].items():
+            print(
+                f"| {n_nodes:,} | {name} | {ph['peak_bytes'] / MB:.1f} "
+                f"| {ph['retained_bytes'] / MB:.1f} | {ph['peak_rss_bytes'] / MB:.1f} |"
+            )
+
+        kb_per_node = report["phases"]["total"]["peak_bytes"] / 1024 / n_nodes
+        report["peak_kb_per_node"] = kb_per_node
+        results[f"{args.task}[{n_nodes}]"] = report
+        if kb_per_node > args.budget_kb_per_node:
+            over_budget.append(n_nodes)
+    tracemalloc.stop()
+
+    for key, report in results.items():
+        print(f"{key}: {report['peak_kb_per_node']:.1f} KB per node")
+
+    if args.output:
+        dump(
+            {"budget_kb_per_node": args.budget_kb_per_node, "results": results},
+            args.output,
+        )
+
+    if over_budget:
+        print(
+            f"sizes {over_budget} are over the budget of "
+            f"{args.budget_kb_per_node} KB per node."
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
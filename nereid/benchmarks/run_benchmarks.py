@@ -0,0 +1,315 @@
+"""Time the main tasks at increasing network sizes and compare against a baseline.
+
+Each benchmark is timed as the best of `--repeat` runs, after one untimed warm up
+run that fills the per-process caches. Results are written as json so that they
+can be kept as a baseline and compared with a later run. A benchmark regresses if
+it is more than `--threshold` slower than its baseline.
+
+Usage, from the directory that contains the `nereid` and `benchmarks` packages:
+    python -m benchmarks.run_benchmarks run [--sizes 100 1000 10000 100000]
+        [--only solve_watershed ...] [--repeat 3] [--pct-tmnt 0.3]
+        [--output results.json] [--save-baseline NAME] [--baseline NAME]
+    python -m benchmarks.run_benchmarks compare BASELINE RESULTS [--threshold 0.2]
+
+Baselines given by name are kept in `benchmarks/baselines/<NAME>.json`, other
+arguments are paths to result files. The `small` baseline is committed; since
+timings depend on the machine, regenerate it on the machine that runs the
+comparison with:
+    python -m benchmarks.run_benchmarks run --sizes 100 1000 --save-baseline small
+
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy
+from nereid.core.config import settings
+from nereid.core.context import get_request_context
+from nereid.src import tasks
+from nereid.src.nomograph.nomo import load_nomograph_mapping
+from nereid.src.watershed.engine import engine_cache_clear, get_watershed_engine
+from nereid.src.watershed.solve_watershed import (
+    initialize_graph,
+    solve_watershed_loading,
+)
+from nereid.tests.utils import generate_random_watershed_solve_request_from_graph
+
+from benchmarks.solve_watershed_modes import LAND_SURFACES, SUBBASINS, make_graph
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+SIZES = [100, 1_000, 10_000, 100_000]
+N_SMALL_REQUESTS = 20
+N_ENGINE_LOOKUPS = 1_000
+
+
+def watershed_request(n_nodes, context, pct_tmnt):
+    numpy.random.seed(42)
+    return generate_random_watershed_solve_request_from_graph(
+        make_graph("random", n_nodes),
+        context,
+        SUBBASINS,
+        LAND_SURFACES,
+        pct_tmnt=pct_tmnt,
+    )
+
+
+def bench_solve_watershed(request, context):
+    return lambda: tasks.solve_watershed(
+        watershed=deepcopy(request), treatment_pre_validated=False, context=context
+    )
+
+
+def bench_small_requests(request, context):
+    """`N_SMALL_REQUESTS` solves with one context, like the API makes them, from
+    an empty engine cache, like a newly started worker. At small sizes, this is
+    dominated by building and looking up the engine of the context.
+    """
+
+    def setup():
+        engine_cache_clear()
+        return deepcopy(context)
+
+    def func(context):
+        for _ in range(N_SMALL_REQUESTS):
+            tasks.solve_watershed(
+                watershed=deepcopy(request),
+                treatment_pre_validated=False,
+                context=context,
+            )
+
+    return setup, func
+
+
+def bench_engine_lookup(request, context):
+    """`N_ENGINE_LOOKUPS` engine lookups of one context after it served its first
+    request, i.e., the per-request cost of the engine cache.
+    """
+
+    def setup():
+        engine_cache_clear()
+        context_ = deepcopy(context)
+        tasks.solve_watershed(
+            watershed=deepcopy(request), treatment_pre_validated=False, context=context_
+        )
+        return context_
+
+    def func(context):
+        for _ in range(N_ENGINE_LOOKUPS):
+            get_watershed_engine(context)
+
+    return setup, func
+
+
+def bench_watershed_loading(request, context):
+    """the solve of an initialized watershed, i.e., the accumulation, volume capture
+    and load reduction of every node, without validation or land surface loading.
+    Each run solves a fresh copy of the graph.
+    """
+    g, _ = initialize_graph(deepcopy(request), False, context)
+    return lambda: deepcopy(g), lambda g: solve_watershed_loading(g, context)
+
+
+def bench_land_surface_loading(request, context):
+    land_surfaces = {"land_surfaces": request["land_surfaces"]}
+    return lambda: tasks.land_surface_loading(
+        land_surfaces=land_surfaces, details=False, context=context
+    )
+
+
+def bench_solution_sequence(request, context):
+    return lambda: tasks.solution_sequence(graph=request["graph"], min_branch_size=4)
+
+
+def bench_network_subgraphs(request, context):
+    ids = [n["id"] for n in request["graph"]["nodes"]]
+    rng = numpy.random.default_rng(42)
+    nodes = [{"id": i} for i in rng.choice(ids, size=min(10, len(ids)), replace=False)]
+    return lambda: tasks.network_subgraphs(graph=request["graph"], nodes=nodes)
+
+
+def bench_validate_network(request, context):
+    return lambda: tasks.validate_network(graph=request["graph"])
+
+
+def _nomographs(context, name):
+    return [
+        nomo
+        for nomo in load_nomograph_mapping(context).values()
+        if type(nomo).__name__ == name
+    ]
+
+
+def bench_volume_nomograph(request, context):
+    """size lookups of one point per node on each volume nomograph."""
+    n = len(request["graph"]["nodes"])
+    rng = numpy.random.default_rng(42)
+    size, ddt = rng.uniform(0, 3, n), rng.uniform(2, 120, n)
+    nomos = _nomographs(context, "VolumeNomograph")
+    return lambda: [nomo(size=size, ddt=ddt) for nomo in nomos]
+
+
+def bench_flow_nomograph(request, context):
+    """inverse lookups of one point per node on each flow nomograph."""
+    n = len(request["graph"]["nodes"])
+    rng = numpy.random.default_rng(42)
+    performance, tc = rng.uniform(0, 1, n), rng.uniform(5, 60, n)
+    nomos = _nomographs(context, "FlowNomograph")
+    return lambda: [nomo(performance=performance, tc=tc) for nomo in nomos]
+
+
+BENCHMARKS = {
+    "solve_watershed": bench_solve_watershed,
+    "small_requests": bench_small_requests,
+    "engine_lookup": bench_engine_lookup,
+    "watershed_loading": bench_watershed_loading,
+    "land_surface_loading": bench_land_surface_loading,
+    "solution_sequence": bench_solution_sequence,
+    "network_subgraphs": bench_network_subgraphs,
+    "validate_network": bench_validate_network,
+    "volume_nomograph": bench_volume_nomograph,
+    "flow_nomograph": bench_flow_nomograph,
+}
+
+
+def best_of(bench, repeat):
+    """times a benchmark function, or a (setup, function) pair, in which case only
+    the function is timed, with the result of the setup as its argument.
+    """
+    setup, func = bench if isinstance(bench, tuple) else (tuple, lambda _: bench())
+    func(setup())
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        t = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - t)
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "runs": repeat}
+
+
+def metadata(args):
+    return {
+        "nereid": settings.VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "pct_tmnt": args.pct_tmnt,
+    }
+
+
+def run(args):
+    context = get_request_context()
+    names = args.only or list(BENCHMARKS)
+
+    results = {}
+    for n_nodes in args.sizes:
+        request = watershed_request(n_nodes, context, args.pct_tmnt)
+        for name in names:
+            key = f"{name}[{n_nodes}]"
+            results[key] = best_of(BENCHMARKS[name](request, context), args.repeat)
+            print(f"{key}: {results[key]['best_s']:.4f} s", flush=True)
+
+    return {"metadata": metadata(args), "results": results}
+
+
+def compare(baseline, results, threshold):
+    """returns a markdown table of the benchmarks in both result sets, and the
+    names of the ones that are more than `threshold` slower than the baseline.
+    """
+    lines = [
+        "| benchmark | baseline (s) | current (s) | ratio | |",
+        "|---|---|---|---|---|",
+    ]
+    regressions = []
+    for key, result in results["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["best_s"] / base["best_s"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "regression"
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            flag = "improvement"
+        lines.append(
+            f"| {key} | {base['best_s']:.4f} | {result['best_s']:.4f} "
+            f"| {ratio:.2f} | {flag} |"
+        )
+    return "\n".join(lines), regressions
+
+
+def result_path(name):
+    path = Path(name)
+    if path.suffix == ".json":
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+
+def load(name):
+    return json.loads(result_path(name).read_text())
+
+
+def dump(results, name):
+    path = result_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"wrote {path}")
+
+
+def report(baseline, results, threshold):
+    table, regressions = compare(baseline, results, threshold)
+    print(table)
+    if regressions:
+        print(f"{len(regressions)} regressions over {threshold:.0%}: {regressions}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--pct-tmnt", type=float, default=0.3)
+    run_parser.add_argument("--output", help="write the results to this json file")
+    run_parser.add_argument("--save-baseline", metavar="NAME")
+    run_parser.add_argument(
+        "--baseline", metavar="NAME", help="compare the results with this baseline"
+    )
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        return report(load(args.baseline), load(args.results), args.threshold)
+
+    results = run(args)
+    if args.output:
+        dump(results, args.output)
+    if args.save_baseline:
+        dump(results, args.save_baseline)
+    if args.baseline:
+        return report(load(args.baseline), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
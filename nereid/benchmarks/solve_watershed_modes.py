@@ -0,0 +1,100 @@
+"""Compare the watershed solver modes. Speedups are relative to the "node" mode.
+
+Usage, from the directory that contains the `nereid` and `benchmarks` packages:
+    python -m benchmarks.solve_watershed_modes [--sizes 1000 10000 100000]
+        [--pct-tmnt 0.0] [--graph random|chain]
+
+"""
+
+import argparse
+import time
+from copy import deepcopy
+from itertools import product
+
+import networkx as nx
+import numpy
+from nereid.core.context import get_request_context
+from nereid.src.watershed.solve_watershed import (
+    SOLVER_MODES,
+    initialize_graph,
+    solve_watershed_loading,
+)
+from nereid.tests.utils import generate_random_watershed_solve_request_from_graph
+
+SUBBASINS = ["10101200", "10101100", "10101000"]
+LAND_SURFACES = [
+    "-".join(x)
+    for x in product(
+        SUBBASINS,
+        ["COMM", "EDU", "IND", "RESSFH", "OSLOW", "TRANS"],
+        ["A", "B", "C", "D"],
+        ["0", "5", "10"],
+    )
+]
+
+
+def make_graph(kind, n_nodes):
+    if kind == "chain":
+        g = nx.DiGraph(nx.path_graph(n_nodes, create_using=nx.DiGraph).reverse())
+    else:
+        g = nx.gnr_graph(n=n_nodes, p=0.0, seed=42)
+    return nx.relabel_nodes(g, str)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--pct-tmnt", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--graph", choices=["random", "chain"], default="random")
+    args = parser.parse_args()
+
+    context = get_request_context()
+
+    print(f"graph: {args.graph}, pct_tmnt: {args.pct_tmnt}")
+    print("| nodes | " + " | ".join(f"{m} (s)" for m in SOLVER_MODES) + " | speedup |")
+    print("|---|" + "---|" * len(SOLVER_MODES) + "---|")
+
+    for n_nodes in args.sizes:
+        numpy.random.seed(42)
+        request = generate_random_watershed_solve_request_from_graph(
+            make_graph(args.graph, n_nodes),
+            context,
+            SUBBASINS,
+            LAND_SURFACES,
+            pct_tmnt=args.pct_tmnt,
+        )
+        g, _ = initialize_graph(request, False, context)
+
+        results = {}
+        for mode in SOLVER_MODES:
+            graphs = [deepcopy(g) for _ in range(args.repeat)]
+            results[mode] = best_of(
+                lambda mode=mode, graphs=graphs: solve_watershed_loading(
+                    graphs.pop(), context, mode=mode
+                ),
+                args.repeat,
+            )
+
+        speedup = ", ".join(
+            f"{m}: {results['node'] / results[m]:.1f}x"
+            for m in SOLVER_MODES
+            if m != "node"
+        )
+        cols = " | ".join(f"{results[m]:.3f}" for m in SOLVER_MODES)
+        print(f"| {n_nodes:,} | {cols} | {speedup} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
 from typing import Any
 
 from fastapi import APIRouter, Body, Depends, Request
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
 import nereid.bg_worker as bg
 from nereid.api.async_utils import run_task, standard_json_response
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import (
+    TABLE_MEDIA_TYPES,
+    TimedRoute,
+    get_projection,
+    get_valid_context,
+    table_response,
+    wants_table,
+)
 from nereid.models.land_surface_models import (
     LandSurfaceResponse,
     LandSurfaces,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -25,11 +32,17 @@ async def calculate_loading(
     land_surfaces: LandSurfaces = Body(...),
     details: bool = False,
     context: dict = Depends(get_valid_context),
+    projection: dict[str, Any] | None = Depends(get_projection),
+    timings: bool = False,
 ) -> dict[str, Any]:
     land_surfaces_req = land_surfaces.model_dump(by_alias=True)
 
     task = bg.land_surface_loading.s(
-        land_surfaces=land_surfaces_req, details=details, context=context
+        land_surfaces=land_surfaces_req,
+        details=details,
+        context=context,
+        projection=projection,
+        timings=timings,
     )
 
     return await run_task(request, task, "get_land_surface_loading_result")
@@ -40,12 +53,23 @@ async def calculate_loading(
     tags=["land_surface", "loading"],
     response_model=LandSurfaceResponse,
     response_class=ORJSONResponse,
+    responses={200: {"content": {m: {} for m in TABLE_MEDIA_TYPES}}},
 )
 async def get_land_surface_loading_result(
     request: Request,
     task_id: str,
-) -> dict[str, Any]:
+) -> dict[str, Any] | Response:
+    """With `Accept: application/vnd.apache.arrow.stream` or `application/x-parquet`,
+    the result of a successful task is returned as one table, see the synchronous
+    `/land_surface/loading`.
+    """
     task = bg.land_surface_loading.AsyncResult(task_id, app=router)
+    media_type = wants_table(request)
+    if task.successful() and media_type is not None:
+        data = task.result
+        key = "summary" if data.get("details") is None else "details"
+        return table_response(data, [key], media_type)
+
     return await standard_json_response(
         request, task, "get_land_surface_loading_result"
     )
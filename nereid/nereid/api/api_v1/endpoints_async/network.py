@@ -10,10 +10,10 @@ from nereid.api.async_utils import (
     standard_json_response,
     wait_a_sec_and_see_if_we_can_return_some_data,
 )
-from nereid.api.utils import templates
+from nereid.api.utils import TimedRoute, templates
 from nereid.models import network_models
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -28,8 +28,9 @@ async def validate_network(
         ...,
         openapi_examples=network_models.GraphExamples,  # type: ignore[arg-type]
     ),
+    timings: bool = False,
 ) -> dict[str, Any]:
-    task = bg.validate_network.s(graph=graph.model_dump(by_alias=True))
+    task = bg.validate_network.s(graph=graph.model_dump(by_alias=True), timings=timings)
     return await run_task(request, task, "get_validate_network_result")
 
 
@@ -53,8 +54,11 @@ async def get_validate_network_result(request: Request, task_id: str) -> dict[st
 async def subgraph_network(
     request: Request,
     subgraph_req: network_models.SubgraphRequest = Body(...),
+    timings: bool = False,
 ) -> dict[str, Any]:
-    task = bg.network_subgraphs.s(**subgraph_req.model_dump(by_alias=True))
+    task = bg.network_subgraphs.s(
+        **subgraph_req.model_dump(by_alias=True), timings=timings
+    )
 
     return await run_task(request, task, "get_subgraph_network_result")
 
@@ -124,9 +128,14 @@ async def network_solution_sequence(
         openapi_examples=network_models.GraphExamples,  # type: ignore[arg-type]
     ),
     min_branch_size: int = Query(4),
+    n_partitions: int | None = Query(None, ge=1),
+    timings: bool = False,
 ) -> dict[str, Any]:
     task = bg.solution_sequence.s(
-        graph=graph.model_dump(by_alias=True), min_branch_size=min_branch_size
+        graph=graph.model_dump(by_alias=True),
+        min_branch_size=min_branch_size,
+        n_partitions=n_partitions,
+        timings=timings,
     )
 
     return await run_task(request, task, "get_network_solution_sequence")
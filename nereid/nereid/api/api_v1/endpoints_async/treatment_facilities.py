@@ -5,14 +5,14 @@ from fastapi.responses import ORJSONResponse
 
 import nereid.bg_worker as bg
 from nereid.api.async_utils import run_task, standard_json_response
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import TimedRoute, get_valid_context
 from nereid.models.treatment_facility_models import (
     TreatmentFacilities,
     TreatmentFacilitiesResponse,
     validate_treatment_facility_models,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 def validate_facility_request(
@@ -40,6 +40,7 @@ async def initialize_treatment_facility_parameters(
     tmnt_facility_req: tuple[TreatmentFacilities, dict[str, Any]] = Depends(
         validate_facility_request
     ),
+    timings: bool = False,
 ) -> dict[str, Any]:
     treatment_facilities, context = tmnt_facility_req
 
@@ -47,6 +48,7 @@ async def initialize_treatment_facility_parameters(
         treatment_facilities=treatment_facilities.model_dump(),
         pre_validated=True,
         context=context,
+        timings=timings,
     )
     return await run_task(request, task, "get_treatment_facility_parameters")
 
@@ -5,13 +5,13 @@ from fastapi.responses import ORJSONResponse
 
 import nereid.bg_worker as bg
 from nereid.api.async_utils import run_task, standard_json_response
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import TimedRoute, get_valid_context
 from nereid.models.treatment_site_models import (
     TreatmentSiteResponse,
     TreatmentSites,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -24,9 +24,10 @@ async def initialize_treatment_site(
     request: Request,
     treatment_sites: TreatmentSites = Body(...),
     context: dict = Depends(get_valid_context),
+    timings: bool = False,
 ) -> dict[str, Any]:
     task = bg.initialize_treatment_sites.s(
-        treatment_sites.model_dump(), context=context
+        treatment_sites.model_dump(), context=context, timings=timings
     )
 
     return await run_task(request, task, "get_treatment_site_parameters")
@@ -1,17 +1,49 @@
-from typing import Any
+from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
 import nereid.bg_worker as bg
 from nereid.api.async_utils import run_task, standard_json_response
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import (
+    NDJSON_MEDIA_TYPE,
+    TABLE_MEDIA_TYPES,
+    TimedRoute,
+    get_projection,
+    get_valid_context,
+    ndjson_response,
+    table_response,
+    wants_ndjson,
+    wants_table,
+)
 from nereid.models.treatment_facility_models import (
     validate_treatment_facility_models,
 )
-from nereid.models.watershed_models import Watershed, WatershedResponse
+from nereid.models.watershed_models import (
+    Watershed,
+    WatershedDelta,
+    WatershedResponse,
+    WatershedScenarios,
+    WatershedScenariosResponse,
+    WatershedSessionResponse,
+    WatershedSizing,
+    WatershedSizingResponse,
+)
+from nereid.src import tasks
+
+router = APIRouter(route_class=TimedRoute)
 
-router = APIRouter()
+
+def watershed_projection(
+    projection: dict[str, Any] | None = Depends(get_projection),
+    include_resubmit: bool = False,
+) -> dict[str, Any] | None:
+    """With `include_resubmit`, the projected results keep the
+    `previous_results_keys` too.
+    """
+    if projection is not None:
+        projection["include_resubmit"] = include_resubmit
+    return projection
 
 
 def validate_watershed_request(
@@ -31,6 +63,48 @@ def validate_watershed_request(
     return watershed, context
 
 
+def validate_watershed_delta(
+    delta_req: WatershedDelta,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    delta: dict[str, Any] = delta_req.model_dump(by_alias=True)
+
+    unvalidated_treatment_facilities = delta.get("treatment_facilities")
+    if unvalidated_treatment_facilities is not None:
+        delta["treatment_facilities"] = validate_treatment_facility_models(
+            unvalidated_treatment_facilities, context
+        )
+
+    return delta, context
+
+
+def validate_watershed_sizing_request(
+    watershed_req: WatershedSizing,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    return validate_watershed_request(watershed_req, context)
+
+
+def validate_watershed_scenarios_request(
+    watershed_req: WatershedScenarios,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    watershed: dict[str, Any] = watershed_req.model_dump(by_alias=True)
+
+    unvalidated_treatment_facilities = watershed.get("treatment_facilities")
+    if unvalidated_treatment_facilities is not None:
+        watershed["treatment_facilities"] = validate_treatment_facility_models(
+            unvalidated_treatment_facilities, context
+        )
+
+    for scenario in watershed["scenarios"]:
+        scenario["treatment_facilities"] = validate_treatment_facility_models(
+            scenario["treatment_facilities"], context
+        )
+
+    return watershed, context
+
+
 @router.post(
     "/watershed/solve",
     tags=["watershed", "main"],
@@ -42,10 +116,21 @@ async def post_solve_watershed(
     watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
         validate_watershed_request
     ),
+    projection: dict[str, Any] | None = Depends(watershed_projection),
+    verify: Literal["off", "sample", "full"] | None = None,
+    timings: bool = False,
 ) -> dict[str, Any]:
+    """`verify` selects the mass balance checks of the solved nodes and `timings`
+    adds the time of each phase of the solve, see the synchronous `/watershed/solve`.
+    """
     watershed, context = watershed_pkg
     task = bg.solve_watershed.s(
-        watershed=watershed, treatment_pre_validated=True, context=context
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        projection=projection,
+        verify=verify,
+        timings=timings,
     )
     return await run_task(request, task, "get_watershed_result")
 
@@ -55,7 +140,156 @@ async def post_solve_watershed(
     tags=["watershed", "main"],
     response_model=WatershedResponse,
     response_class=ORJSONResponse,
+    responses={
+        200: {"content": {m: {} for m in [NDJSON_MEDIA_TYPE, *TABLE_MEDIA_TYPES]}}
+    },
 )
-async def get_watershed_result(request: Request, task_id: str) -> dict[str, Any]:
+async def get_watershed_result(
+    request: Request, task_id: str
+) -> dict[str, Any] | Response:
+    """With `Accept: application/x-ndjson`, the result of a successful task is
+    streamed with one line per node, followed by a `{"trailer": {...}}` line with
+    the `errors`, `warnings` and `previous_results_keys`.
+
+    With `Accept: application/vnd.apache.arrow.stream` or `application/x-parquet`,
+    the result of a successful task is returned as one table with a column per
+    attribute, see the synchronous `/watershed/solve`.
+    """
     task = bg.solve_watershed.AsyncResult(task_id, app=router)
+    media_type = wants_table(request)
+    if task.successful() and wants_ndjson(request):
+        return ndjson_response(tasks.iter_watershed_response(task.result))
+    if task.successful() and media_type is not None:
+        return table_response(task.result, ["results", "leaf_results"], media_type)
     return await standard_json_response(request, task, "get_watershed_result")
+
+
+@router.post(
+    "/watershed/solve_scenarios",
+    tags=["watershed"],
+    response_model=WatershedScenariosResponse,
+    response_class=ORJSONResponse,
+)
+async def post_solve_watershed_scenarios(
+    request: Request,
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_scenarios_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+    task = bg.solve_watershed_scenarios.s(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return await run_task(request, task, "get_watershed_scenarios_result")
+
+
+@router.get(
+    "/watershed/solve_scenarios/{task_id}",
+    tags=["watershed"],
+    response_model=WatershedScenariosResponse,
+    response_class=ORJSONResponse,
+)
+async def get_watershed_scenarios_result(
+    request: Request, task_id: str
+) -> dict[str, Any]:
+    task = bg.solve_watershed_scenarios.AsyncResult(task_id, app=router)
+    return await standard_json_response(request, task, "get_watershed_scenarios_result")
+
+
+@router.post(
+    "/watershed/size_facilities",
+    tags=["watershed"],
+    response_model=WatershedSizingResponse,
+    response_class=ORJSONResponse,
+)
+async def post_size_watershed_facilities(
+    request: Request,
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_sizing_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+    task = bg.size_watershed_facilities.s(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return await run_task(request, task, "get_watershed_sizing_result")
+
+
+@router.get(
+    "/watershed/size_facilities/{task_id}",
+    tags=["watershed"],
+    response_model=WatershedSizingResponse,
+    response_class=ORJSONResponse,
+)
+async def get_watershed_sizing_result(request: Request, task_id: str) -> dict[str, Any]:
+    task = bg.size_watershed_facilities.AsyncResult(task_id, app=router)
+    return await standard_json_response(request, task, "get_watershed_sizing_result")
+
+
+@router.post(
+    "/watershed/session",
+    tags=["watershed"],
+    response_model=WatershedSessionResponse,
+    response_class=ORJSONResponse,
+)
+async def post_create_watershed_session(
+    request: Request,
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+    task = bg.create_watershed_session.s(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return await run_task(request, task, "get_watershed_session_result")
+
+
+@router.post(
+    "/watershed/session/{session_id}",
+    tags=["watershed"],
+    response_model=WatershedSessionResponse,
+    response_class=ORJSONResponse,
+)
+async def post_update_watershed_session(
+    request: Request,
+    session_id: str,
+    delta_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_delta
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    delta, context = delta_pkg
+    task = bg.update_watershed_session.s(
+        session_id=session_id,
+        delta=delta,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return await run_task(request, task, "get_watershed_session_result")
+
+
+@router.get(
+    "/watershed/session/result/{task_id}",
+    tags=["watershed"],
+    response_model=WatershedSessionResponse,
+    response_class=ORJSONResponse,
+)
+async def get_watershed_session_result(
+    request: Request, task_id: str
+) -> dict[str, Any]:
+    task = bg.create_watershed_session.AsyncResult(task_id, app=router)
+    return await standard_json_response(request, task, "get_watershed_session_result")
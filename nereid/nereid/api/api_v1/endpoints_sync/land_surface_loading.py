@@ -1,16 +1,23 @@
 from typing import Any
 
-from fastapi import APIRouter, Body, Depends
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, Body, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
 
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import (
+    TABLE_MEDIA_TYPES,
+    TimedRoute,
+    get_projection,
+    get_valid_context,
+    table_response,
+    wants_table,
+)
 from nereid.models.land_surface_models import (
     LandSurfaceResponse,
     LandSurfaces,
 )
 from nereid.src import tasks
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -18,16 +25,32 @@ router = APIRouter()
     tags=["land_surface", "loading"],
     response_model=LandSurfaceResponse,
     response_class=ORJSONResponse,
+    responses={200: {"content": {m: {} for m in TABLE_MEDIA_TYPES}}},
 )
 async def calculate_loading(
+    request: Request,
     land_surfaces: LandSurfaces = Body(...),
     details: bool = False,
     context: dict = Depends(get_valid_context),
-) -> dict[str, Any]:
+    projection: dict[str, Any] | None = Depends(get_projection),
+    timings: bool = False,
+) -> dict[str, Any] | Response:
+    """With `Accept: application/vnd.apache.arrow.stream` or `application/x-parquet`,
+    the summary, or the details if `details` is true, is returned as one table with
+    a column per attribute. The `errors` are json-encoded in the schema metadata.
+    """
     land_surfaces_req = land_surfaces.model_dump(by_alias=True)
 
     data = tasks.land_surface_loading(
-        land_surfaces=land_surfaces_req, details=details, context=context
+        land_surfaces=land_surfaces_req,
+        details=details,
+        context=context,
+        projection=projection,
+        timings=timings,
     )
 
+    media_type = wants_table(request)
+    if media_type is not None:
+        return table_response(data, ["details" if details else "summary"], media_type)
+
     return {"data": data}
@@ -3,10 +3,11 @@ from typing import Any
 from fastapi import APIRouter, Body, Query
 from fastapi.responses import ORJSONResponse
 
+from nereid.api.utils import TimedRoute
 from nereid.models import network_models
 from nereid.src import tasks
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -20,9 +21,10 @@ async def validate_network(
         ...,
         openapi_examples=network_models.GraphExamples,  # type: ignore[arg-type]
     ),
+    timings: bool = False,
 ) -> dict[str, Any]:
     g: dict[str, Any] = graph.model_dump(by_alias=True)
-    data = tasks.validate_network(graph=g)
+    data = tasks.validate_network(graph=g, timings=timings)
     return {"data": data}
 
 
@@ -34,9 +36,10 @@ async def validate_network(
 )
 async def subgraph_network(
     subgraph_req: network_models.SubgraphRequest = Body(...),
+    timings: bool = False,
 ) -> dict[str, Any]:
     kwargs = subgraph_req.model_dump(by_alias=True)
-    data = tasks.network_subgraphs(**kwargs)
+    data = tasks.network_subgraphs(**kwargs, timings=timings)
     return {"data": data}
 
 
@@ -52,7 +55,14 @@ async def network_solution_sequence(
         openapi_examples=network_models.GraphExamples,  # type: ignore[arg-type]
     ),
     min_branch_size: int = Query(4),
+    n_partitions: int | None = Query(None, ge=1),
+    timings: bool = False,
 ) -> dict[str, Any]:
     g = graph.model_dump(by_alias=True)
-    data = tasks.solution_sequence(graph=g, min_branch_size=min_branch_size)
+    data = tasks.solution_sequence(
+        graph=g,
+        min_branch_size=min_branch_size,
+        n_partitions=n_partitions,
+        timings=timings,
+    )
     return {"data": data}
@@ -3,7 +3,7 @@ from typing import Any
 from fastapi import APIRouter, Body, Depends
 from fastapi.responses import ORJSONResponse
 
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import TimedRoute, get_valid_context
 from nereid.models.treatment_facility_models import (
     TreatmentFacilities,
     TreatmentFacilitiesResponse,
@@ -11,7 +11,7 @@ from nereid.models.treatment_facility_models import (
 )
 from nereid.src import tasks
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 def validate_facility_request(
@@ -38,6 +38,7 @@ async def initialize_treatment_facility_parameters(
     tmnt_facility_req: tuple[TreatmentFacilities, dict[str, Any]] = Depends(
         validate_facility_request
     ),
+    timings: bool = False,
 ) -> dict[str, Any]:
     treatment_facilities, context = tmnt_facility_req
 
@@ -45,5 +46,6 @@ async def initialize_treatment_facility_parameters(
         treatment_facilities=treatment_facilities.model_dump(),
         pre_validated=True,
         context=context,
+        timings=timings,
     )
     return {"data": data}
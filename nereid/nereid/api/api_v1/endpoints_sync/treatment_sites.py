@@ -3,14 +3,14 @@ from typing import Any
 from fastapi import APIRouter, Body, Depends
 from fastapi.responses import ORJSONResponse
 
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import TimedRoute, get_valid_context
 from nereid.models.treatment_site_models import (
     TreatmentSiteResponse,
     TreatmentSites,
 )
 from nereid.src import tasks
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post(
@@ -22,9 +22,10 @@ router = APIRouter()
 async def initialize_treatment_site(
     treatment_sites: TreatmentSites = Body(...),
     context: dict = Depends(get_valid_context),
+    timings: bool = False,
 ) -> dict[str, Any]:
     data = tasks.initialize_treatment_sites(
-        treatment_sites.model_dump(), context=context
+        treatment_sites.model_dump(), context=context, timings=timings
     )
 
     return {"data": data}
@@ -1,16 +1,47 @@
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import ORJSONResponse
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
 
-from nereid.api.utils import get_valid_context
+from nereid.api.utils import (
+    NDJSON_MEDIA_TYPE,
+    TABLE_MEDIA_TYPES,
+    TimedRoute,
+    get_projection,
+    get_valid_context,
+    ndjson_response,
+    table_response,
+    wants_ndjson,
+    wants_table,
+)
 from nereid.models.treatment_facility_models import (
     validate_treatment_facility_models,
 )
-from nereid.models.watershed_models import Watershed, WatershedResponse
+from nereid.models.watershed_models import (
+    Watershed,
+    WatershedDelta,
+    WatershedResponse,
+    WatershedScenarios,
+    WatershedScenariosResponse,
+    WatershedSessionResponse,
+    WatershedSizing,
+    WatershedSizingResponse,
+)
 from nereid.src import tasks
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+
+def watershed_projection(
+    projection: dict[str, Any] | None = Depends(get_projection),
+    include_resubmit: bool = False,
+) -> dict[str, Any] | None:
+    """With `include_resubmit`, the projected results keep the
+    `previous_results_keys` too.
+    """
+    if projection is not None:
+        projection["include_resubmit"] = include_resubmit
+    return projection
 
 
 def validate_watershed_request(
@@ -30,20 +61,203 @@ def validate_watershed_request(
     return watershed, context
 
 
+def validate_watershed_delta(
+    delta_req: WatershedDelta,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    delta: dict[str, Any] = delta_req.model_dump(by_alias=True)
+
+    unvalidated_treatment_facilities = delta.get("treatment_facilities")
+    if unvalidated_treatment_facilities is not None:
+        delta["treatment_facilities"] = validate_treatment_facility_models(
+            unvalidated_treatment_facilities, context
+        )
+
+    return delta, context
+
+
+def validate_watershed_sizing_request(
+    watershed_req: WatershedSizing,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    return validate_watershed_request(watershed_req, context)
+
+
+def validate_watershed_scenarios_request(
+    watershed_req: WatershedScenarios,
+    context: dict = Depends(get_valid_context),
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    watershed: dict[str, Any] = watershed_req.model_dump(by_alias=True)
+
+    unvalidated_treatment_facilities = watershed.get("treatment_facilities")
+    if unvalidated_treatment_facilities is not None:
+        watershed["treatment_facilities"] = validate_treatment_facility_models(
+            unvalidated_treatment_facilities, context
+        )
+
+    for scenario in watershed["scenarios"]:
+        scenario["treatment_facilities"] = validate_treatment_facility_models(
+            scenario["treatment_facilities"], context
+        )
+
+    return watershed, context
+
+
 @router.post(
     "/watershed/solve",
     tags=["watershed", "main"],
     response_model=WatershedResponse,
     response_class=ORJSONResponse,
+    responses={
+        200: {"content": {m: {} for m in [NDJSON_MEDIA_TYPE, *TABLE_MEDIA_TYPES]}}
+    },
 )
 async def post_solve_watershed(
+    request: Request,
     watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
         validate_watershed_request
     ),
-) -> dict[str, Any]:
+    projection: dict[str, Any] | None = Depends(watershed_projection),
+    verify: Literal["off", "sample", "full"] | None = None,
+    timings: bool = False,
+) -> dict[str, Any] | Response:
+    """With `Accept: application/x-ndjson`, each node result is streamed as one
+    line in topological order as soon as it is solved, followed by a
+    `{"trailer": {...}}` line with the `errors`, `warnings` and
+    `previous_results_keys`.
+
+    With `Accept: application/vnd.apache.arrow.stream` or `application/x-parquet`,
+    the results and leaf results are returned as one table with a column per
+    attribute. The `errors`, `warnings` and `previous_results_keys` are json-encoded
+    in the schema metadata.
+
+    `verify` selects the mass balance checks of the solved nodes: "full" checks
+    every node, "sample" checks a random fraction of them and "off" skips them.
+    Nodes that do not balance get an error in their `node_errors`. Defaults to the
+    `WATERSHED_VERIFY` setting.
+
+    If `timings` is true, the wall and CPU time of each phase of the solve is added
+    to the response as `timings`, or to the trailer of a streamed response.
+    """
     watershed, context = watershed_pkg
 
+    if wants_ndjson(request):
+        return ndjson_response(
+            tasks.solve_watershed_stream(
+                watershed=watershed,
+                treatment_pre_validated=True,
+                context=context,
+                projection=projection,
+                verify=verify,
+                timings=timings,
+            )
+        )
+
     data = tasks.solve_watershed(
-        watershed=watershed, treatment_pre_validated=True, context=context
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        projection=projection,
+        verify=verify,
+        timings=timings,
+    )
+
+    media_type = wants_table(request)
+    if media_type is not None:
+        return table_response(data, ["results", "leaf_results"], media_type)
+
+    return {"data": data}
+
+
+@router.post(
+    "/watershed/solve_scenarios",
+    tags=["watershed"],
+    response_model=WatershedScenariosResponse,
+    response_class=ORJSONResponse,
+)
+async def post_solve_watershed_scenarios(
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_scenarios_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+
+    data = tasks.solve_watershed_scenarios(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return {"data": data}
+
+
+@router.post(
+    "/watershed/size_facilities",
+    tags=["watershed"],
+    response_model=WatershedSizingResponse,
+    response_class=ORJSONResponse,
+)
+async def post_size_watershed_facilities(
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_sizing_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+
+    data = tasks.size_watershed_facilities(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return {"data": data}
+
+
+@router.post(
+    "/watershed/session",
+    tags=["watershed"],
+    response_model=WatershedSessionResponse,
+    response_class=ORJSONResponse,
+)
+async def post_create_watershed_session(
+    watershed_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_request
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    watershed, context = watershed_pkg
+
+    data = tasks.create_watershed_session(
+        watershed=watershed,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
+    )
+    return {"data": data}
+
+
+@router.post(
+    "/watershed/session/{session_id}",
+    tags=["watershed"],
+    response_model=WatershedSessionResponse,
+    response_class=ORJSONResponse,
+)
+async def post_update_watershed_session(
+    session_id: str,
+    delta_pkg: tuple[dict[str, Any], dict[str, Any]] = Depends(
+        validate_watershed_delta
+    ),
+    timings: bool = False,
+) -> dict[str, Any]:
+    delta, context = delta_pkg
+
+    data = tasks.update_watershed_session(
+        session_id=session_id,
+        delta=delta,
+        treatment_pre_validated=True,
+        context=context,
+        timings=timings,
     )
     return {"data": data}
@@ -1,13 +1,26 @@
-from typing import Any
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Coroutine, Iterable, Iterator
 
-from fastapi import HTTPException, Request
+import orjson
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.templating import Jinja2Templates
 
 from nereid.core.config import nereid_path
 from nereid.core.context import get_request_context, validate_request_context
+from nereid.core.io import arrow_ipc_bytes, parquet_bytes, records_to_arrow
+from nereid.core.timings import log_timings
 
 templates = Jinja2Templates(directory=f"{nereid_path}/static/templates")
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+TABLE_MEDIA_TYPES = [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE]
+
 
 def get_valid_context(
     request: Request,
@@ -30,3 +43,176 @@ def get_valid_context(
     request.app._context_cache[key] = context
 
     return context
+
+
+def get_projection(
+    fields: list[str] | None = Query(
+        None, description="the result keys to return. 'node_id' is always returned."
+    ),
+    include_patterns: list[str] | None = Query(
+        None,
+        description="shell-style wildcards of the result keys to return, e.g., 'TSS_*'.",
+    ),
+) -> dict[str, Any] | None:
+    """The projection of the node results, or None to return every key. See
+    `nereid.core.utils.project_dicts`.
+    """
+    if fields is None and include_patterns is None:
+        return None
+    return {"fields": fields or [], "include_patterns": include_patterns or []}
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _ndjson_lines(items: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    # same options as `ORJSONResponse`
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    for item in items:
+        yield orjson.dumps(item, option=option) + b"\n"
+
+
+def ndjson_response(items: Iterable[dict[str, Any]]) -> StreamingResponse:
+    """Stream each item as one line of newline-delimited json."""
+    return StreamingResponse(_ndjson_lines(items), media_type=NDJSON_MEDIA_TYPE)
+
+
+def wants_table(request: Request) -> str | None:
+    """The columnar media type that the request accepts, if any.
+
+    Node results are returned with one column per attribute, instead of repeating
+    every key of every node like json does.
+    """
+    accept = request.headers.get("accept", "")
+    return next((m for m in TABLE_MEDIA_TYPES if m in accept), None)
+
+
+def table_response(
+    data: dict[str, Any],
+    record_keys: list[str],
+    media_type: str,
+    metadata_keys: Iterable[str] = (
+        "errors",
+        "warnings",
+        "previous_results_keys",
+        "timings",
+    ),
+) -> Response:
+    """Return the node results of a task response as one columnar table, see
+    `nereid.core.io.records_to_arrow`. The `record_keys` lists of `data` are
+    concatenated into the rows, and the `metadata_keys` of `data` are stored in the
+    schema metadata. This requires the optional `pyarrow` dependency.
+    """
+    records = [dct for key in record_keys for dct in data.get(key) or []]
+    metadata = {k: data[k] for k in metadata_keys if k in data}
+
+    try:
+        table = records_to_arrow(records, metadata=metadata)
+    except ImportError as e:  # pragma: no cover
+        raise HTTPException(
+            status_code=406, detail=f"'{media_type}' responses require pyarrow."
+        ) from e
+
+    if media_type == PARQUET_MEDIA_TYPE:
+        content = parquet_bytes(table)
+    else:
+        content = arrow_ipc_bytes(table)
+
+    return Response(content=content, media_type=media_type)
+
+
+# the timing of the current request, kept by the route handler of a `TimedRoute`.
+_request_timing: ContextVar[dict[str, Any] | None] = ContextVar(
+    "nereid_request_timing", default=None
+)
+
+
+def _phase_timing(wall: float, cpu: float) -> dict[str, Any]:
+    return {
+        "wall_s": time.perf_counter() - wall,
+        "cpu_s": time.thread_time() - cpu,
+        "calls": 1,
+    }
+
+
+def _server_timing(phases: dict[str, dict[str, Any]]) -> str:
+    return ", ".join(
+        f"{name};dur={timing['wall_s'] * 1000:.1f}" for name, timing in phases.items()
+    )
+
+
+def _timed_endpoint(
+    endpoint: Callable[..., Coroutine[Any, Any, Any]],
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    @wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        timing = _request_timing.get()
+        if kwargs.get("timings") is not True or timing is None:
+            return await endpoint(*args, **kwargs)
+
+        validate_request = _phase_timing(*timing["received"])
+        content = await endpoint(*args, **kwargs)
+
+        data = content.get("data") if isinstance(content, dict) else None
+        task_timings = data.get("timings") if isinstance(data, dict) else None
+        if isinstance(task_timings, dict):
+            task_timings["phases"]["validate_request"] = validate_request
+            timing.update(
+                task=task_timings["task"],
+                validate_request=validate_request,
+                returned=(time.perf_counter(), time.thread_time()),
+            )
+        return content
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """Route that times the API layer around a task.
+
+    If an endpoint is called with `timings=true` and its json response has a
+    `data.timings` block, two phases are timed:
+
+    - "validate_request" is the time from receiving the request to calling the
+      endpoint, i.e., parsing the body, validating it against the request models,
+      and running the dependencies such as `get_valid_context` and the validation
+      of the treatment facilities. It is added to the `timings` block.
+    - "serialize_response" is the time FastAPI takes to build the response once
+      the endpoint returned, i.e., to validate it against the `response_model` of
+      the route and to encode it. Since the body is encoded by then, it is only
+      reported in the `Server-Timing` header, with "validate_request", and in a
+      record of `nereid.core.timings.log_timings`.
+
+    The CPU times only count the event loop thread, so the dependencies that run
+    in the thread pool only count towards the wall time of "validate_request".
+    Streamed and table responses are not timed.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            timing: dict[str, Any] = {
+                "received": (time.perf_counter(), time.thread_time())
+            }
+            token = _request_timing.set(timing)
+            try:
+                response = await handler(request)
+            finally:
+                _request_timing.reset(token)
+
+            returned = timing.get("returned")
+            if returned is not None:
+                phases = {
+                    "validate_request": timing["validate_request"],
+                    "serialize_response": _phase_timing(*returned),
+                }
+                response.headers["Server-Timing"] = _server_timing(phases)
+                log_timings({"task": timing["task"], "phases": phases})
+            return response
+
+        return timed_handler
@@ -39,13 +39,13 @@ def background_sleep(seconds: int = 1):  # pragma: no cover
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def validate_network(graph):  # pragma: no cover
-    return tasks.validate_network(graph=graph)
+def validate_network(graph, timings=False):  # pragma: no cover
+    return tasks.validate_network(graph=graph, timings=timings)
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def network_subgraphs(graph, nodes):  # pragma: no cover
-    return tasks.network_subgraphs(graph=graph, nodes=nodes)
+def network_subgraphs(graph, nodes, timings=False):  # pragma: no cover
+    return tasks.network_subgraphs(graph=graph, nodes=nodes, timings=timings)
 
 
 @celery_app.task(acks_late=True, track_started=True)
@@ -54,8 +54,15 @@ def render_subgraph_svg(task_result, npi):  # pragma: no cover
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def solution_sequence(graph, min_branch_size):  # pragma: no cover
-    return tasks.solution_sequence(graph=graph, min_branch_size=min_branch_size)
+def solution_sequence(
+    graph, min_branch_size, n_partitions=None, timings=False
+):  # pragma: no cover
+    return tasks.solution_sequence(
+        graph=graph,
+        min_branch_size=min_branch_size,
+        n_partitions=n_partitions,
+        timings=timings,
+    )
 
 
 @celery_app.task(acks_late=True, track_started=True)
@@ -64,35 +71,104 @@ def render_solution_sequence_svg(task_result, npi):  # pragma: no cover
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def land_surface_loading(land_surfaces, details, context):  # pragma: no cover
+def land_surface_loading(
+    land_surfaces, details, context, projection=None, timings=False
+):  # pragma: no cover
     return tasks.land_surface_loading(
-        land_surfaces=land_surfaces, details=details, context=context
+        land_surfaces=land_surfaces,
+        details=details,
+        context=context,
+        projection=projection,
+        timings=timings,
     )
 
 
 @celery_app.task(acks_late=True, track_started=True)
 def initialize_treatment_facilities(
-    treatment_facilities, pre_validated, context
+    treatment_facilities, pre_validated, context, timings=False
 ):  # pragma: no cover
     return tasks.initialize_treatment_facilities(
         treatment_facilities=treatment_facilities,
         pre_validated=pre_validated,
         context=context,
+        timings=timings,
     )
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def initialize_treatment_sites(treatment_sites, context):  # pragma: no cover
+def initialize_treatment_sites(
+    treatment_sites, context, timings=False
+):  # pragma: no cover
     return tasks.initialize_treatment_sites(
         treatment_sites=treatment_sites,
         context=context,
+        timings=timings,
     )
 
 
 @celery_app.task(acks_late=True, track_started=True)
-def solve_watershed(watershed, treatment_pre_validated, context):  # pragma: no cover
+def solve_watershed(
+    watershed,
+    treatment_pre_validated,
+    context,
+    projection=None,
+    verify=None,
+    timings=False,
+):  # pragma: no cover
     return tasks.solve_watershed(
         watershed=watershed,
         treatment_pre_validated=treatment_pre_validated,
         context=context,
+        projection=projection,
+        verify=verify,
+        timings=timings,
+    )
+
+
+@celery_app.task(acks_late=True, track_started=True)
+def solve_watershed_scenarios(
+    watershed, treatment_pre_validated, context, timings=False
+):  # pragma: no cover
+    return tasks.solve_watershed_scenarios(
+        watershed=watershed,
+        treatment_pre_validated=treatment_pre_validated,
+        context=context,
+        timings=timings,
+    )
+
+
+@celery_app.task(acks_late=True, track_started=True)
+def size_watershed_facilities(
+    watershed, treatment_pre_validated, context, timings=False
+):  # pragma: no cover
+    return tasks.size_watershed_facilities(
+        watershed=watershed,
+        treatment_pre_validated=treatment_pre_validated,
+        context=context,
+        timings=timings,
+    )
+
+
+@celery_app.task(acks_late=True, track_started=True)
+def create_watershed_session(
+    watershed, treatment_pre_validated, context, timings=False
+):  # pragma: no cover
+    return tasks.create_watershed_session(
+        watershed=watershed,
+        treatment_pre_validated=treatment_pre_validated,
+        context=context,
+        timings=timings,
+    )
+
+
+@celery_app.task(acks_late=True, track_started=True)
+def update_watershed_session(
+    session_id, delta, treatment_pre_validated, context, timings=False
+):  # pragma: no cover
+    return tasks.update_watershed_session(
+        session_id=session_id,
+        delta=delta,
+        treatment_pre_validated=treatment_pre_validated,
+        context=context,
+        timings=timings,
     )
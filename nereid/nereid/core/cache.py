@@ -0,0 +1,59 @@
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def content_hash(obj: Any) -> str:
+    """Digest of a json-like object that does not depend on dict insertion order."""
+    return hashlib.blake2b(
+        json.dumps(obj, sort_keys=True, default=str).encode(), digest_size=16
+    ).hexdigest()
+
+
+class LRUCache(Generic[T]):
+    """Thread-safe least recently used cache for objects that are expensive to build.
+
+    Unlike `functools.lru_cache`, the caller computes the key, so the arguments of
+    the builder do not need to be hashable, and the maximum size can be set when
+    the cache is used, e.g., from the settings of the app.
+    """
+
+    def __init__(self) -> None:
+        self._data: OrderedDict[str, T] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def keys(self) -> list[str]:
+        """keys from least to most recently used."""
+        return list(self._data)
+
+    def get_or_build(self, key: str, build: Callable[[], T], maxsize: int) -> T:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                return value
+
+        # build outside the lock; at worst two threads build the same value.
+        value = build()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
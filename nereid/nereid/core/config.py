@@ -29,6 +29,28 @@ class Settings(BaseSettings):
 
     STATIC_DOCS: bool = False
 
+    # number of per-region solver engines each process keeps; see
+    # `nereid.src.watershed.engine.get_watershed_engine`
+    ENGINE_CACHE_SIZE: int = 16
+    # number of network topologies each process keeps; see
+    # `nereid.src.watershed.solve_plan.get_solve_plan`
+    PLAN_CACHE_SIZE: int = 32
+    # most cycles reported by the network validation of one graph; see
+    # `nereid.src.network.validate.validate_network`
+    NETWORK_VALIDATION_MAX_CYCLES: int = 100
+
+    # mass balance checks of each watershed solve; "sample" checks a random
+    # fraction of the nodes. See `nereid.src.watershed.verification.verify_state`
+    WATERSHED_VERIFY: Literal["off", "sample", "full"] = "full"
+    WATERSHED_VERIFY_SAMPLE_FRACTION: float = 0.1
+
+    # watershed sessions are kept in a local SQLite file, see
+    # `nereid.core.session_store`. Celery workers can only serve the sessions of
+    # the API if they share this path. Defaults to a file in the temp directory.
+    SESSION_DB_PATH: str | None = None
+    SESSION_MAX_ENTRIES: int = 64
+    SESSION_TTL_SECONDS: float = 86400
+
     FORCE_FOREGROUND: bool = False
     ENABLE_ASYNC_ROUTES: bool = False
     ASYNC_ROUTE_PREFIX: str = "/async"
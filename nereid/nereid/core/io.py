@@ -2,14 +2,20 @@ import logging
 from collections import defaultdict
 from copy import deepcopy
 from functools import cache
+from numbers import Real
 from pathlib import Path
-from typing import Any, TypeAlias
+from typing import TYPE_CHECKING, Any, TypeAlias
 
 import numpy
 import orjson as json
 import pandas
 import yaml
 
+from nereid.core.timings import phase
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+
 logger = logging.getLogger("nereid.core")
 
 PathType: TypeAlias = Path | str
@@ -91,6 +97,72 @@ def load_ref_data(
     return df, msg
 
 
+def _column_values(values: list[Any]) -> tuple[str, list[Any]]:
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return "string", values
+    if all(issubclass(k, (bool, numpy.bool_)) for k in kinds):
+        return "bool", values
+    if all(issubclass(k, Real) and not issubclass(k, bool) for k in kinds):
+        return "float64", [None if v is None else float(v) for v in values]
+
+    def to_str(v: Any) -> str | None:
+        if v is None or isinstance(v, str):
+            return v
+        if isinstance(v, (list, tuple, dict)):
+            return json.dumps(v, option=json.OPT_SERIALIZE_NUMPY).decode()
+        return str(v)
+
+    return "string", [to_str(v) for v in values]
+
+
+def records_to_arrow(
+    records: list[dict[str, Any]], metadata: dict[str, Any] | None = None
+) -> "pyarrow.Table":
+    """Convert a list of dicts to a table with one column per key, in the order the
+    keys are first seen.
+
+    Columns of booleans are `bool`, columns of numbers are `float64` and any other
+    column is `string`; lists and dicts are json-encoded. Missing keys are null.
+    Each value of `metadata` is json-encoded into the schema metadata of the table.
+
+    This requires the optional `pyarrow` dependency.
+    """
+    import pyarrow
+
+    keys = dict.fromkeys(k for dct in records for k in dct)
+    arrays = {}
+    for key in keys:
+        dtype, values = _column_values([dct.get(key) for dct in records])
+        arrays[key] = pyarrow.array(values, type=dtype)
+
+    schema_metadata = {
+        k: json.dumps(v, option=json.OPT_SERIALIZE_NUMPY)
+        for k, v in (metadata or {}).items()
+    }
+    return pyarrow.table(arrays, metadata=schema_metadata or None)
+
+
+def arrow_ipc_bytes(table: "pyarrow.Table") -> bytes:
+    """Serialize a table in the Arrow IPC streaming format."""
+    import pyarrow
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return bytes(sink.getvalue())
+
+
+def parquet_bytes(table: "pyarrow.Table") -> bytes:
+    """Serialize a table as a parquet file."""
+    import pyarrow
+    import pyarrow.parquet
+
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(table, sink)
+    return bytes(sink.getvalue())
+
+
 def parse_expand_fields(
     df: pandas.DataFrame,
     params: list[dict[str, Any]],
@@ -292,6 +364,7 @@ def parse_remaps(
     return df, messages
 
 
+@phase("parse_configuration_logic")
 def parse_configuration_logic(
     df: pandas.DataFrame,
     config_section: str,
@@ -326,6 +399,9 @@ def parse_configuration_logic(
         for directive, params in section.items():
             func = ops.get(directive)
             if func:  # pragma: no branch
-                df, msg = func(df, params, config_section, config_object, context, msg)
+                with phase(func.__name__):
+                    df, msg = func(
+                        df, params, config_section, config_object, context, msg
+                    )
 
     return df, msg
@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import tempfile
+import time
+import uuid
+import zlib
+from contextlib import closing
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from nereid.core.config import settings
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        data BLOB NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_sessions_accessed ON sessions (accessed)",
+]
+
+
+class SessionStore:
+    """Bounded on-disk store of json-serializable session data.
+
+    Sessions are kept in a local SQLite database so that the API process and the
+    celery workers of one host can share them without any external service. The
+    store holds at most `max_entries` sessions; the least recently used ones are
+    evicted first, and sessions that were not used for `ttl_seconds` expire.
+
+    Each write increments the `version` of a session, so that a read-modify-write
+    can be made safe against concurrent writers with `get_versioned` and a `put`
+    of that version, which fails if the session changed in between.
+
+    Parameters
+    ----------
+    path : path or str
+        the SQLite database file. ":memory:" is not supported since every operation
+        opens its own connection.
+    max_entries : int
+    ttl_seconds : float
+    """
+
+    def __init__(
+        self, path: Path | str, max_entries: int = 64, ttl_seconds: float = 86400
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            for stmt in _SCHEMA:
+                con.execute(stmt)
+
+            # databases created before sessions were versioned.
+            columns = [row[1] for row in con.execute("PRAGMA table_info(sessions)")]
+            if "version" not in columns:
+                try:
+                    con.execute(
+                        "ALTER TABLE sessions "
+                        "ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                    )
+                except sqlite3.OperationalError:  # pragma: no cover
+                    pass  # added by another process in the meantime.
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _dumps(data: dict[str, Any]) -> bytes:
+        # the stdlib encoder keeps NaN, which the solver distinguishes from null.
+        return zlib.compress(json.dumps(data).encode())
+
+    @staticmethod
+    def _loads(blob: bytes) -> dict[str, Any]:
+        data: dict[str, Any] = json.loads(zlib.decompress(blob))
+        return data
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as con:
+            (n,) = con.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return int(n)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id, touch=False) is not None
+
+    def create(self, data: dict[str, Any]) -> str:
+        session_id = uuid.uuid4().hex
+        self.put(session_id, data)
+        return session_id
+
+    def get(self, session_id: str, touch: bool = True) -> dict[str, Any] | None:
+        """returns the session data, or None if it does not exist or has expired."""
+        found = self.get_versioned(session_id, touch=touch)
+        return None if found is None else found[0]
+
+    def get_versioned(
+        self, session_id: str, touch: bool = True
+    ) -> tuple[dict[str, Any], int] | None:
+        """returns the session data and its version, or None if it does not exist or
+        has expired."""
+        now = time.time()
+        with closing(self._connect()) as con, con:
+            row = con.execute(
+                "SELECT accessed, data, version FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            accessed, blob, version = row
+            if now - accessed > self.ttl_seconds:
+                con.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                return None
+
+            if touch:
+                con.execute(
+                    "UPDATE sessions SET accessed = ? WHERE session_id = ?",
+                    (now, session_id),
+                )
+
+        return self._loads(blob), int(version)
+
+    def put(
+        self, session_id: str, data: dict[str, Any], version: int | None = None
+    ) -> bool:
+        """Store the data of a session.
+
+        If `version` is given, the data is only stored if the session still has
+        that version, i.e., it was not written since it was read with
+        `get_versioned`. Returns whether the data was stored.
+        """
+        now = time.time()
+        blob = self._dumps(data)
+        with closing(self._connect()) as con, con:
+            if version is None:
+                cur = con.execute(
+                    "INSERT INTO sessions (session_id, created, accessed, data) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (session_id) DO UPDATE "
+                    "SET accessed = excluded.accessed, data = excluded.data, "
+                    "version = version + 1",
+                    (session_id, now, now, blob),
+                )
+            else:
+                cur = con.execute(
+                    "UPDATE sessions SET accessed = ?, data = ?, version = version + 1 "
+                    "WHERE session_id = ? AND version = ?",
+                    (now, blob, session_id, version),
+                )
+            self._evict(con, now)
+
+        return cur.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        with closing(self._connect()) as con, con:
+            cur = con.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+        return cur.rowcount > 0
+
+    def clear(self) -> None:
+        with closing(self._connect()) as con, con:
+            con.execute("DELETE FROM sessions")
+
+    def _evict(self, con: sqlite3.Connection, now: float) -> None:
+        con.execute(
+            "DELETE FROM sessions WHERE accessed < ?", (now - self.ttl_seconds,)
+        )
+        con.execute(
+            "DELETE FROM sessions WHERE session_id NOT IN "
+            "(SELECT session_id FROM sessions ORDER BY accessed DESC LIMIT ?)",
+            (max(self.max_entries, 0),),
+        )
+
+
+_stores: dict[tuple[str, int, float], SessionStore] = {}
+_stores_lock = Lock()
+
+
+def get_session_store() -> SessionStore:
+    """The session store configured by the `SESSION_*` settings."""
+    path = settings.SESSION_DB_PATH or str(
+        Path(tempfile.gettempdir()) / "nereid" / "sessions.sqlite"
+    )
+    key = (path, settings.SESSION_MAX_ENTRIES, settings.SESSION_TTL_SECONDS)
+
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SessionStore(
+                path,
+                max_entries=settings.SESSION_MAX_ENTRIES,
+                ttl_seconds=settings.SESSION_TTL_SECONDS,
+            )
+        return _stores[key]
@@ -0,0 +1,183 @@
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+logger = logging.getLogger(__name__)
+
+
+class Timings:
+    """Wall and CPU time of the phases of a task, and counters of the work it did.
+
+    A phase is timed each time it is entered, and phases may be nested, so the time
+    of a phase is also included in the time of the phases around it. The CPU time
+    is the time of the current thread. The CPU time of a task that runs its steps on
+    different threads, e.g., the items of a generator task that is streamed from a
+    thread pool, is the sum of its `step`s instead.
+
+    Timings are only collected for the task that activated them, see `timed_task`.
+    Everywhere else, `phase` and `count` do nothing.
+    """
+
+    def __init__(self, task: str) -> None:
+        self.task = task
+        self.phases: dict[str, dict[str, Any]] = {}
+        self.counts: dict[str, int] = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._steps_cpu: float | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            timing = self.phases.setdefault(
+                name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0}
+            )
+            timing["wall_s"] += time.perf_counter() - wall
+            timing["cpu_s"] += time.thread_time() - cpu
+            timing["calls"] += 1
+
+    @contextmanager
+    def step(self) -> Iterator[None]:
+        """Count the CPU time of this block, on the current thread, towards the
+        task. Once a task has steps, its CPU time is the sum of them.
+        """
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self._steps_cpu = (self._steps_cpu or 0.0) + time.thread_time() - cpu
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def to_dict(self) -> dict[str, Any]:
+        if self._steps_cpu is None:
+            cpu_s = time.thread_time() - self._cpu
+        else:
+            cpu_s = self._steps_cpu
+        return {
+            "task": self.task,
+            "wall_s": time.perf_counter() - self._wall,
+            "cpu_s": cpu_s,
+            "phases": {k: dict(v) for k, v in self.phases.items()},
+            "counts": dict(self.counts),
+        }
+
+
+_active: ContextVar[Timings | None] = ContextVar("nereid_timings", default=None)
+
+
+@contextmanager
+def activate(timings: Timings) -> Iterator[Timings]:
+    """Collect the phases and counts of the code run in this block into `timings`,
+    e.g., to profile a task without its `timings` argument, or with a `Timings`
+    subclass that measures more than time.
+    """
+    token = _active.set(timings)
+    try:
+        yield timings
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the active task, if it collects timings. This can also
+    decorate a function to time each call as a phase.
+    """
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+
+    with timings.phase(name):
+        yield
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add `n` to a counter of the active task, if it collects timings."""
+    timings = _active.get()
+    if timings is not None:
+        timings.count(name, n)
+
+
+def log_timings(timings: dict[str, Any]) -> None:
+    """Emit the timings of a task as a structured log record. The timings are in the
+    `timings` attribute of the record, so the `nereid.core.log.JSONLogFormatter`
+    writes them as a json object.
+    """
+    logger.info("timings of task '%s'", timings["task"], extra={"timings": timings})
+
+
+def _report(timings: Timings) -> dict[str, Any]:
+    report = timings.to_dict()
+    log_timings(report)
+    return report
+
+
+def _timed_generator(func: Callable[..., Iterator[Any]]) -> Callable[..., Any]:
+    @wraps(func)
+    def wrapper(*args: Any, timings: bool = False, **kwargs: Any) -> Iterator[Any]:
+        if not timings:
+            yield from func(*args, **kwargs)
+            return
+
+        _timings = Timings(func.__name__)
+        items = func(*args, **kwargs)
+        while True:
+            # only activate the timings while the task itself runs. Each item may
+            # be requested from another thread, e.g., by a `StreamingResponse`.
+            with activate(_timings), _timings.step():
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+
+            if isinstance(item, dict) and "trailer" in item:
+                item["trailer"]["timings"] = _report(_timings)
+            yield item
+
+    return wrapper
+
+
+def timed_task(func: Callable[P, R]) -> Callable[..., R]:
+    """Add an opt-in `timings` keyword argument to a task.
+
+    If it is true, the phases of the task are timed, logged with `log_timings`, and
+    added to the task response as `timings`. The timings of a generator task are
+    added to its `{"trailer": {...}}` item, e.g., the last item of
+    `solve_watershed_stream`.
+
+    A timed task that is called by another one is timed as a phase of the caller.
+    """
+
+    if inspect.isgeneratorfunction(func):
+        return _timed_generator(func)
+
+    @wraps(func)
+    def wrapper(*args: Any, timings: bool = False, **kwargs: Any) -> R:
+        active = _active.get()
+        if not timings:
+            if active is None:
+                return func(*args, **kwargs)
+            with active.phase(func.__name__):
+                return func(*args, **kwargs)
+
+        with activate(Timings(func.__name__)) as _timings:
+            response = func(*args, **kwargs)
+
+        if isinstance(response, dict):
+            response["timings"] = _report(_timings)
+        return response
+
+    return wrapper
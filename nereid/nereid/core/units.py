@@ -32,9 +32,18 @@ def conversion_factor_from_to(from_unit: str, to_unit: str) -> float:
     return factor
 
 
+_defined_from_context: set[str] = set()
+
+
 def update_reg_from_context(context: dict[str, Any]) -> None:
-    for reg in context.get("pint_unit_registry", []):
+    definitions = context.get("pint_unit_registry", [])
+    if _defined_from_context.issuperset(definitions):
+        # nothing new to define, so the cached conversion factors are still valid.
+        return
+
+    for reg in definitions:
         ureg.define(reg)
+        _defined_from_context.add(reg)
     for cached_fxn in [
         conversion_factor_load_to_conc,
         conversion_factor_conc_to_load,
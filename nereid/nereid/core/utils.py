@@ -1,6 +1,7 @@
+from fnmatch import fnmatchcase
 from functools import reduce
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import numpy
 import pandas
@@ -75,6 +76,40 @@ def dictlist_to_dict(dictlist, key):
     return result
 
 
+def project_dicts(
+    dictlist: list[dict[str, Any]],
+    projection: dict[str, Any] | None,
+    keep: Iterable[str] = (),
+) -> list[dict[str, Any]]:
+    """Reduce each dict to the keys selected by a projection.
+
+    Parameters
+    ----------
+    dictlist : list of dicts
+    projection : dict or None
+        the `fields` to keep, and the `include_patterns` of the keys to keep, as
+        shell-style wildcards, e.g., "TSS_*". If None, the dicts are returned as is.
+    keep : iterable of str
+        more keys to keep. The "node_id" is always kept.
+
+    """
+    if projection is None:
+        return dictlist
+
+    keys = {"node_id", *(projection.get("fields") or []), *keep}
+    patterns = projection.get("include_patterns") or []
+
+    # the dicts mostly share their keys, so only match each key once.
+    selected: dict[str, bool] = {}
+
+    def is_selected(key: str) -> bool:
+        if key not in selected:
+            selected[key] = key in keys or any(fnmatchcase(key, p) for p in patterns)
+        return selected[key]
+
+    return [{k: v for k, v in dct.items() if is_selected(k)} for dct in dictlist]
+
+
 def _merge(a: dict, b: dict) -> dict:  # pragma: no cover # used only by main.py
     """Recursive dictionary update of `a` with `b`.
 
@@ -15,6 +15,8 @@ from nereid.core import io
 from nereid.core.config import nereid_path, settings
 from nereid.models.response_models import JSONAPIResponse
 from nereid.src.nomograph import nomo
+from nereid.src.watershed.engine import engine_cache_clear
+from nereid.src.watershed.solve_plan import plan_cache_clear
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,8 @@ logger = logging.getLogger(__name__)
 def cache_clear():
     for func in [io._load_file, io._load_table, nomo.build_nomo]:
         func.cache_clear()
+    engine_cache_clear()
+    plan_cache_clear()
 
 
 def create_app(
@@ -3,7 +3,8 @@ from typing import Annotated
 from pydantic import BaseModel, BeforeValidator, Field
 
 from nereid.models.node import Node
-from nereid.models.response_models import JSONAPIResponse
+from nereid.models.response_models import JSONAPIResponse, Timings
+from nereid.models.results_models import Result
 
 ## Land Surface Request Models
 
@@ -103,9 +104,11 @@ class LandSurfaceDetails(LandSurfaceBase):
 
 
 class LandSurfaceResults(BaseModel):
-    summary: list[LandSurfaceSummary] | None = None
-    details: list[LandSurfaceDetails] | None = None
+    # projected results only hold the requested keys.
+    summary: list[LandSurfaceSummary] | list[Result] | None = None
+    details: list[LandSurfaceDetails] | list[Result] | None = None
     errors: list[str] | None = None
+    timings: Timings | None = None
 
 
 class LandSurfaceResponse(JSONAPIResponse):
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field, StrictStr, model_validator
 from typing_extensions import Annotated, Self
 
-from nereid.models.response_models import JSONAPIResponse
+from nereid.models.response_models import JSONAPIResponse, Timings
 from nereid.src.tasks import validate_network
 
 ## Network Request Models
@@ -136,6 +136,7 @@ class Nodes(BaseModel):
 
 class SubgraphNodes(BaseModel):
     subgraph_nodes: list[Nodes]
+    timings: Timings | None = None
 
 
 class SubgraphRequest(BaseModel):
@@ -162,8 +163,27 @@ class ParallelSeriesSequence(BaseModel):
     parallel: list[SeriesSequence]
 
 
+class Partition(BaseModel):
+    id: int
+    nodes: list[Node]
+    roots: list[str]
+    cost: float
+    depends_on: list[int]
+    stage: int
+
+
+class PartitionSchedule(BaseModel):
+    partitions: list[Partition]
+    total_cost: float
+    target_cost: float
+    critical_path: list[int]
+    critical_path_cost: float
+
+
 class SolutionSequence(BaseModel):
     solution_sequence: ParallelSeriesSequence
+    schedule: PartitionSchedule | None = None
+    timings: Timings | None = None
 
 
 class NetworkValidation(BaseModel):
@@ -172,6 +192,7 @@ class NetworkValidation(BaseModel):
     edge_cycles: list[list[str]] | None = []
     multiple_out_edges: list[list[str]] | None = []
     duplicate_edges: list[list[str]] | None = []
+    timings: Timings | None = None
 
 
 ## Network Response Models
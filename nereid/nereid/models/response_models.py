@@ -8,3 +8,17 @@ class JSONAPIResponse(BaseModel):
     task_id: str | None = None
     result_route: str | None = None
     data: Any | None = None
+
+
+class PhaseTiming(BaseModel):
+    wall_s: float
+    cpu_s: float
+    calls: int
+
+
+class Timings(BaseModel):
+    task: str
+    wall_s: float
+    cpu_s: float
+    phases: dict[str, PhaseTiming] = {}
+    counts: dict[str, int] = {}
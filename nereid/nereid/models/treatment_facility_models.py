@@ -2,9 +2,10 @@ from typing import Annotated, Any, TypeAlias
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+from nereid.core.timings import phase
 from nereid.core.utils import validate_with_discriminator
 from nereid.models.node import Node
-from nereid.models.response_models import JSONAPIResponse
+from nereid.models.response_models import JSONAPIResponse, Timings
 
 
 class _Base(Node):
@@ -482,6 +483,7 @@ EXAMPLE_TREATMENT_FACILITIES: dict = {
 class TreatmentFacilities(BaseModel):
     treatment_facilities: list[dict[str, Any] | STRUCTURAL_FACILITY_TYPE]
     errors: list[str] | None = None
+    timings: Timings | None = None
     model_config = {"json_schema_extra": {"example": EXAMPLE_TREATMENT_FACILITIES}}
 
 
@@ -489,6 +491,7 @@ class TreatmentFacilitiesResponse(JSONAPIResponse):
     data: TreatmentFacilities | None = None
 
 
+@phase("validate_treatment_facility_models")
 def validate_treatment_facility_models(
     unvalidated_data: list[dict[str, Any]], context: dict[str, Any]
 ) -> list[dict[str, Any]]:
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 
-from nereid.models.response_models import JSONAPIResponse
+from nereid.models.response_models import JSONAPIResponse, Timings
 from nereid.models.treatment_facility_models import SimpleFacilityBase
 
 ## Treatment Site Request Models
@@ -70,6 +70,7 @@ class TreatmentSiteGroup(BaseModel):
 
 class TreatmentSiteGroups(BaseModel):
     treatment_sites: list[TreatmentSiteGroup]
+    timings: Timings | None = None
 
 
 class TreatmentSiteResponse(JSONAPIResponse):
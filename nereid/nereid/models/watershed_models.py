@@ -1,10 +1,11 @@
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from nereid.models.land_surface_models import LandSurface
-from nereid.models.network_models import Graph
-from nereid.models.response_models import JSONAPIResponse
+from nereid.models.network_models import Edge, Graph
+from nereid.models.node import Node
+from nereid.models.response_models import JSONAPIResponse, Timings
 from nereid.models.results_models import PreviousResult, Result
 from nereid.models.treatment_facility_models import STRUCTURAL_FACILITY_TYPE
 from nereid.models.treatment_site_models import TreatmentSite
@@ -401,10 +402,58 @@ class Watershed(BaseModel):
     ) = None
     treatment_sites: list[TreatmentSite] | None = None
     previous_results: list[PreviousResult] | None = None
+    dirty_nodes: list[str] | None = None
 
     model_config = {"json_schema_extra": {"example": EXAMPLE_WATERSHED}}
 
 
+class WatershedDelta(BaseModel):
+    """Changes to the watershed of a session.
+
+    Land surfaces and treatment sites replace all of the existing ones on the same
+    node. Treatment facilities replace the facility on the same node. The `remove_*`
+    lists hold the node ids to remove them from.
+    """
+
+    add_edges: list[Edge] | None = None
+    remove_edges: list[Edge] | None = None
+    land_surfaces: list[LandSurface] | None = None
+    remove_land_surfaces: list[str] | None = None
+    treatment_facilities: (
+        list[dict[str, Any]] | list[STRUCTURAL_FACILITY_TYPE] | None
+    ) = None
+    remove_treatment_facilities: list[str] | None = None
+    treatment_sites: list[TreatmentSite] | None = None
+    remove_treatment_sites: list[str] | None = None
+
+
+class Scenario(BaseModel):
+    """Treatment facilities that replace the facility of the same node of the base
+    watershed, or add one to a node without a facility.
+    """
+
+    scenario_id: str
+    treatment_facilities: list[dict[str, Any]] | list[STRUCTURAL_FACILITY_TYPE]
+
+
+class WatershedScenarios(Watershed):
+    scenarios: list[Scenario] = []
+
+
+class FacilitySizingTarget(Node):
+    """The capture, retention, or load removal of `pollutant` that a facility must
+    achieve, as a percent of its inflow.
+    """
+
+    target: Literal["captured_pct", "retained_pct", "load_removed_pct"]
+    value: float = Field(..., ge=0.0, le=100.0)
+    pollutant: str | None = None
+
+
+class WatershedSizing(Watershed):
+    sizing_targets: list[FacilitySizingTarget] = []
+
+
 ## Response Models
 
 
@@ -414,7 +463,54 @@ class WatershedResults(BaseModel):
     previous_results_keys: list[str] | None = None
     errors: list[str] | None = None
     warnings: list[str] | None = None
+    timings: Timings | None = None
 
 
 class WatershedResponse(JSONAPIResponse):
     data: WatershedResults | None = None
+
+
+class WatershedSessionResults(WatershedResults):
+    session_id: str | None = None
+
+
+class WatershedSessionResponse(JSONAPIResponse):
+    data: WatershedSessionResults | None = None
+
+
+class ScenarioResults(BaseModel):
+    scenario_id: str
+    results: list[Result] | None = None
+    leaf_results: list[Result] | None = None
+    errors: list[str] | None = None
+    warnings: list[str] | None = None
+
+
+class WatershedScenariosResults(WatershedResults):
+    scenarios: list[ScenarioResults] | None = None
+
+
+class WatershedScenariosResponse(JSONAPIResponse):
+    data: WatershedScenariosResults | None = None
+
+
+class FacilitySizingResult(FacilitySizingTarget):
+    value: float
+    size_field: str | None = None
+    size: float | None = None
+    converged: bool | None = None
+    achieved_pct: float | None = None
+    errors: list[str] | None = None
+
+
+class WatershedSizingResults(BaseModel):
+    sizing: list[FacilitySizingResult] | None = None
+    results: list[Result] | None = None
+    leaf_results: list[Result] | None = None
+    errors: list[str] | None = None
+    warnings: list[str] | None = None
+    timings: Timings | None = None
+
+
+class WatershedSizingResponse(JSONAPIResponse):
+    data: WatershedSizingResults | None = None
@@ -3,7 +3,9 @@ from typing import Any
 import pandas
 
 from nereid.core.io import parse_configuration_logic
+from nereid.core.timings import count, timed_task
 from nereid.core.units import update_reg_from_context
+from nereid.core.utils import project_dicts
 from nereid.src.land_surface.loading import (
     detailed_loading_results,
     summary_loading_results,
@@ -11,14 +13,21 @@ from nereid.src.land_surface.loading import (
 from nereid.src.wq_parameters import init_wq_parameters
 
 
+@timed_task
 def land_surface_loading(
-    land_surfaces: dict[str, Any], details: bool, context: dict[str, Any]
+    land_surfaces: dict[str, Any],
+    details: bool,
+    context: dict[str, Any],
+    projection: dict[str, Any] | None = None,
 ) -> dict[str, list]:
     """computes loading for volume runoff and pollutants for each land
     surface 'sliver' and aggregates values for each node. Returning results
     for the slivers is toggled by the `details` kwarg. if 'true' the response
     includes a 'details' key with the sliver loading. the 'summary' values
     aggregate the load to each node_id, and are always returned.
+
+    If a `projection` is given, the summary and details only hold the selected
+    keys, see `nereid.core.utils.project_dicts`.
     """
 
     update_reg_from_context(context=context)
@@ -26,6 +35,7 @@ def land_surface_loading(
     response: dict[str, Any] = {"errors": []}
 
     land_surface_list = land_surfaces.get("land_surfaces") or []
+    count("land_surfaces", len(land_surface_list))
 
     try:
         if land_surface_list:  # pragma: no branch
@@ -73,11 +83,16 @@ def land_surface_loading(
             )
             summary_results["node_type"] = "land_surface"
 
-            response["summary"] = summary_results.fillna(0).to_dict(orient="records")
+            response["summary"] = project_dicts(
+                summary_results.fillna(0).to_dict(orient="records"), projection
+            )
 
             if details:
-                response["details"] = (
-                    detailed_results.infer_objects().fillna(0).to_dict(orient="records")
+                response["details"] = project_dicts(
+                    detailed_results.infer_objects()
+                    .fillna(0)
+                    .to_dict(orient="records"),
+                    projection,
                 )
         else:  # pragma: no cover
             response["warning"].append("WARNING: no land surface input data provided.")
@@ -1,6 +1,9 @@
-from typing import Hashable, Iterable
+from typing import Callable, Hashable, Iterable
 
 import networkx as nx
+import numpy
+
+from nereid.src.network.compact import CompactGraph
 
 
 def find_cycle(g: nx.Graph, **kwargs: dict) -> list:
@@ -26,38 +29,246 @@ def get_subset(g: nx.DiGraph, nodes: Hashable | Iterable[Hashable]) -> set:
 
     nodes_ = set(nodes) & set(g.nodes())
     node_parents = {s for n in nodes_ for s in g.predecessors(n)}
-    desc = {s for n in nodes_ for s in get_all_successors(g, n)}
+    # one walk from every dirty node, so shared descendants are only visited once.
+    desc = _reachable(g.successors, nodes_)
     desc_parents = {s for d in desc for s in g.predecessors(d)}
 
     return nodes_ | node_parents | desc | desc_parents
 
 
-def get_all_predecessors(
-    g: nx.DiGraph, node: Hashable, subset: set | None = None
+def _reachable(
+    neighbors: Callable[[Hashable], Iterable[Hashable]],
+    nodes: Iterable[Hashable],
+    subset: set | None = None,
 ) -> set:
-    """This algorithm is a good deal faster than the nx.ancestors variant,
-    **but** it only works on directed acyclic graphs (DAGs).
+    """Every node reachable from `nodes` by repeatedly following `neighbors`, added
+    to `subset`. This is an iterative depth-first search, so it is not limited by
+    the recursion limit on long chains of nodes.
     """
     if subset is None:
         subset = set()
 
-    for p in g.predecessors(node):
-        subset.add(p)
-        get_all_predecessors(g, p, subset=subset)
+    seen: set = set()
+    stack = list(nodes)
+    while stack:
+        for m in neighbors(stack.pop()):
+            if m not in seen:
+                seen.add(m)
+                stack.append(m)
+
+    subset.update(seen)
     return subset
 
 
+def get_all_predecessors(
+    g: nx.DiGraph, node: Hashable, subset: set | None = None
+) -> set:
+    """This algorithm is a good deal faster than the nx.ancestors variant,
+    **but** it only works on directed acyclic graphs (DAGs).
+    """
+    return _reachable(g.predecessors, [node], subset=subset)
+
+
 def get_all_successors(g: nx.DiGraph, node: Hashable, subset: set | None = None) -> set:
     """This algorithm is a good deal faster than the nx.descendants variant,
     **but** it only works on directed acyclic graphs (DAGs).
     """
-    if subset is None:
-        subset = set()
+    return _reachable(g.successors, [node], subset=subset)
 
-    for s in g.successors(node):
-        subset.add(s)
-        get_all_successors(g, s, subset=subset)
-    return subset
+
+class AncestorIndex:
+    """Memoized ancestor and descendant sets of the nodes of a directed acyclic graph.
+
+    The set of a node is built from the sets of its neighbors, and every set that
+    is built is kept. A query only walks the nodes whose sets are not known yet, so
+    a query for a node downstream of earlier queries costs about the size of its
+    answer. The memory of the index is the total size of the sets it keeps, which
+    is quadratic in the length of a chain of nodes, so it suits queries of bounded
+    size, e.g., `find_leafy_branch_larger_than_size`.
+
+    The index must be rebuilt if the graph changes.
+
+    Parameters
+    ----------
+    g : nx.DiGraph
+        a directed acyclic graph.
+    """
+
+    def __init__(self, g: nx.DiGraph) -> None:
+        self.g = g
+        self._ancestors: dict[Hashable, frozenset] = {}
+        self._descendants: dict[Hashable, frozenset] = {}
+
+    def ancestors(self, node: Hashable) -> frozenset:
+        """every node upstream of `node`, like `get_all_predecessors`."""
+        return self._query(node, self.g.predecessors, self._ancestors)
+
+    def descendants(self, node: Hashable) -> frozenset:
+        """every node downstream of `node`, like `get_all_successors`."""
+        return self._query(node, self.g.successors, self._descendants)
+
+    @staticmethod
+    def _query(
+        node: Hashable,
+        neighbors: Callable[[Hashable], Iterable[Hashable]],
+        memo: dict[Hashable, frozenset],
+    ) -> frozenset:
+        # post-order walk of the unknown nodes, so that the sets of the neighbors
+        # of a node are known by the time it is built.
+        stack = [node]
+        while stack:
+            n = stack[-1]
+            nbrs = list(neighbors(n))
+            unknown = [m for m in nbrs if m not in memo]
+            if unknown:
+                stack.extend(unknown)
+                continue
+
+            stack.pop()
+            if n not in memo:
+                memo[n] = frozenset(nbrs).union(*[memo[m] for m in nbrs])
+
+        return memo[node]
+
+
+def any_in_intervals(
+    lo: numpy.ndarray, hi: numpy.ndarray, points: numpy.ndarray
+) -> numpy.ndarray:
+    """Whether each closed interval `[lo, hi]` holds any of the integer `points`."""
+    points = numpy.sort(points)
+    return numpy.searchsorted(points, hi, side="right") > numpy.searchsorted(
+        points, lo, side="left"
+    )
+
+
+class EulerTourIndex:
+    """Entry and exit times of a depth-first traversal of a network where each node
+    has at most one out edge, i.e., a forest of in-trees.
+
+    The traversal starts at each root and walks upstream, so the nodes upstream of
+    a node are the ones entered after it and before it exits. Upstream and
+    downstream queries are interval arithmetic on these times, without walking the
+    graph again. The index must be rebuilt if the graph changes.
+
+    Parameters
+    ----------
+    g : nx.DiGraph or CompactGraph
+        a network where each node has at most one out edge.
+
+    Attributes
+    ----------
+    nodes : list
+        node ids in the order of the graph.
+    index : dict
+        the integer index of each node id.
+    parent : numpy.ndarray
+        index of the successor of each node, or -1 for roots.
+    entry, exit : numpy.ndarray
+        the pre-order position of each node, and the last pre-order position of its
+        upstream nodes. Node `i` is upstream of node `j` if
+        `entry[j] < entry[i] <= exit[j]`.
+    order : numpy.ndarray
+        the node indices in pre-order.
+    root : numpy.ndarray
+        index of the root that each node drains to.
+    """
+
+    def __init__(self, g: nx.DiGraph | CompactGraph) -> None:
+        cg = g if isinstance(g, CompactGraph) else CompactGraph.from_networkx(g)
+        self.nodes = cg.ids
+        self.index = cg.index
+        n_nodes = len(self.nodes)
+
+        if numpy.any(cg.out_degrees > 1):
+            raise nx.NetworkXUnfeasible("each node must have at most one out edge.")
+
+        self.parent = numpy.full(n_nodes, -1, dtype=int)
+        self.parent[cg.src] = cg.dst
+
+        bounds = cg.pred_ptr.tolist()
+        upstream = cg.pred_idx.tolist()
+
+        order: list[int] = []
+        root = list(range(n_nodes))
+        stack = numpy.flatnonzero(self.parent < 0)[::-1].tolist()
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            predecessors = upstream[bounds[i] : bounds[i + 1]]
+            for p in predecessors:
+                root[p] = root[i]
+            stack.extend(reversed(predecessors))
+
+        # the nodes of a cycle do not drain to a root.
+        if len(order) != n_nodes:
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+
+        size = [1] * n_nodes
+        parent = self.parent.tolist()
+        for i in reversed(order):
+            if parent[i] >= 0:
+                size[parent[i]] += size[i]
+
+        self.order = numpy.array(order, dtype=int)
+        self.entry = numpy.empty(n_nodes, dtype=int)
+        self.entry[self.order] = numpy.arange(n_nodes)
+        self.exit = self.entry + numpy.array(size, dtype=int) - 1
+        self.root = numpy.array(root, dtype=int)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def rows(self, nodes: Hashable | Iterable[Hashable]) -> numpy.ndarray:
+        """indices of `nodes`, skipping the ones that are not in the graph."""
+        if isinstance(nodes, Hashable):
+            nodes = [nodes]
+        return numpy.array([self.index[n] for n in nodes if n in self.index], int)
+
+    def is_upstream(self, a: Hashable, b: Hashable) -> bool:
+        """whether `a` drains to `b`."""
+        i, j = self.index[a], self.index[b]
+        return bool(self.entry[j] < self.entry[i] <= self.exit[j])
+
+    def ancestors(self, node: Hashable) -> list[Hashable]:
+        """every node upstream of `node`, in pre-order."""
+        i = self.index[node]
+        rows = self.order[self.entry[i] + 1 : self.exit[i] + 1]
+        return [self.nodes[r] for r in rows.tolist()]
+
+    def descendants_mask(self, rows: numpy.ndarray) -> numpy.ndarray:
+        """boolean array of `rows` and every node downstream of them."""
+        return any_in_intervals(self.entry, self.exit, self.entry[rows])
+
+    def subset_mask(self, nodes: Hashable | Iterable[Hashable]) -> numpy.ndarray:
+        """boolean array of `get_subset`, the nodes that must be re-solved if `nodes`
+        are dirty and the immediate parents that they read from.
+        """
+        solve = self.descendants_mask(self.rows(nodes))
+        has_parent = self.parent >= 0
+        reads = numpy.zeros_like(solve)
+        reads[has_parent] = solve[self.parent[has_parent]]
+        return solve | reads
+
+    def subset(self, nodes: Hashable | Iterable[Hashable]) -> set:
+        """see `get_subset`"""
+        return {self.nodes[i] for i in numpy.flatnonzero(self.subset_mask(nodes))}
+
+    def subset_components(
+        self, nodes: Hashable | Iterable[Hashable]
+    ) -> list[list[Hashable]]:
+        """the nodes of `subset` split by the root that they drain to, which are the
+        weakly connected components of the subset. Nodes are in pre-order.
+        """
+        # each tree is contiguous in pre-order.
+        rows = self.order[self.subset_mask(nodes)[self.order]]
+        if not len(rows):
+            return []
+        splits = numpy.flatnonzero(numpy.diff(self.root[rows])) + 1
+        bounds = [0, *splits.tolist(), len(rows)]
+        return [
+            [self.nodes[i] for i in rows[a:b].tolist()]
+            for a, b in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
 
 
 def find_leafy_branch_larger_than_size(g: nx.DiGraph, size: int = 1) -> nx.DiGraph:
@@ -73,8 +284,11 @@ def find_leafy_branch_larger_than_size(g: nx.DiGraph, size: int = 1) -> nx.DiGra
 
     # Start at the leaves and work through branches.
     # Return first subgraph larger than or equal to `size`.
+    # The nodes are sorted, so the ancestors of each node are built from the ones
+    # of the nodes before it.
+    index = AncestorIndex(g)
     for node in nx.topological_sort(g):  # pragma: no branch
-        us = get_all_predecessors(g, node)
+        us = set(index.ancestors(node))
         us.add(node)
         if len(us) >= size:
             return g.subgraph(us)
@@ -82,6 +296,18 @@ def find_leafy_branch_larger_than_size(g: nx.DiGraph, size: int = 1) -> nx.DiGra
 
 
 def sequential_subgraph_nodes(g: nx.DiGraph, size: int) -> list[list[Hashable]]:
+    """Split a connected graph into a sequence of branches of at least `size` nodes
+    that can be solved one after the other.
+
+    The root of each branch is also the first node of a later branch, where it is
+    a leaf that passes the results of its branch downstream. The last branch holds
+    the root of the graph, and may have fewer than `size` nodes.
+
+    Networks where each node has at most one out edge are split in a single
+    post-order traversal, see `_sequential_tree_nodes`. Other directed acyclic
+    graphs fall back to repeatedly trimming the first branch in topological order
+    that is large enough, which is quadratic in the size of the graph.
+    """
     if not nx.is_weakly_connected(g):
         raise nx.NetworkXUnfeasible(
             "sequential solutions are not possible for disconnected graphs."
@@ -90,6 +316,9 @@ def sequential_subgraph_nodes(g: nx.DiGraph, size: int) -> list[list[Hashable]]:
     if size < 2:
         raise nx.NetworkXUnfeasible("the minimum directed subgraph length is 2 nodes.")
 
+    if all(deg <= 1 for _, deg in g.out_degree):
+        return _sequential_tree_nodes(g, size)
+
     g = nx.DiGraph(g.edges())  # make a copy because we'll modify the structure
 
     graphs = []
@@ -108,9 +337,61 @@ def sequential_subgraph_nodes(g: nx.DiGraph, size: int) -> list[list[Hashable]]:
     return graphs
 
 
+def _sequential_tree_nodes(
+    g: nx.DiGraph | CompactGraph, size: int, root: Hashable | None = None
+) -> list[list[Hashable]]:
+    """`sequential_subgraph_nodes` of a connected graph where each node has at most
+    one out edge, in linear time. If the `root` of a tree is given, `g` may hold
+    other trees, which are left out.
+
+    The nodes are visited in post-order from the root, and the nodes of the branch
+    being built are kept on a stack. When a node is reached, the stack above the
+    position it had when the node was entered holds the unassigned nodes of its
+    subtree. If these and the node itself make at least `size` nodes, they are cut
+    off as a branch and the node stays on the stack as a leaf of the next branch.
+    The nodes of each branch are in post-order, so its root is last.
+    """
+    if root is None:
+        roots = [n for n, deg in g.out_degree if deg == 0]
+        if len(roots) != 1:
+            raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+        (root,) = roots
+
+    graphs: list[list[Hashable]] = []
+    branch: list[Hashable] = []
+    entered: dict[Hashable, int] = {}
+
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not expanded:
+            entered[node] = len(branch)
+            stack.append((node, True))
+            stack.extend((p, False) for p in reversed(list(g.predecessors(node))))
+            continue
+
+        start = entered.pop(node)
+        if len(branch) - start + 1 >= size or node == root:
+            nodes = branch[start:]
+            nodes.append(node)
+            del branch[start:]
+            if len(nodes) > 1:
+                graphs.append(nodes)
+
+        branch.append(node)
+
+    return graphs
+
+
 def parallel_sequential_subgraph_nodes(
-    g: nx.DiGraph, size: int
+    g: nx.DiGraph | CompactGraph, size: int
 ) -> list[list[list[Hashable]]]:
+    if isinstance(g, CompactGraph):
+        try:
+            return _parallel_tree_nodes(g, size)
+        except nx.NetworkXUnfeasible:  # only networks with one out edge per node
+            g = g.to_networkx()
+
     # strip the input graph to just the edge info
     g = nx.DiGraph(g.edges())
 
@@ -128,3 +409,25 @@ def parallel_sequential_subgraph_nodes(
         parallel_graphs.append(sequential_subgraphs)
 
     return parallel_graphs
+
+
+def _parallel_tree_nodes(cg: CompactGraph, size: int) -> list[list[list[Hashable]]]:
+    """`parallel_sequential_subgraph_nodes` of a network where each node has at most
+    one out edge, which splits each tree from its root without building a networkx
+    graph. Trees are in the same order, and nodes without edges are left out too.
+    """
+    index = EulerTourIndex(cg)
+
+    # the networkx graph of the edges adds the source of each edge in node order,
+    # so its components are ordered by their first node that is not a root.
+    rows = numpy.flatnonzero(index.parent >= 0)
+    _, first = numpy.unique(index.root[rows], return_index=True)
+    roots = index.root[rows[numpy.sort(first)]].tolist()
+
+    if roots and size < 2:
+        raise nx.NetworkXUnfeasible("the minimum directed subgraph length is 2 nodes.")
+
+    return [
+        [cg.labels(nodes) for nodes in _sequential_tree_nodes(cg, size, root)]
+        for root in roots
+    ]
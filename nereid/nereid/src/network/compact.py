@@ -0,0 +1,234 @@
+from functools import cached_property
+from typing import Any, Hashable, Iterable, Iterator
+
+import networkx as nx
+import numpy
+
+from nereid.src.network.utils import GraphType
+
+
+class CompactGraph:
+    """A directed network with integer node indices, for the network tasks.
+
+    Node ids are interned once, in the order that `graph_factory` adds them to a
+    graph: the source and target of each edge, then the ids of the `nodes` list.
+    Everything else is in int32 arrays of node indices: the source and target of
+    each edge, and the predecessors and successors of each node in compressed
+    sparse row (CSR) form. This takes a few bytes per edge instead of the nested
+    dicts of a networkx graph, so node ids are only looked up again for output.
+
+    The read methods `predecessors`, `successors`, `out_degree`, iteration and
+    `len` work like the ones of a `nx.DiGraph` over the node indices, so the
+    algorithms of `nereid.src.network` that only read a graph accept either.
+
+    Parameters
+    ----------
+    ids : list
+        the node ids, by node index.
+    src, dst : numpy.ndarray
+        the source and target node index of each edge.
+    keys : list, optional
+        the key of each edge of a multigraph, or None to number the edges between
+        each pair of nodes like networkx does.
+    multigraph : bool, optional (default=True)
+        whether the network came from a multigraph, see `to_networkx`.
+
+    Attributes
+    ----------
+    index : dict
+        the integer index of each node id.
+    pred_ptr, pred_idx : numpy.ndarray
+        the predecessors of node `i` are `pred_idx[pred_ptr[i]:pred_ptr[i + 1]]`,
+        sorted by node index.
+    succ_ptr, succ_idx : numpy.ndarray
+        the successors of each node in the same form, in the order of the edges.
+    """
+
+    def __init__(
+        self,
+        ids: list[Hashable],
+        src: numpy.ndarray,
+        dst: numpy.ndarray,
+        keys: list[Any] | None = None,
+        multigraph: bool = True,
+    ) -> None:
+        self.ids = ids
+        self.index = {n: i for i, n in enumerate(ids)}
+        self.src = numpy.asarray(src, dtype=numpy.int32)
+        self.dst = numpy.asarray(dst, dtype=numpy.int32)
+        self.keys = keys
+        self.multigraph = multigraph
+
+        n_nodes = len(ids)
+        by_dst = numpy.lexsort((self.src, self.dst))
+        self.pred_ptr = _pointers(self.dst, n_nodes)
+        self.pred_idx = self.src[by_dst]
+
+        by_src = numpy.argsort(self.src, kind="stable")
+        self.succ_ptr = _pointers(self.src, n_nodes)
+        self.succ_idx = self.dst[by_src]
+
+    @classmethod
+    def from_graph_dict(cls, graph: dict[str, Any]) -> "CompactGraph":
+        """Build the network of a graph request, like `graph_factory` without the
+        metadata. Edges are read directly from the request, which is not copied.
+        """
+        if not graph.get("directed", False):
+            raise nx.NetworkXNotImplemented("not implemented for undirected type")
+
+        multigraph = graph.get("multigraph", True)
+        index: dict[Hashable, int] = {}
+        src, dst, keys = [], [], []
+        seen = set()
+        for d in graph.get("edges") or []:
+            u = index.setdefault(d.get("source"), len(index))
+            v = index.setdefault(d.get("target"), len(index))
+            key = d.get("key", None)
+
+            # networkx keeps one edge per pair of nodes, or per key if it is given.
+            if not multigraph or key is not None:
+                edge = (u, v) if not multigraph else (u, v, key)
+                if edge in seen:
+                    continue
+                seen.add(edge)
+
+            src.append(u)
+            dst.append(v)
+            keys.append(key)
+
+        for n in graph.get("nodes") or []:
+            index.setdefault(n.get("id"), len(index))
+
+        return cls(
+            list(index),
+            numpy.array(src, dtype=numpy.int32),
+            numpy.array(dst, dtype=numpy.int32),
+            keys if any(k is not None for k in keys) else None,
+            multigraph=multigraph,
+        )
+
+    @classmethod
+    def from_networkx(cls, g: GraphType) -> "CompactGraph":
+        """Build the network of a directed networkx graph."""
+        if not g.is_directed():
+            raise nx.NetworkXNotImplemented("not implemented for undirected type")
+
+        index = {n: i for i, n in enumerate(g.nodes)}
+        if g.is_multigraph():
+            edges = list(g.edges(keys=True))
+        else:
+            edges = [(u, v, None) for u, v in g.edges]
+
+        src = numpy.array([index[u] for u, _, _ in edges], dtype=numpy.int32)
+        dst = numpy.array([index[v] for _, v, _ in edges], dtype=numpy.int32)
+        keys = [k for _, _, k in edges] if g.is_multigraph() else None
+        return cls(list(index), src, dst, keys, multigraph=g.is_multigraph())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.ids)))
+
+    def is_directed(self) -> bool:
+        return True
+
+    def number_of_edges(self) -> int:
+        return len(self.src)
+
+    @cached_property
+    def in_degrees(self) -> numpy.ndarray:
+        """the number of in edges of each node."""
+        return numpy.diff(self.pred_ptr)
+
+    @cached_property
+    def out_degrees(self) -> numpy.ndarray:
+        """the number of out edges of each node."""
+        return numpy.diff(self.succ_ptr)
+
+    @property
+    def out_degree(self) -> list[tuple[int, int]]:
+        """(node, out degree) pairs, like `nx.DiGraph.out_degree`."""
+        return list(enumerate(self.out_degrees.tolist()))
+
+    def predecessors(self, i: Any) -> list[int]:
+        return self.pred_idx[self.pred_ptr[i] : self.pred_ptr[i + 1]].tolist()
+
+    def successors(self, i: Any) -> list[int]:
+        return self.succ_idx[self.succ_ptr[i] : self.succ_ptr[i + 1]].tolist()
+
+    def labels(self, rows: Iterable[Any]) -> list[Any]:
+        """the node ids of the node indices `rows`."""
+        return [self.ids[i] for i in rows]
+
+    def duplicate_edges(self) -> numpy.ndarray:
+        """indices of the edges that repeat the source and target of an earlier
+        edge."""
+        codes = self.src.astype(numpy.int64) * len(self.ids) + self.dst
+        _, first = numpy.unique(codes, return_index=True)
+        repeat = numpy.ones(len(codes), dtype=bool)
+        repeat[first] = False
+        return numpy.flatnonzero(repeat)
+
+    def topological_generations(self) -> list[list[int]]:
+        """The node indices by topological generation, in the same order as
+        `nx.topological_generations` of the `nx.DiGraph` of the network.
+        """
+        # a DiGraph has one edge per pair of nodes.
+        keep = numpy.ones(len(self.src), dtype=bool)
+        keep[self.duplicate_edges()] = False
+        in_degree = numpy.bincount(self.dst[keep], minlength=len(self.ids)).tolist()
+        ptr, successors = self.succ_ptr.tolist(), self.succ_idx.tolist()
+
+        generations = []
+        generation = [i for i, deg in enumerate(in_degree) if deg == 0]
+        while generation:
+            generations.append(generation)
+            generation = []
+            for i in generations[-1]:
+                for v in dict.fromkeys(successors[ptr[i] : ptr[i + 1]]):
+                    in_degree[v] -= 1
+                    if in_degree[v] == 0:
+                        generation.append(v)
+
+        if sum(map(len, generations)) != len(self.ids):
+            raise nx.NetworkXUnfeasible(
+                "Graph contains a cycle or graph changed during iteration"
+            )
+        return generations
+
+    def to_networkx(
+        self, nodes: Iterable[int] | None = None
+    ) -> nx.MultiDiGraph | nx.DiGraph:
+        """A networkx graph of the node ids, like the one of `graph_factory`, but
+        without metadata. If `nodes` is given, only the graph induced by those
+        node indices is built.
+        """
+        g = nx.MultiDiGraph() if self.multigraph else nx.DiGraph()
+        if nodes is None:
+            rows = numpy.arange(len(self.ids))
+            edges = numpy.arange(len(self.src))
+        else:
+            rows = numpy.sort(numpy.fromiter(nodes, dtype=int))
+            mask = numpy.zeros(len(self.ids), dtype=bool)
+            mask[rows] = True
+            edges = numpy.flatnonzero(mask[self.src] & mask[self.dst])
+
+        # nodes are already in the order of `graph_factory`.
+        g.add_nodes_from(self.labels(rows))
+        src, dst = self.labels(self.src[edges]), self.labels(self.dst[edges])
+        if self.multigraph:
+            if self.keys is None:
+                keys = [None] * len(edges)
+            else:
+                keys = [self.keys[e] for e in edges.tolist()]
+            g.add_edges_from(zip(src, dst, keys, strict=True))
+        else:
+            g.add_edges_from(zip(src, dst, strict=True))
+        return g
+
+
+def _pointers(rows: numpy.ndarray, n_nodes: int) -> numpy.ndarray:
+    ptr = numpy.zeros(n_nodes + 1, dtype=numpy.int32)
+    numpy.cumsum(numpy.bincount(rows, minlength=n_nodes), out=ptr[1:])
+    return ptr
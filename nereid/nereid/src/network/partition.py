@@ -0,0 +1,246 @@
+from itertools import pairwise
+from typing import Any, Hashable, Mapping
+
+import networkx as nx
+
+from nereid.src.network.compact import CompactGraph
+
+# the node that all networks drain to while they are partitioned.
+_SINK = object()
+
+# relative solve time of each node type, from `nereid.src.watershed.profiling` of
+# random watersheds. Node types that are not listed cost as much as a land surface.
+DEFAULT_NODE_COSTS: dict[str, float] = {
+    "land_surface": 1.0,
+    "virtual": 1.0,
+    "site_based": 16.0,
+    "volume_based_facility": 6.0,
+    "volume_based_cistern_facility": 5.0,
+    "flow_based_facility": 5.0,
+    "dry_well_facility": 5.0,
+    "simple_facility": 3.0,
+    "diversion_facility": 2.5,
+    "dry_weather_only_facility": 2.0,
+}
+
+
+def node_cost(
+    data: Mapping[str, Any], node_costs: Mapping[str, float] | None = None
+) -> float:
+    """The estimated solve cost of a node from its data or metadata. An explicit
+    numeric `cost` is used as is, otherwise the cost of its `node_type` in
+    `node_costs`, which defaults to `DEFAULT_NODE_COSTS`.
+    """
+    cost = data.get("cost")
+    if isinstance(cost, (int, float)) and not isinstance(cost, bool) and cost >= 0:
+        return float(cost)
+
+    if node_costs is None:
+        node_costs = DEFAULT_NODE_COSTS
+    return float(node_costs.get(str(data.get("node_type") or "virtual"), 1.0))
+
+
+def partition_schedule(
+    g: nx.DiGraph | CompactGraph,
+    n_partitions: int,
+    costs: Mapping[Hashable, float] | None = None,
+) -> dict[str, Any]:
+    """Split a network into partitions of about equal solve cost that can be solved
+    by parallel workers, and schedule them by their dependencies.
+
+    Partitions are cut bottom-up in one post-order traversal. Once the unassigned
+    nodes upstream of a node cost at least `total cost / n_partitions`, its
+    upstream branches are packed into partitions of about that cost, which are
+    independent of each other and can be solved in parallel. A branch that is too
+    costly to pack with its siblings, like a long chain, is a partition of its own.
+    Separate networks are packed the same way, as if they drained to one node.
+
+    Like the branches of `nereid.src.network.algorithms.sequential_subgraph_nodes`,
+    the roots of a partition are also leaves of the partition downstream of them,
+    which depends on it.
+
+    Parameters
+    ----------
+    g : nx.DiGraph or CompactGraph
+        a network where each node has at most one out edge.
+    n_partitions : int
+        the target number of partitions, e.g., the number of workers.
+    costs : mapping, optional
+        the estimated solve cost of each node, see `node_cost`. Nodes that are not
+        in the mapping cost 1.
+
+    Returns
+    -------
+    dict
+        the `partitions` in a valid solve order, each with its `id`, `nodes` in
+        post-order with each of its `roots` after its upstream nodes, `cost`, the
+        ids of the partitions that it `depends_on` and its `stage`, which is the
+        number of partitions on its longest chain of dependencies. Also the
+        `total_cost`, the `target_cost` of a partition, and the `critical_path` of
+        partition ids with the highest total cost and that `critical_path_cost`.
+
+    """
+    if n_partitions < 1:
+        raise ValueError("n_partitions must be at least 1.")
+    if any(deg > 1 for _, deg in g.out_degree):
+        raise nx.NetworkXUnfeasible("each node must have at most one out edge.")
+
+    roots = [n for n, deg in g.out_degree if deg == 0]
+
+    costs = costs or {}
+    cost = {n: float(costs.get(n, 1.0)) for n in g}
+    total_cost = sum(cost.values())
+    target = total_cost / n_partitions
+    partitioner = _Partitioner(cost, target)
+
+    n_visited = 0
+    stack = [(_SINK, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            partitioner.finish(node)
+            continue
+
+        if node is _SINK:
+            upstream = roots
+            partitioner.enter(node, None)
+        else:
+            n_visited += 1
+            upstream = list(g.predecessors(node))
+            partitioner.enter(node, next(iter(g.successors(node)), _SINK))
+
+        stack.append((node, True))
+        stack.extend((n, False) for n in reversed(upstream))
+
+    # the nodes of a cycle do not drain to a root.
+    if n_visited != len(g):
+        raise nx.NetworkXUnfeasible("Graph contains a cycle.")
+
+    return _schedule(partitioner.partitions, total_cost, target)
+
+
+class _Partitioner:
+    """The state of the post-order traversal of `partition_schedule`."""
+
+    def __init__(self, cost: dict[Hashable, float], target: float) -> None:
+        self.cost = cost
+        self.target = target
+        self.partitions: list[dict[str, Any]] = []
+        self.owner: dict[Hashable, int] = {}  # the partition that solves each root
+
+        # unassigned nodes and the solved roots of partitions, in post-order, with
+        # the cost of each one that is left to solve, and the running total of it.
+        self.branch: list[Hashable] = []
+        self.pending: list[float] = []
+        self.total = [0.0]
+        self.entered: dict[Hashable, int] = {}
+        self.child_starts: dict[Hashable, list[int]] = {}
+
+    def add(self, nodes: list[Hashable], roots: list[Hashable], cost: float) -> None:
+        depends_on = sorted({self.owner[n] for n in nodes if n in self.owner})
+        self.owner.update({n: len(self.partitions) for n in roots})
+        self.partitions.append(
+            {
+                "id": len(self.partitions),
+                "nodes": nodes,
+                "roots": roots,
+                "cost": cost,
+                "depends_on": depends_on,
+            }
+        )
+
+    def push(self, nodes: list[Hashable], costs: list[float]) -> None:
+        self.branch.extend(nodes)
+        self.pending.extend(costs)
+        for c in costs:
+            self.total.append(self.total[-1] + c)
+
+    def enter(self, node: Hashable, parent: Hashable | None) -> None:
+        self.entered[node] = len(self.branch)
+        if parent is not None:
+            self.child_starts.setdefault(parent, []).append(len(self.branch))
+
+    def finish(self, node: Hashable) -> None:
+        start = self.entered.pop(node)
+        own_cost = self.cost.get(node, 0.0)
+        upstream_cost = self.total[-1] - self.total[start]
+        if node is not _SINK and upstream_cost + own_cost < self.target:
+            self.push([node], [own_cost])
+            return
+
+        starts = self.child_starts.pop(node, [])
+        kept, kept_pending, group, group_roots = self.pack(starts)
+        del self.branch[start:], self.pending[start:], self.total[start + 1 :]
+
+        if node is _SINK:
+            if group:  # all that is left to solve is on these branches.
+                self.add(group, group_roots, sum(kept_pending))
+            return
+
+        remaining = sum(kept_pending) + own_cost
+        if remaining >= self.target:
+            self.add([*kept, node], [node], remaining)
+            kept, kept_pending, own_cost = [], [], 0.0
+        self.push([*kept, node], [*kept_pending, own_cost])
+
+    def pack(
+        self, starts: list[int]
+    ) -> tuple[list[Hashable], list[float], list[Hashable], list[Hashable]]:
+        """Pack the upstream branches that start at `starts` into partitions that
+        cost at least the target. Returns the nodes that stay with the downstream
+        node and their pending costs, and the nodes and roots of the branches that
+        were left over, which are the last of the nodes that stay.
+        """
+        kept: list[Hashable] = []
+        kept_pending: list[float] = []
+        group: list[Hashable] = []
+        group_roots: list[Hashable] = []
+        group_pending: list[float] = []
+        group_cost = 0.0
+        for s, e in pairwise([*starts, len(self.branch)]):
+            branch_cost = self.total[e] - self.total[s]
+            if branch_cost == 0:  # nothing left to solve on this branch
+                kept.extend(self.branch[s:e])
+                kept_pending.extend(self.pending[s:e])
+                continue
+
+            group.extend(self.branch[s:e])
+            group_roots.append(self.branch[e - 1])
+            group_pending.extend(self.pending[s:e])
+            group_cost += branch_cost
+            if group_cost >= self.target:
+                self.add(group, group_roots, group_cost)
+                kept.extend(group_roots)
+                kept_pending.extend(0.0 for _ in group_roots)
+                group, group_roots, group_pending, group_cost = [], [], [], 0.0
+
+        return kept + group, kept_pending + group_pending, group, group_roots
+
+
+def _schedule(
+    partitions: list[dict[str, Any]], total_cost: float, target: float
+) -> dict[str, Any]:
+    # partitions always come after the ones they depend on.
+    finish: list[float] = []
+    previous: list[int | None] = []
+    for p in partitions:
+        deps = p["depends_on"]
+        p["stage"] = 1 + max((partitions[d]["stage"] for d in deps), default=0)
+
+        slowest = max(deps, key=lambda d: finish[d], default=None)
+        previous.append(slowest)
+        finish.append(p["cost"] + (finish[slowest] if slowest is not None else 0.0))
+
+    critical_path: list[int] = []
+    last = max(range(len(partitions)), key=lambda i: finish[i], default=None)
+    while last is not None:
+        critical_path.append(last)
+        last = previous[last]
+
+    return {
+        "partitions": partitions,
+        "total_cost": total_cost,
+        "target_cost": target,
+        "critical_path": critical_path[::-1],
+        "critical_path_cost": finish[critical_path[0]] if critical_path else 0.0,
+    }
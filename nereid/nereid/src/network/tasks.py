@@ -1,9 +1,16 @@
-from typing import Any
+from typing import Any, Hashable
 
 import networkx as nx
 
+from nereid.core.timings import timed_task
 from nereid.src.network import validate
-from nereid.src.network.algorithms import get_subset, parallel_sequential_subgraph_nodes
+from nereid.src.network.algorithms import (
+    EulerTourIndex,
+    get_subset,
+    parallel_sequential_subgraph_nodes,
+)
+from nereid.src.network.compact import CompactGraph
+from nereid.src.network.partition import node_cost, partition_schedule
 from nereid.src.network.render import (
     fig_to_image,
     render_solution_sequence,
@@ -12,6 +19,7 @@ from nereid.src.network.render import (
 from nereid.src.network.utils import graph_factory, thin_graph_dict
 
 
+@timed_task
 def validate_network(graph: dict) -> dict[str, bool | list]:
     """
 
@@ -28,10 +36,10 @@ def validate_network(graph: dict) -> dict[str, bool | list]:
 
     """
 
-    _graph = thin_graph_dict(graph)
-    g = graph_factory(_graph)
+    g = CompactGraph.from_graph_dict(graph)
 
-    isvalid = validate.is_valid(g)
+    errors = validate.validate_network(g)
+    isvalid = not any(errors)
 
     result: dict[str, bool | list] = {"isvalid": isvalid}
 
@@ -40,12 +48,13 @@ def validate_network(graph: dict) -> dict[str, bool | list]:
 
     else:
         _keys = ["node_cycles", "edge_cycles", "multiple_out_edges", "duplicate_edges"]
-        for key, value in zip(_keys, validate.validate_network(g), strict=True):
+        for key, value in zip(_keys, errors, strict=True):
             result[key] = value  # noqa [PERF403]
 
         return result
 
 
+@timed_task
 def network_subgraphs(
     graph: dict[str, Any], nodes: list[dict[str, Any]]
 ) -> dict[str, Any]:
@@ -53,14 +62,16 @@ def network_subgraphs(
 
     node_ids = [node["id"] for node in nodes]
 
-    g = nx.DiGraph(graph_factory(_graph))
-    subset = get_subset(g, node_ids)
-    sub_g = g.subgraph(subset)
+    g = CompactGraph.from_graph_dict(graph)
+    try:
+        components = EulerTourIndex(g).subset_components(node_ids)
+    except nx.NetworkXUnfeasible:  # only networks with one out edge per node
+        dg = nx.DiGraph(g.to_networkx())
+        components = nx.weakly_connected_components(
+            dg.subgraph(get_subset(dg, node_ids))
+        )
 
-    subgraph_nodes = [
-        {"nodes": [{"id": n} for n in nodes]}
-        for nodes in nx.weakly_connected_components(sub_g)
-    ]
+    subgraph_nodes = [{"nodes": [{"id": n} for n in nodes]} for nodes in components]
 
     result: dict[str, Any] = {"graph": _graph}
     result.update({"requested_nodes": nodes})
@@ -85,12 +96,13 @@ def render_subgraph_svg(task_result: dict, npi: float | None = None) -> bytes:
     return svg
 
 
+@timed_task
 def solution_sequence(
-    graph: dict[str, Any], min_branch_size: int
+    graph: dict[str, Any], min_branch_size: int, n_partitions: int | None = None
 ) -> dict[str, dict[str, list[dict[str, list[dict[str, str | dict]]]]]]:
     _graph = thin_graph_dict(graph)  # strip unneeded metadata
 
-    g = nx.DiGraph(graph_factory(_graph))
+    g = CompactGraph.from_graph_dict(graph)
 
     _sequence = parallel_sequential_subgraph_nodes(g, min_branch_size)
 
@@ -105,6 +117,19 @@ def solution_sequence(
     result["min_branch_size"] = min_branch_size
     result["solution_sequence"] = sequence
 
+    if n_partitions is not None:
+        # node costs may be given in the node metadata of the request.
+        costs: dict[Hashable, float] = {
+            g.index[n["id"]]: node_cost({**(n.get("metadata") or {}), **n})
+            for n in graph.get("nodes", [])
+        }
+        schedule = partition_schedule(g, n_partitions, costs)
+        for partition in schedule["partitions"]:
+            partition["nodes"] = [{"id": n} for n in g.labels(partition["nodes"])]
+            partition["roots"] = g.labels(partition["roots"])
+        result["n_partitions"] = n_partitions
+        result["schedule"] = schedule
+
     return result
 
 
@@ -78,26 +78,47 @@ def graph_factory(graph: dict[str, Any]) -> GraphType:
 
 
 def thin_graph_dict(graph_dict: dict[str, Any]) -> dict[str, Any]:
-    result = copy.deepcopy(graph_dict)
-
-    nodes = result.get("nodes", None)
-    if nodes is not None:
-        for dct in nodes:
-            dct["metadata"] = {}
+    """Copy a graph dict without the metadata of its nodes and edges, except the
+    edge keys. Only the nodes and edges are rebuilt, so the metadata is never
+    copied.
+    """
+    result = {
+        k: copy.deepcopy(v)
+        for k, v in graph_dict.items()
+        if k not in ("nodes", "edges")
+    }
 
-    edges = result.get("edges", [{}])
-    for dct in edges:
-        meta = dct.get("metadata", {})
+    nodes = graph_dict.get("nodes", None)
+    if "nodes" in graph_dict:
+        result["nodes"] = (
+            None if nodes is None else [_thin_item(dct, {}) for dct in nodes]
+        )
 
-        if "key" in meta and meta.get("key", None) is not None:
-            key = meta["key"]
-            dct["metadata"] = {"key": key}
-        else:
-            dct["metadata"] = {}
+    if "edges" in graph_dict:
+        result["edges"] = [
+            _thin_item(dct, _thin_edge_metadata(dct.get("metadata") or {}))
+            for dct in graph_dict["edges"]
+        ]
 
     return result
 
 
+def _thin_item(dct: dict[str, Any], metadata: dict[str, Any]) -> dict[str, Any]:
+    # ids are usually strings, which are immutable and need not be copied.
+    item = {
+        k: v if k == "metadata" or isinstance(v, str) else copy.deepcopy(v)
+        for k, v in dct.items()
+    }
+    item["metadata"] = metadata
+    return item
+
+
+def _thin_edge_metadata(meta: dict[str, Any]) -> dict[str, Any]:
+    if meta.get("key", None) is not None:
+        return {"key": copy.deepcopy(meta["key"])}
+    return {}
+
+
 def nxGraph_to_dict(g: GraphType) -> dict[str, Any]:
     """Convert a networkx graph object into a dictionary
     suitable for serialization.
@@ -1,55 +1,128 @@
-from collections import deque
 from functools import partial
-from typing import Callable
+from itertools import islice
+from typing import Any, Callable, Hashable, Iterator
 
 import networkx as nx
+import numpy
 
+from nereid.core.config import settings
 from nereid.src.network.algorithms import find_cycle
+from nereid.src.network.compact import CompactGraph
 from nereid.src.network.utils import GraphType
 
 
+@nx.utils.not_implemented_for("undirected")
 def validate_network(
-    G: GraphType, **kwargs: dict
-) -> tuple[list[list], list[list[str]], list[list[str]], list[list[str]]]:
-    """Checks if there is a cycle, and prints a helpful
-    message if there is.
+    G: GraphType | CompactGraph, max_cycles: int | None = None, **kwargs: Any
+) -> tuple[list[list], list[list[str]], list[list[str]], list[list]]:
+    """Find the cycles, the nodes with more than one out edge, and the duplicate
+    edges that make a network invalid.
+
+    The checks run on the integer arrays of a `CompactGraph`, which networkx graphs
+    are converted to, and node ids are only looked up for the errors. Cycles are
+    only searched for among the nodes that are left after repeatedly removing the
+    nodes without in edges, which are none in a valid network, so this is linear in
+    the size of the graph. Strongly connected
+    components that are a single ring are one cycle each; only more tangled
+    components are searched for their simple cycles, and at most `max_cycles` are
+    reported in all.
+
+    Parameters
+    ----------
+    G : nx.MultiDiGraph, nx.DiGraph or CompactGraph
+    max_cycles : int, optional
+        the most node cycles to report, which defaults to
+        `settings.NETWORK_VALIDATION_MAX_CYCLES`.
+    **kwargs
+        passed to `nereid.src.network.algorithms.find_cycle`.
+
+    Returns
+    -------
+    node_cycles : list
+        the nodes of each cycle, sorted by their string.
+    edge_cycles : list
+        the edges of one cycle, as strings.
+    multiple_outs : list
+        each node with more than one out edge and its out degree, as strings.
+    duplicate_edges : list
+        the source and target of each repeat of an edge.
+
     """
-    _partial_sort: Callable = partial(sorted, key=lambda x: str(x))
+    if max_cycles is None:
+        max_cycles = settings.NETWORK_VALIDATION_MAX_CYCLES
 
-    # force cycles to be ordered so that we can test against them
-    node_cycles: list[list] = list(map(_partial_sort, nx.simple_cycles(G)))
+    cg = G if isinstance(G, CompactGraph) else CompactGraph.from_networkx(G)
 
-    edge_cycles = [list(map(str, _)) for _ in find_cycle(G, **kwargs)]
+    out_degrees = cg.out_degrees
+    multiple_outs = [
+        [str(cg.ids[i]), str(out_degrees[i])]
+        for i in numpy.flatnonzero(out_degrees > 1).tolist()
+    ]
+    duplicates = cg.duplicate_edges()
+    duplicate_edges = [
+        [u, v]
+        for u, v in zip(
+            cg.labels(cg.src[duplicates]), cg.labels(cg.dst[duplicates]), strict=True
+        )
+    ]
 
-    out_degs = nx.MultiDiGraph(G).out_degree()
-    if isinstance(out_degs, int):  # pragma: no cover
-        out_degs = [("", out_degs)]
-    multiple_outs = [[str(node), str(deg)] for node, deg in out_degs if deg > 1]
+    node_cycles: list[list] = []
+    edge_cycles: list[list[str]] = []
+    cyclic = _cyclic_nodes(cg)
+    if cyclic:
+        # only the cyclic part of the network is built as a networkx graph.
+        sg = cg.to_networkx(cyclic)
 
-    duplicate_edges: list[list] = []
-    if len(G.edges()) != len(set(G.edges())):
-        duplicate_edges = [
-            [s, t] for s, t, *k in nx.MultiGraph(G).edges(keys=True) if k[0]
-        ]
+        # force cycles to be ordered so that we can test against them
+        _partial_sort: Callable = partial(sorted, key=lambda x: str(x))
+        node_cycles = list(map(_partial_sort, islice(_cycles(sg), max_cycles)))
+        edge_cycles = [list(map(str, _)) for _ in find_cycle(sg, **kwargs)]
 
     return node_cycles, edge_cycles, multiple_outs, duplicate_edges
 
 
-def is_valid(G: GraphType) -> bool:
-    try:
-        # catch cycles
-        deque(nx.topological_sort(G), maxlen=0)
-    except nx.exception.NetworkXUnfeasible:
+@nx.utils.not_implemented_for("undirected")
+def is_valid(G: GraphType | CompactGraph) -> bool:
+    """Whether a network has no cycles, and each node has at most one out edge,
+    which also rules out duplicate edges.
+    """
+    cg = G if isinstance(G, CompactGraph) else CompactGraph.from_networkx(G)
+    if numpy.any(cg.out_degrees > 1):
         return False
+    return not _cyclic_nodes(cg)
 
-    try:
-        out_degs = nx.DiGraph(G).out_degree()
-        # catch multiple out connections
-        assert all((v <= 1 for _, v in out_degs))  # type: ignore
 
-        # catch
-        assert len(G.edges()) == len(set(G.edges()))
-    except Exception:
-        return False
+def _cyclic_nodes(cg: CompactGraph) -> list[int]:
+    """The indices of the nodes that are on a cycle or downstream of one. These are
+    the nodes that are left after repeatedly removing the nodes without in edges,
+    like a topological sort.
+    """
+    in_degree = cg.in_degrees.tolist()
+    ptr, successors = cg.succ_ptr.tolist(), cg.succ_idx.tolist()
+
+    stack = [i for i, deg in enumerate(in_degree) if deg == 0]
+    while stack:
+        i = stack.pop()
+        for v in successors[ptr[i] : ptr[i + 1]]:
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                stack.append(v)
+
+    return [i for i, deg in enumerate(in_degree) if deg > 0]
+
+
+def _cycles(G: GraphType) -> Iterator[list[Hashable]]:
+    """The simple cycles of a graph, one strongly connected component at a time."""
+    for component in nx.strongly_connected_components(G):
+        if len(component) == 1:
+            (node,) = component
+            if G.has_edge(node, node):  # self loop
+                yield [node]
+            continue
+
+        # each node of a ring has one successor in it, and it is one cycle.
+        if all(len(set(G.successors(n)) & component) == 1 for n in component):
+            yield list(component)
+            continue
 
-    return True
+        yield from nx.simple_cycles(nx.DiGraph(G.subgraph(component)))
@@ -13,6 +13,8 @@ from numpy.typing import ArrayLike
 from scipy.interpolate import CloughTocher2DInterpolator as CT2DI
 from scipy.interpolate import griddata
 
+from nereid.core.timings import count
+
 try:
     import matplotlib.pyplot as plt
 except ImportError:  # pragma: no cover
@@ -98,6 +100,71 @@ def bisection_search(
     return guess, converged
 
 
+def bisection_search_array(
+    function: Callable[[numpy.ndarray, numpy.ndarray], numpy.ndarray],
+    seek_values: ArrayLike,
+    bounds: tuple[ArrayLike, ArrayLike],
+    args: ArrayLike,
+    atol: float | None = None,
+    max_iters: int | None = None,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Batched version of `bisection_search` that solves `function(x, arg) = seek_value`
+    for each `(seek_value, arg)` pair with a single call to `function` per iteration.
+
+    Each search stops as soon as it converges, so each result is the same as that of
+    `bisection_search` with `lambda x: function(x, arg)`.
+
+    Parameters
+    ----------
+    function : callable
+        vectorized function of the guesses and the matching `args`.
+    seek_values, args : array-like
+        1D arrays of the same length.
+    bounds : 2-tuple of array-like
+        the (lower, upper) bounds of each search. scalars apply to all searches.
+    atol, max_iters : see `bisection_search`
+
+    Returns
+    -------
+    guess, converged : numpy.ndarray, numpy.ndarray
+        the current guess of each search, and whether it converged within `atol`.
+
+    """
+
+    if atol is None:  # pragma: no cover
+        atol = 1e-3
+    if max_iters is None:  # pragma: no cover
+        max_iters = 25
+
+    seek = numpy.asarray(seek_values, dtype=float)
+    args = numpy.asarray(args, dtype=float)
+    lower = numpy.broadcast_to(numpy.asarray(bounds[0], dtype=float), seek.shape).copy()
+    upper = numpy.broadcast_to(numpy.asarray(bounds[1], dtype=float), seek.shape).copy()
+
+    guess = (upper + lower) / 2
+    converged = numpy.zeros(seek.shape, dtype=bool)
+    active = numpy.arange(seek.size)
+
+    for _ in range(max_iters):
+        if not active.size:
+            break
+
+        check = numpy.asarray(function(guess[active], args[active]), dtype=float)
+        check = numpy.where(numpy.isnan(check), 1e6, check)
+
+        diff = check - seek[active]
+        done = numpy.abs(diff) < atol
+        converged[active[done]] = True
+
+        active, diff = active[~done], diff[~done]
+        high = diff > 0
+        upper[active[high]] = guess[active[high]]
+        lower[active[~high]] = guess[active[~high]]
+        guess[active] = (upper[active] + lower[active]) / 2
+
+    return guess, converged
+
+
 class NomographBase:
     def __init__(
         self,
@@ -240,6 +307,42 @@ class NomographBase:
 
         return result, converged
 
+    def get_x_array(
+        self,
+        at_y: ArrayLike,
+        t: ArrayLike,
+        atol: float | None = None,
+        max_iters: int | None = None,
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Batched version of `get_x` that evaluates the nomograph once per
+        bisection step for all of the (`at_y`, `t`) pairs.
+        """
+
+        at_y_arr = numpy.atleast_1d(numpy.asarray(at_y, dtype=float))
+        t_arr = numpy.atleast_1d(numpy.asarray(t, dtype=float))
+        if at_y_arr.shape != t_arr.shape:
+            raise ValueError("y and t must be the same length")
+
+        y = numpy.clip(at_y_arr, numpy.nanmin(self.y_data), numpy.nanmax(self.y_data))
+        t_arr = numpy.clip(t_arr, numpy.nanmin(self.t_data), numpy.nanmax(self.t_data))
+        vmin, vmax = numpy.nanmin(self.x_data), numpy.nanmax(self.x_data)
+
+        result = numpy.zeros(y.shape, dtype=float)
+        converged = numpy.zeros(y.shape, dtype=bool)
+
+        seek = at_y_arr > 1e-3
+        if seek.any():
+            result[seek], converged[seek] = bisection_search_array(
+                function=self.nomo,
+                seek_values=y[seek],
+                bounds=(vmin, vmax),
+                args=t_arr[seek],
+                atol=atol,
+                max_iters=max_iters,
+            )
+
+        return result, converged
+
     def __call__(
         self,
         *,
@@ -261,6 +364,8 @@ class NomographBase:
         these interpolators are tolerantly typed.
         """
 
+        count("nomograph_calls")
+
         if t is None:
             raise ValueError("`t` is required")
 
@@ -280,13 +385,9 @@ class NomographBase:
                 t_iter = numpy.array(t)
                 y_iter = numpy.array(y)
                 if t_iter.size == y_iter.size:
-                    res: list[float] = []
-                    for _y, _t in zip(y_iter, t_iter, strict=True):
-                        guess, _ = self.get_x(
-                            at_y=_y, t=_t, atol=atol, max_iters=max_iters
-                        )
-                        res.append(guess)
-                    arr_result: numpy.ndarray = numpy.array(res)
+                    arr_result, _ = self.get_x_array(
+                        at_y=y_iter, t=t_iter, atol=atol, max_iters=max_iters
+                    )
 
                     return arr_result
                 else:
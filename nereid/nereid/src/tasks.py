@@ -12,4 +12,22 @@ from nereid.src.treatment_facility.tasks import (
 from nereid.src.treatment_site.tasks import (
     initialize_treatment_sites as initialize_treatment_sites,
 )
+from nereid.src.watershed.tasks import (
+    create_watershed_session as create_watershed_session,
+)
+from nereid.src.watershed.tasks import (
+    iter_watershed_response as iter_watershed_response,
+)
+from nereid.src.watershed.tasks import (
+    size_watershed_facilities as size_watershed_facilities,
+)
 from nereid.src.watershed.tasks import solve_watershed as solve_watershed
+from nereid.src.watershed.tasks import (
+    solve_watershed_scenarios as solve_watershed_scenarios,
+)
+from nereid.src.watershed.tasks import (
+    solve_watershed_stream as solve_watershed_stream,
+)
+from nereid.src.watershed.tasks import (
+    update_watershed_session as update_watershed_session,
+)
@@ -1,5 +1,5 @@
 from functools import partial
-from typing import Any, Callable, cast
+from typing import Any, Iterable, cast
 
 import numpy
 import pandas
@@ -69,9 +69,189 @@ def effluent_conc(
     return result
 
 
+COEFFICIENTS = ["A", "B", "C", "D", "E", "e1", "e2", "dl"]
+
+
+class EffluentCoefficients:
+    """Treatment performance table compiled into dense coefficient arrays, so that
+    `effluent_conc` can be evaluated for many influent concentrations, facilities
+    and pollutants at once with `effluent_conc_array`.
+
+    Each coefficient of `effluent_conc` is a 2D array indexed by facility code and
+    pollutant code, see `facility_index` and `pollutant_index`. Missing
+    coefficients are zero, like the defaults of `effluent_conc`.
+
+    Parameters
+    ----------
+    facility_dict : mapping
+        the `effluent_conc` keyword arguments of each (facility, pollutant).
+    pollutant_units : mapping, optional
+        the unit of the influent concentration of each pollutant. The unit
+        conversion factors to and from the unit of each table row are compiled for
+        these units. Pollutants that are not listed are assumed to be given in the
+        unit of their table row.
+
+    Attributes
+    ----------
+    facilities, pollutants : list of str
+    facility_index, pollutant_index : dict
+        the code of each facility type and each pollutant.
+    defined : numpy.ndarray
+        boolean array of the (facility, pollutant) pairs that are in the table.
+    has_curve : numpy.ndarray
+        boolean array of the pairs with any nonzero A, B, C, D or E coefficient.
+        Other pairs only apply the detection limit.
+    to_unit, from_unit : numpy.ndarray
+        the conversion factors from the influent unit to the unit of the table row,
+        and back.
+    """
+
+    def __init__(
+        self,
+        facility_dict: dict[tuple[str, str], dict[str, Any]],
+        pollutant_units: dict[str, str] | None = None,
+    ) -> None:
+        pollutant_units = pollutant_units or {}
+
+        self.facilities = sorted({f for f, _ in facility_dict})
+        self.pollutants = sorted({p for _, p in facility_dict})
+        self.facility_index = {f: i for i, f in enumerate(self.facilities)}
+        self.pollutant_index = {p: i for i, p in enumerate(self.pollutants)}
+
+        shape = len(self.facilities), len(self.pollutants)
+        coefs = {c: numpy.zeros(shape) for c in COEFFICIENTS}
+        self.defined = numpy.zeros(shape, dtype=bool)
+        self.to_unit = numpy.ones(shape)
+        self.from_unit = numpy.ones(shape)
+
+        for (facility, pollutant), kwargs in facility_dict.items():
+            ix = self.facility_index[facility], self.pollutant_index[pollutant]
+            self.defined[ix] = True
+            for c in COEFFICIENTS:
+                coefs[c][ix] = kwargs.get(c, 0)
+
+            inf_unit = pollutant_units.get(pollutant)
+            if inf_unit is not None:
+                unit = kwargs.get("unit") or inf_unit
+                self.to_unit[ix] = conversion_factor_from_to(inf_unit, unit)
+                self.from_unit[ix] = conversion_factor_from_to(unit, inf_unit)
+
+        self.A, self.B, self.C, self.D, self.E = (coefs[c] for c in "ABCDE")
+        self.e1, self.e2, self.dl = coefs["e1"], coefs["e2"], coefs["dl"]
+        self.has_curve = numpy.any([coefs[c] != 0 for c in "ABCDE"], axis=0)
+
+    def facility_codes(self, facilities: Iterable[str]) -> numpy.ndarray:
+        """The code of each facility type, or -1 if it is not in the table."""
+        return numpy.array([self.facility_index.get(f, -1) for f in facilities], int)
+
+    def pollutant_codes(self, pollutants: Iterable[str]) -> numpy.ndarray:
+        """The code of each pollutant, or -1 if it is not in the table."""
+        return numpy.array([self.pollutant_index.get(p, -1) for p in pollutants], int)
+
+    def is_defined(
+        self, facility_idx: numpy.ndarray | int, pollutant_idx: numpy.ndarray | int
+    ) -> numpy.ndarray:
+        """Whether each (facility, pollutant) code pair is in the table."""
+        f, p = numpy.broadcast_arrays(facility_idx, pollutant_idx)
+        valid = (f >= 0) & (p >= 0)
+        defined = numpy.zeros(f.shape, dtype=bool)
+        defined[valid] = self.defined[f[valid], p[valid]]
+        return defined
+
+    def effluent_conc_array(
+        self,
+        inf_conc: numpy.ndarray,
+        facility_idx: numpy.ndarray | int,
+        pollutant_idx: numpy.ndarray | int,
+    ) -> numpy.ndarray:
+        """Vectorized `effluent_conc`, with identical results.
+
+        Parameters
+        ----------
+        inf_conc : array
+            influent concentrations in the unit of their pollutant, see
+            `pollutant_units`.
+        facility_idx, pollutant_idx : int or integer array
+            the codes of the facility type and pollutant of each concentration. All
+            three arrays are broadcast together. Pairs that are not in the table are
+            not treated, so their effluent is their influent.
+
+        """
+        inf_conc, f, p = numpy.broadcast_arrays(
+            numpy.asarray(inf_conc, dtype=float), facility_idx, pollutant_idx
+        )
+        defined = self.is_defined(f, p)
+        f, p = numpy.where(defined, f, 0), numpy.where(defined, p, 0)
+
+        conc = inf_conc * self.to_unit[f, p]
+        D, E, e2 = self.D[f, p], self.E[f, p], self.e2[f, p]
+
+        with numpy.errstate(all="ignore"):
+            # the power term is evaluated with the float `**` of `effluent_conc`
+            # wherever it counts, since vectorized `numpy.power` may differ from it in
+            # the last digit.
+            power = numpy.power(conc, E)
+            exact = (D * e2 != 0) & (conc > 0) & numpy.isfinite(power)
+            power[exact] = [
+                c**e
+                for c, e in zip(conc[exact].tolist(), E[exact].tolist(), strict=True)
+            ]
+
+            # force log(0) to return 0 instead of undefined.
+            _C = numpy.where(
+                conc > 0, self.C[f, p] * numpy.log(numpy.where(conc > 0, conc, 1)), 0
+            )
+
+            # same order of operations as `numpy.nansum`
+            terms = [
+                self.A[f, p],
+                self.B[f, p] * conc,
+                _C,
+                self.e1[f, p],
+                D * power * e2,
+            ]
+            eff = numpy.zeros_like(conc)
+            for term in terms:
+                eff = eff + numpy.where(numpy.isnan(term), 0, term)
+
+        eff = numpy.where(self.has_curve[f, p], eff, conc)
+        result = numpy.fmax(self.dl[f, p], numpy.fmin(eff, conc)) * self.from_unit[f, p]
+
+        return numpy.where(defined, result, inf_conc)
+
+
+class EffluentFunctionMap(dict):
+    """Mapping of (facility, pollutant) to a function that returns the effluent
+    concentration of an influent concentration, i.e., a `partial` of `effluent_conc`.
+
+    The table is also compiled into `EffluentCoefficients` for each set of
+    influent units, see `coefficients`.
+    """
+
+    def __init__(self, facility_dict: dict[tuple[str, str], dict[str, Any]]) -> None:
+        super().__init__(
+            {k: partial(effluent_conc, **v) for k, v in facility_dict.items()}
+        )
+        self.facility_dict = facility_dict
+        self._coefficients: dict[tuple, EffluentCoefficients] = {}
+
+    def coefficients(
+        self, pollutant_units: Iterable[tuple[str, str]] = ()
+    ) -> EffluentCoefficients:
+        """The `EffluentCoefficients` of the table for the (pollutant, unit) pairs of
+        the influent concentrations. These are compiled once per set of units.
+        """
+        key = tuple(sorted(set(pollutant_units)))
+        if key not in self._coefficients:
+            self._coefficients[key] = EffluentCoefficients(
+                self.facility_dict, dict(key)
+            )
+        return self._coefficients[key]
+
+
 def build_effluent_function_map(
     df: pandas.DataFrame, facility_column: str, pollutant_column: str
-) -> dict[tuple[str, str], Callable]:
+) -> EffluentFunctionMap:
     # this is close to what we want, but it has a lot of nans.
     _facility_dict = cast(
         dict[tuple[str, str], dict[str, Any]],
@@ -86,9 +266,4 @@ def build_effluent_function_map(
     }
 
     # this gives a lookup table in the form {(facility, pollutant) : fxn(inf_conc, inf_conc_units)}
-    function_map = cast(
-        dict[tuple[str, str], Callable],
-        {k: partial(effluent_conc, **v) for k, v in facility_dict.items()},
-    )
-
-    return function_map
+    return EffluentFunctionMap(facility_dict)
@@ -3,6 +3,7 @@ from typing import Any
 import pandas
 
 from nereid.core.io import parse_configuration_logic
+from nereid.core.timings import count, timed_task
 from nereid.core.units import update_reg_from_context
 from nereid.models.treatment_facility_models import (
     validate_treatment_facility_models,
@@ -10,6 +11,7 @@ from nereid.models.treatment_facility_models import (
 from nereid.src.treatment_facility.constructors import build_treatment_facility_nodes
 
 
+@timed_task
 def initialize_treatment_facilities(
     treatment_facilities: dict[str, list[dict[str, Any]]],
     pre_validated: bool,
@@ -20,6 +22,7 @@ def initialize_treatment_facilities(
 
     try:
         treatment_facility_list = treatment_facilities.get("treatment_facilities") or []
+        count("treatment_facilities", len(treatment_facility_list))
         if not pre_validated:
             treatment_facility_list = validate_treatment_facility_models(
                 treatment_facility_list, context
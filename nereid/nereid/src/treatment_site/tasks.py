@@ -2,7 +2,10 @@ from typing import Any
 
 import pandas
 
+from nereid.core.timings import count, timed_task
 
+
+@timed_task
 def initialize_treatment_sites(
     treatment_sites: dict[str, list[dict[str, Any]]], context: dict[str, Any]
 ) -> dict[str, Any]:
@@ -10,6 +13,7 @@ def initialize_treatment_sites(
 
     try:
         sites = treatment_sites.get("treatment_sites") or []
+        count("treatment_sites", len(sites))
 
         # tmnt_map is connects the facility name with the treatment
         # key for the influent-> effluent concentration transformation
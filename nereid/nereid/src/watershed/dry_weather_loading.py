@@ -1,10 +1,18 @@
 from typing import Any, Callable
 
 import networkx as nx
+import numpy
 
 from nereid.core.utils import safe_divide
 from nereid.src.network.utils import sum_node_attr
-from nereid.src.watershed.loading import compute_pollutant_load_reduction
+from nereid.src.watershed.loading import (
+    DRY_WEATHER_VOLUMES,
+    LoadReductions,
+    accumulate_pollutant_columns,
+    compute_pollutant_load_reduction,
+    pollutant_keys,
+)
+from nereid.src.watershed.node_state import NodeState, NodeStateFields
 
 
 def accumulate_dry_weather_loading(
@@ -52,6 +60,78 @@ def accumulate_dry_weather_loading(
     return data
 
 
+def accumulate_dry_weather_columns(
+    block: numpy.ndarray,
+    upstream: numpy.ndarray,
+    fields: NodeStateFields,
+) -> numpy.ndarray:
+    """Columnar version of `accumulate_dry_weather_loading`.
+
+    This accumulates the flows and pollutant loads of every season for every node
+    in `block` at once.
+
+    Parameters
+    ----------
+    * : see `nereid.src.watershed.wet_weather_loading.accumulate_wet_weather_columns`
+
+    """
+
+    if not fields.has_dry_weather:
+        return block
+
+    flows = fields.dry_flows
+
+    inflow = upstream[:, flows.flow] + upstream[:, flows.discharged]
+
+    block[:, flows.direct] = upstream[:, flows.flow]
+    block[:, flows.upstream] = upstream[:, flows.discharged]
+    block[:, flows.inflow] = inflow
+    block[:, flows.retained_upstream] = upstream[:, flows.total_retained]
+
+    # initialize with assumption of no volume reduction
+    block[:, flows.bypassed] = inflow
+    block[:, flows.discharged] = inflow
+    block[:, flows.total_discharged] = inflow + block[:, flows.flow]
+    block[:, flows.total_retained] = upstream[:, flows.total_retained]
+
+    accumulate_pollutant_columns(block, upstream, fields.dry_loads)
+
+    return block
+
+
+def accumulate_dry_weather_subtree_columns(
+    state: NodeState,
+    rows: numpy.ndarray,
+    mask: numpy.ndarray,
+) -> NodeState:
+    """Closed-form accumulation of the dry weather values that nodes pass downstream,
+    for nodes that have no treatment upstream.
+
+    Parameters
+    ----------
+    * : see `nereid.src.watershed.wet_weather_loading.accumulate_wet_weather_subtree_columns`
+
+    """
+
+    if not state.fields.has_dry_weather:
+        return state
+
+    flows = state.fields.dry_flows
+    loads = state.fields.dry_loads
+
+    state.accumulate_subtrees(
+        rows,
+        mask,
+        carry=numpy.r_[flows.discharged, loads.discharged],
+        own=numpy.r_[flows.flow, loads.load],
+    )
+    state.accumulate_subtrees(
+        rows, mask, carry=numpy.r_[flows.total_retained, loads.total_removed]
+    )
+
+    return state
+
+
 def accumulate_dry_weather_volume_by_season(
     g: nx.DiGraph,
     data: dict[str, Any],
@@ -314,6 +394,7 @@ def compute_dry_weather_load_reduction(
     data: dict[str, Any],
     dry_weather_parameters: list[dict[str, Any]],
     dry_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
 ) -> dict[str, Any]:
     """This function computes how load reduction is effected by the volume reduced
     and/or treated by the current facility. This function requires that the volume
@@ -340,41 +421,19 @@ def compute_dry_weather_load_reduction(
         that returns effluent concentration as output when given influent concentration as input.
         Reference: `nereid.src.tmnt_performance.tmnt.effluent_conc`
         Reference: `nereid.src.tmnt_performance.tasks.effluent_function_map`
+    load_reductions : LoadReductions, optional
+        Reference: `nereid.src.watershed.loading.compute_pollutant_load_reduction`
 
     """
 
     tmnt_facility_type = data.get("tmnt_performance_facility_type", r"¯\_(ツ)_/¯")
 
-    seasons = ["summer", "winter"]
-    for season in seasons:
-        vol_col = f"{season}_dry_weather_flow_cuft"
-
-        for param in dry_weather_parameters:
-            conc_unit = param["concentration_unit"]
-            poc_long = param["long_name"]
-
-            load_col = season + "_" + param["load_col"]
-            conc_col = season + "_" + param["conc_col"]
-
-            load_to_conc_factor = param["load_to_conc_factor"]
-            conc_to_load_factor = param["conc_to_load_factor"]
-
-            inflow_load = data[f"{load_col}_inflow"]
-            influent_conc = data[f"{conc_col}_influent"]
-
-            compute_pollutant_load_reduction(
-                data,
-                dry_weather_facility_performance_map,
-                tmnt_facility_type,
-                conc_unit,
-                poc_long,
-                load_col,
-                conc_col,
-                vol_col,
-                load_to_conc_factor,
-                conc_to_load_factor,
-                inflow_load,
-                influent_conc,
-            )
+    compute_pollutant_load_reduction(
+        data,
+        pollutant_keys(dry_weather_parameters, DRY_WEATHER_VOLUMES),
+        dry_weather_facility_performance_map,
+        tmnt_facility_type,
+        load_reductions,
+    )
 
     return data
@@ -0,0 +1,158 @@
+import hashlib
+from copy import deepcopy
+from typing import Any, Callable
+
+import orjson
+
+from nereid.core.cache import LRUCache, content_hash
+from nereid.core.config import settings
+from nereid.core.timings import count
+from nereid.core.units import update_reg_from_context
+from nereid.src.nomograph.nomo import load_nomograph_mapping
+from nereid.src.tmnt_performance.tasks import effluent_function_map
+from nereid.src.watershed.node_state import NodeStateFields
+from nereid.src.wq_parameters import init_wq_parameters
+
+
+class WatershedEngine:
+    """Everything the watershed solver needs from a request context.
+
+    Building this requires parsing the parameter and treatment performance tables
+    and building the nomographs, which dominates the cost of solving small graphs.
+    It only depends on the `state/region` configuration, so it is built once and
+    reused; see `get_watershed_engine`.
+
+    Attributes
+    ----------
+    key : str
+        the cache key of the context this engine was built from
+    wet_weather_parameters, dry_weather_parameters : list of dicts
+        Reference: `nereid.src.wq_parameters.init_wq_parameters`
+    wet_weather_facility_performance_map, dry_weather_facility_performance_map : mapping
+        Reference: `nereid.src.tmnt_performance.tasks.effluent_function_map`
+    nomograph_map : mapping
+        Reference: `nereid.src.nomograph.nomo.load_nomograph_mapping`
+    fields : NodeStateFields
+        the column-name table of the solver state
+    version, config_version : str
+        written to each solved node as `_version` and `_config_version`
+    """
+
+    def __init__(self, context: dict[str, Any], key: str | None = None) -> None:
+        # keep the caller's context and the cached engine from sharing any mutable
+        # state.
+        context = deepcopy(context)
+        self.key = key or context_key(context)
+
+        update_reg_from_context(context)
+
+        self.wet_weather_parameters = init_wq_parameters(
+            "land_surface_emc_table", context=context
+        )
+        self.dry_weather_parameters = init_wq_parameters(
+            "dry_weather_land_surface_emc_table", context=context
+        )
+        self.wet_weather_facility_performance_map = effluent_function_map(
+            "tmnt_performance_table", context=context
+        )
+        self.dry_weather_facility_performance_map = effluent_function_map(
+            "dry_weather_tmnt_performance_table", context=context
+        )
+        self.nomograph_map: dict[str, Callable] = load_nomograph_mapping(
+            context=context
+        )
+
+        self.fields = NodeStateFields(
+            self.wet_weather_parameters, self.dry_weather_parameters
+        )
+
+        self.version: str = context.get("version", "error: no version info")
+        self.config_version: str = context.get(
+            "config_date", "error: no config version info"
+        )
+
+    def __repr__(self) -> str:
+        return f"WatershedEngine({self.key!r})"
+
+    @property
+    def solver_kwargs(self) -> dict[str, Any]:
+        """Keyword arguments for `solve_node` and its helpers."""
+        return {
+            "wet_weather_parameters": self.wet_weather_parameters,
+            "wet_weather_facility_performance_map": (
+                self.wet_weather_facility_performance_map
+            ),
+            "nomograph_map": self.nomograph_map,
+            "dry_weather_parameters": self.dry_weather_parameters,
+            "dry_weather_facility_performance_map": (
+                self.dry_weather_facility_performance_map
+            ),
+        }
+
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+)
+
+# the parts of a request context that an engine is built from.
+ENGINE_CONTEXT_KEYS = (
+    "version",
+    "config_date",
+    "data_path",
+    "pint_unit_registry",
+    "project_reference_data",
+)
+
+
+def context_key(context: dict[str, Any]) -> str:
+    """Cache key for a request context.
+
+    The `state/region` prefix keeps the key readable. The digest of the parts of
+    the context in `ENGINE_CONTEXT_KEYS` makes sure that a context which was
+    modified after it was loaded, or one that was reloaded from a changed config
+    file, is not served a stale engine. The rest of the context, e.g., the
+    `api_recognize` section, only concerns request validation.
+
+    The key is computed for each lookup, so the inputs are encoded with orjson,
+    which is several times faster than the `json` of `content_hash`.
+    """
+
+    inputs = {k: context.get(k) for k in ENGINE_CONTEXT_KEYS}
+    try:
+        encoded = orjson.dumps(inputs, option=_ORJSON_OPTIONS, default=str)
+    except orjson.JSONEncodeError:  # pragma: no cover ; e.g., ints over 64 bit.
+        digest = content_hash(inputs)
+    else:
+        digest = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    return f"{context.get('state')}/{context.get('region')}:{digest}"
+
+
+_engine_cache: LRUCache[WatershedEngine] = LRUCache()
+
+
+def get_watershed_engine(
+    context: dict[str, Any], maxsize: int | None = None
+) -> WatershedEngine:
+    """Return the engine for this context, building it only on a cache miss.
+
+    The cache is per-process, so the API process and each celery worker keep their
+    own. The least recently used engine is evicted once the cache holds more than
+    `maxsize` engines, which defaults to `settings.ENGINE_CACHE_SIZE`.
+
+    The key is computed from the context on each call, so a context that was
+    modified in place gets the engine of its new content.
+    """
+
+    if maxsize is None:
+        maxsize = settings.ENGINE_CACHE_SIZE
+
+    key = context_key(context)
+    count("engine_cache_hits" if key in _engine_cache else "engine_cache_misses")
+
+    return _engine_cache.get_or_build(
+        key, lambda: WatershedEngine(context, key=key), maxsize=maxsize
+    )
+
+
+def engine_cache_clear() -> None:
+    _engine_cache.clear()
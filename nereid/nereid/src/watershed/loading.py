@@ -1,118 +1,544 @@
-from typing import Any, Callable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable
 
-from nereid.core.utils import safe_divide
+import numpy
+
+from nereid.core.utils import safe_array_divide
+from nereid.src.tmnt_performance.tmnt import EffluentFunctionMap
+
+if TYPE_CHECKING:  # pragma: no cover
+    from nereid.src.watershed.node_state import PollutantColumns
+
+
+# the (prefix, volume column) of each season of a pollutant group.
+WET_WEATHER_VOLUMES = (("", "runoff_volume_cuft"),)
+DRY_WEATHER_VOLUMES = (
+    ("summer_", "summer_dry_weather_flow_cuft"),
+    ("winter_", "winter_dry_weather_flow_cuft"),
+)
+
+_PARAMETER_KEYS = [
+    "long_name",
+    "concentration_unit",
+    "load_col",
+    "conc_col",
+    "load_to_conc_factor",
+    "conc_to_load_factor",
+]
+
+
+class PollutantKeys:
+    """Result keys of a group of pollutant load reductions that are computed together.
+
+    Each attribute is a list with one entry per pollutant and per season, so that
+    the keys of every pollutant of a node are only formatted once, see
+    `pollutant_keys`.
+    """
+
+    def __init__(
+        self,
+        parameters: tuple[tuple[Any, ...], ...],
+        volumes: tuple[tuple[str, str], ...],
+    ) -> None:
+        entries = [
+            (prefix, vol_col, dict(zip(_PARAMETER_KEYS, param, strict=True)))
+            for prefix, vol_col in volumes
+            for param in parameters
+        ]
+        load_cols = [prefix + p["load_col"] for prefix, _, p in entries]
+        conc_cols = [prefix + p["conc_col"] for prefix, _, p in entries]
+        vol_cols = [vol_col for _, vol_col, _ in entries]
+
+        def keys(cols: list[str], suffix: str) -> list[str]:
+            return [c + suffix for c in cols]
+
+        self.long_names = [p["long_name"] for _, _, p in entries]
+        self.conc_units = [p["concentration_unit"] for _, _, p in entries]
+        self.pollutant_units = tuple(zip(self.long_names, self.conc_units, strict=True))
+        self.load_to_conc_factor = numpy.array(
+            [p["load_to_conc_factor"] for _, _, p in entries], dtype=float
+        )
+        self.conc_to_load_factor = numpy.array(
+            [p["conc_to_load_factor"] for _, _, p in entries], dtype=float
+        )
+
+        self.load = load_cols
+        self.inflow = keys(load_cols, "_inflow")
+        self.removed_upstream = keys(load_cols, "_removed_upstream")
+        self.influent_conc = keys(conc_cols, "_influent")
+        self.vol_inflow = keys(vol_cols, "_inflow")
+        self.vol_bypassed = keys(vol_cols, "_bypassed")
+        self.vol_treated = keys(vol_cols, "_treated")
+        self.vol_retained = keys(vol_cols, "_retained")
+        self.vol_discharged = keys(vol_cols, "_discharged")
+
+        # outputs of `compute_pollutant_load_reduction_array`
+        self.outputs = {
+            "treated_effluent_conc": keys(conc_cols, "_treated_effluent"),
+            "released_from_bypassed": keys(load_cols, "_released_from_bypassed"),
+            "released_from_treated": keys(load_cols, "_released_from_treated"),
+            "discharged": keys(load_cols, "_discharged"),
+            "removed": keys(load_cols, "_removed"),
+            "total_removed": keys(load_cols, "_total_removed"),
+            "effluent_conc": keys(conc_cols, "_effluent"),
+            "total_discharged": keys(load_cols, "_total_discharged"),
+        }
+        self.output_keys = [k for cols in self.outputs.values() for k in cols]
+
+    def __len__(self) -> int:
+        return len(self.load)
+
+
+@lru_cache(maxsize=32)
+def _pollutant_keys(
+    parameters: tuple[tuple[Any, ...], ...],
+    volumes: tuple[tuple[str, str], ...],
+) -> PollutantKeys:
+    return PollutantKeys(parameters, volumes)
+
+
+def pollutant_keys(
+    parameters: list[dict[str, Any]],
+    volumes: tuple[tuple[str, str], ...] = WET_WEATHER_VOLUMES,
+) -> PollutantKeys:
+    """The `PollutantKeys` of a list of pollutant parameters, for each of the
+    `volumes`, e.g., `DRY_WEATHER_VOLUMES` for both dry weather seasons. The keys are
+    cached, since every treatment node of a solve uses the same parameters.
+
+    Reference: `nereid.src.wq_parameters.init_wq_parameters`
+    """
+    signature = tuple(tuple(p[k] for k in _PARAMETER_KEYS) for p in parameters)
+    return _pollutant_keys(signature, volumes)
+
+
+def compute_pollutant_load_reduction_array(
+    inflow_load: numpy.ndarray,
+    influent_conc: numpy.ndarray,
+    effluent_conc: numpy.ndarray,
+    vol_bypassed: numpy.ndarray,
+    vol_treated: numpy.ndarray,
+    vol_retained: numpy.ndarray,
+    vol_discharged: numpy.ndarray,
+    load: numpy.ndarray,
+    removed_upstream: numpy.ndarray,
+    load_to_conc_factor: numpy.ndarray,
+    conc_to_load_factor: numpy.ndarray,
+) -> dict[str, numpy.ndarray]:
+    """Compute the load reduction of many pollutants, and of many nodes, at once.
+
+    Every argument is an array of the same shape, e.g., one entry per pollutant of a
+    node, or a 2D array with one row per node and one column per pollutant. The
+    volumes are the volume balance of the node for the season of each pollutant.
+
+    Returns
+    -------
+    dict of arrays
+        the concentrations and loads computed for each pollutant, keyed like
+        `PollutantKeys.outputs`. See `pollutant_mass_balance_error` to check them.
+
+    """
+
+    mass_from_bypassed = vol_bypassed * influent_conc * conc_to_load_factor
+    mass_from_treated = vol_treated * effluent_conc * conc_to_load_factor
+
+    # make sure treatment nodes are not 'sources' of load due to floating point precision
+    released = mass_from_bypassed + mass_from_treated
+    load_discharged = numpy.where(released < inflow_load, released, inflow_load)
+    load_removed = inflow_load - load_discharged
+
+    discharge_conc = load_to_conc_factor * safe_array_divide(
+        load_discharged, vol_discharged
+    )
+
+    outputs = {
+        "treated_effluent_conc": effluent_conc,
+        "released_from_bypassed": mass_from_bypassed,
+        "released_from_treated": mass_from_treated,
+        "discharged": load_discharged,
+        "removed": load_removed,
+        # Use this value for reporting cumulative load removal upstream and including
+        # current node.
+        "total_removed": load_removed + removed_upstream,
+        "effluent_conc": discharge_conc,
+        # Use this value for reporting total load discharged from current node,
+        # accounting for all upstream inputs and reductions.
+        "total_discharged": load + load_discharged,
+    }
+
+    return outputs
+
+
+def pollutant_mass_balance_error(
+    inflow_load: numpy.ndarray,
+    influent_conc: numpy.ndarray,
+    vol_bypassed: numpy.ndarray,
+    vol_treated: numpy.ndarray,
+    vol_retained: numpy.ndarray,
+    released_from_bypassed: numpy.ndarray,
+    released_from_treated: numpy.ndarray,
+    conc_to_load_factor: numpy.ndarray,
+) -> numpy.ndarray:
+    """Check the results of `compute_pollutant_load_reduction_array`. Every argument
+    is an array of the same shape, like the arguments of that function.
+
+    Returns
+    -------
+    numpy.ndarray
+        boolean array of the pollutants whose load does not balance within 1%.
+
+    """
+
+    load_reduced_by_retention = vol_retained * influent_conc * conc_to_load_factor
+    load_reduced_by_treatment = (
+        vol_treated * influent_conc * conc_to_load_factor - released_from_treated
+    )
+
+    mass_balance = inflow_load - (
+        load_reduced_by_retention
+        + load_reduced_by_treatment
+        + released_from_treated
+        + released_from_bypassed
+    )
+    error: numpy.ndarray = (
+        safe_array_divide(numpy.abs(mass_balance), inflow_load) > 0.01
+    )
+    return error
+
+
+def check_pollutant_mass_balance(
+    dictlist: list[dict[str, Any]],
+    keys: PollutantKeys,
+) -> list[tuple[int, str]]:
+    """Check the pollutant mass balance of many solved node dicts at once with
+    `pollutant_mass_balance_error`. Every dict must hold the results of
+    `compute_pollutant_load_reduction` for `keys`.
+
+    Returns
+    -------
+    list of (index, message) tuples for each pollutant of each dict in `dictlist`
+    that does not balance.
+
+    """
+    if not dictlist or not len(keys):
+        return []
+
+    def values(keys: list[str]) -> numpy.ndarray:
+        return numpy.array([[dct[k] for k in keys] for dct in dictlist], dtype=float)
+
+    error = pollutant_mass_balance_error(
+        inflow_load=values(keys.inflow),
+        influent_conc=values(keys.influent_conc),
+        vol_bypassed=values(keys.vol_bypassed),
+        vol_treated=values(keys.vol_treated),
+        vol_retained=values(keys.vol_retained),
+        released_from_bypassed=values(keys.outputs["released_from_bypassed"]),
+        released_from_treated=values(keys.outputs["released_from_treated"]),
+        conc_to_load_factor=keys.conc_to_load_factor,
+    )
+
+    return [
+        (int(i), f"ERROR: pollutant mass balance error for {keys.load[j]}")
+        for i, j in zip(*numpy.nonzero(error), strict=True)
+    ]
+
+
+def effluent_concentrations(
+    influent_conc: numpy.ndarray,
+    keys: PollutantKeys,
+    effluent_function_map: dict[tuple[str, str], Callable],
+    facility_types: list[str],
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """The treated effluent concentration of each pollutant of many treatment units.
+
+    Parameters
+    ----------
+    influent_conc : numpy.ndarray
+        2D array with one row per treatment unit and one column per pollutant of
+        `keys`.
+    keys : PollutantKeys
+    effluent_function_map : mapping
+        see `compute_pollutant_load_reduction`. If this is an `EffluentFunctionMap`,
+        every unit and pollutant is evaluated at once with its compiled coefficients.
+    facility_types : list of str
+        the treatment performance facility type of each unit.
+
+    Returns
+    -------
+    effluent_conc : numpy.ndarray
+        like `influent_conc`. Pollutants without a treatment function are not
+        treated.
+    missing : numpy.ndarray
+        boolean array of the pollutants of each unit without a treatment function.
+
+    """
+    if isinstance(effluent_function_map, EffluentFunctionMap):
+        coefficients = effluent_function_map.coefficients(keys.pollutant_units)
+        facility_idx = coefficients.facility_codes(facility_types)[:, numpy.newaxis]
+        pollutant_idx = coefficients.pollutant_codes(keys.long_names)[numpy.newaxis]
+
+        effluent_conc = coefficients.effluent_conc_array(
+            influent_conc, facility_idx, pollutant_idx
+        )
+        missing = ~coefficients.is_defined(facility_idx, pollutant_idx)
+        return effluent_conc, missing
+
+    effluent_conc = influent_conc.copy()
+    missing = numpy.zeros(influent_conc.shape, dtype=bool)
+    for r, tmnt_facility_type in enumerate(facility_types):
+        for j, (poc_long, conc_unit) in enumerate(keys.pollutant_units):
+            tmnt_fxn = effluent_function_map.get((tmnt_facility_type, poc_long))
+            if tmnt_fxn is None:
+                missing[r, j] = True
+            else:
+                effluent_conc[r, j] = tmnt_fxn(
+                    inf_conc=float(influent_conc[r, j]), inf_unit=conc_unit
+                )
+
+    return effluent_conc, missing
+
+
+def _load_reduction(
+    values: Callable[..., numpy.ndarray],
+    keys: PollutantKeys,
+    effluent_function_map: dict[tuple[str, str], Callable],
+    facility_types: list[str],
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """`compute_pollutant_load_reduction_array` of many treatment units, reading each
+    input with `values(keys, default)`. Returns the outputs in the order of `keys.output_keys`, and
+    the `missing` treatment functions, see `effluent_concentrations`.
+    """
+    influent_conc = values(keys.influent_conc)
+    effluent_conc, missing = effluent_concentrations(
+        influent_conc, keys, effluent_function_map, facility_types
+    )
+
+    outputs = compute_pollutant_load_reduction_array(
+        inflow_load=values(keys.inflow),
+        influent_conc=influent_conc,
+        effluent_conc=effluent_conc,
+        vol_bypassed=values(keys.vol_bypassed),
+        vol_treated=values(keys.vol_treated),
+        vol_retained=values(keys.vol_retained),
+        vol_discharged=values(keys.vol_discharged),
+        load=values(keys.load, 0.0),
+        removed_upstream=values(keys.removed_upstream, 0.0),
+        load_to_conc_factor=keys.load_to_conc_factor,
+        conc_to_load_factor=keys.conc_to_load_factor,
+    )
+
+    return numpy.hstack(list(outputs.values())), missing
+
+
+def _missing_function_warning(tmnt_facility_type: str, poc_long: str) -> str:
+    return (
+        f"WARNING: treatment function not found for ({tmnt_facility_type}, {poc_long})"
+    )
+
+
+def compute_pollutant_load_reductions(
+    dictlist: list[dict[str, Any]],
+    keys: PollutantKeys,
+    effluent_function_map: dict[tuple[str, str], Callable],
+    facility_types: list[str],
+    node_warnings: list[list[str]] | None = None,
+) -> list[dict[str, Any]]:
+    """Compute the load reduction of every pollutant of many node or facility dicts
+    with one call to `compute_pollutant_load_reduction_array`, and update each dict
+    with its results, see `compute_pollutant_load_reduction`.
+
+    Parameters
+    ----------
+    dictlist : list of dicts
+        the treatment units, e.g., the facilities of a treatment site.
+    keys, effluent_function_map : see `compute_pollutant_load_reduction`
+    facility_types : list of str
+        the `tmnt_facility_type` of each dict.
+    node_warnings : list of lists, optional
+        the warnings list of each dict, if not its current 'node_warnings'.
+        Reference: `LoadReductions`
+
+    """
+    if not dictlist:
+        return dictlist
+
+    def values(names: list[str], default: float | None = None) -> numpy.ndarray:
+        if default is None:
+            rows = [[dct[k] for k in names] for dct in dictlist]
+        else:
+            rows = [[dct.get(k, default) for k in names] for dct in dictlist]
+        return numpy.array(rows, dtype=float).reshape(len(dictlist), len(names))
+
+    outputs, missing = _load_reduction(
+        values, keys, effluent_function_map, facility_types
+    )
+
+    if node_warnings is None:
+        node_warnings = [dct["node_warnings"] for dct in dictlist]
+
+    for r, j in zip(*numpy.nonzero(missing), strict=True):
+        node_warnings[r].append(
+            _missing_function_warning(facility_types[r], keys.long_names[j])
+        )
+
+    for dct, row in zip(dictlist, outputs.tolist(), strict=True):
+        dct.update(zip(keys.output_keys, row, strict=True))
+
+    return dictlist
 
 
 def compute_pollutant_load_reduction(
     data: dict[str, Any],
+    keys: PollutantKeys,
     effluent_function_map: dict[tuple[str, str], Callable],
     tmnt_facility_type: str,
-    conc_unit: str,
-    poc_long: str,
-    load_col: str,
-    conc_col: str,
-    vol_col: str,
-    load_to_conc_factor: float,
-    conc_to_load_factor: float,
-    inflow_load: float,
-    influent_conc: float,
+    load_reductions: "LoadReductions | None" = None,
 ) -> dict[str, Any]:
-    """This function takes an irritating number of parameters, but helps to make the following
-    recipe for calculating the loads given the volume and the concentration much more
-    reusable, if verbose.
+    """Compute the load reduction of every pollutant of a node with
+    `compute_pollutant_load_reduction_array`, and update the node data with the
+    results. Their mass balance is checked after the solve, see
+    `nereid.src.watershed.verification.verify_state`.
 
     This function is called by:
         .dry_weather_loading.compute_dry_weather_load_reduction
-        .treatment_site_capture.compute_site_wet_weather_load_reduction
-        .treatment_site_capture.compute_site_dry_weather_load_reduction
         .wet_weather_loading.compute_wet_weather_load_reduction
 
+    The facilities of a treatment site are computed together, see
+    `compute_pollutant_load_reductions`, and so are the treatment nodes of a block
+    of the node state, see `LoadReductions`.
+
     Parameters
     ----------
     data : dict
         information about the current node, especially treatment performance (if any), and
-        incoming flow volume and concentration
+        incoming flow volume, load and concentration of each pollutant.
+    keys : PollutantKeys
+        the keys of the pollutants to compute, see `pollutant_keys`.
     effluent_function_map : mapping
         This mapping uses a facility type and a pollutant as the keys to retrieve a function
         that returns effluent concentration as output when given influent concentration as input.
-        This is needed for both wet weather and dry weather.
+        This is needed for both wet weather and dry weather. If this is an
+        `EffluentFunctionMap`, the effluent of every pollutant is evaluated at once
+        with its compiled coefficients instead.
         Reference: `nereid.src.tmnt_performance.tmnt.effluent_conc`
         Reference: `nereid.src.tmnt_performance.tasks.effluent_function_map`
     tmnt_facility_type : string
         string matching one of the facility types in the reference data file which defines the
         influent -> effluent transformation curves.
         Reference: config.yml::project_reference_data::tmnt_performance_table
-    ** : strings and floats
-        named and documented in function definition.
+    load_reductions : LoadReductions, optional
+        if given, the load reduction is deferred to `LoadReductions.compute`.
 
     """
+    if load_reductions is not None:
+        load_reductions.add([data], keys, effluent_function_map, [tmnt_facility_type])
+    else:
+        compute_pollutant_load_reductions(
+            [data], keys, effluent_function_map, [tmnt_facility_type]
+        )
+    return data
 
-    tmnt_fxn = effluent_function_map.get(
-        (tmnt_facility_type, poc_long),
-        None,  # type: ignore[arg-type]
-    )
 
-    if tmnt_fxn is None:
+class LoadReductions:
+    """Pollutant load reductions that are deferred until the volume capture of a
+    block of treatment nodes is solved, so that each group of pollutants is computed
+    with a single call to `compute_pollutant_load_reductions` for the whole block.
 
-        def tmnt_fxn(inf_conc, inf_unit):
-            return inf_conc
+    The warnings of a unit are appended to the 'node_warnings' list that it had when
+    it was added, i.e., exactly where they would have been appended right away.
+    Functions that need the results, like the totals of a treatment site, are run
+    by `compute` with `then`, in the order they were added.
+    """
+
+    def __init__(self) -> None:
+        self._groups: dict[tuple[int, int], tuple[Any, ...]] = {}
+        self._warnings: list[tuple[list[str], list[str]]] = []
+        self._callbacks: list[Callable[[], Any]] = []
 
-        data["node_warnings"].append(
-            f"WARNING: treatment function not found for ({tmnt_facility_type}, {poc_long})"
+    def add(
+        self,
+        dictlist: list[dict[str, Any]],
+        keys: PollutantKeys,
+        effluent_function_map: dict[tuple[str, str], Callable],
+        facility_types: list[str],
+    ) -> None:
+        _, _, dicts, types, warnings = self._groups.setdefault(
+            (id(keys), id(effluent_function_map)),
+            (keys, effluent_function_map, [], [], []),
         )
+        for dct in dictlist:
+            pending: list[str] = []
+            self._warnings.append((dct["node_warnings"], pending))
+            warnings.append(pending)
+        dicts.extend(dictlist)
+        types.extend(facility_types)
 
-    effluent_conc = tmnt_fxn(inf_conc=influent_conc, inf_unit=conc_unit)
-    data[f"{conc_col}_treated_effluent"] = effluent_conc
+    def then(self, fn: Callable[[], Any]) -> None:
+        self._callbacks.append(fn)
 
-    mass_from_bypassed = (
-        data[f"{vol_col}_bypassed"] * influent_conc * conc_to_load_factor
-    )
-    data[f"{load_col}_released_from_bypassed"] = mass_from_bypassed
+    def compute(self) -> None:
+        for (
+            keys,
+            effluent_function_map,
+            dicts,
+            types,
+            warnings,
+        ) in self._groups.values():
+            compute_pollutant_load_reductions(
+                dicts, keys, effluent_function_map, types, warnings
+            )
 
-    mass_from_treated = data[f"{vol_col}_treated"] * effluent_conc * conc_to_load_factor
-    data[f"{load_col}_released_from_treated"] = mass_from_treated
+        # warnings are added in the order of the units, not of the groups.
+        for node_warnings, pending in self._warnings:
+            node_warnings.extend(pending)
+        for fn in self._callbacks:
+            fn()
 
-    # make sure treatment nodes are not 'sources' of load due to floating point precision
-    load_discharged = min(inflow_load, mass_from_bypassed + mass_from_treated)
-    data[f"{load_col}_discharged"] = load_discharged
+        self._groups.clear()
+        self._warnings.clear()
+        self._callbacks.clear()
 
-    load_removed = inflow_load - load_discharged
-    data[f"{load_col}_removed"] = load_removed
 
-    # Use this value for reporting cumulative load removal upstream and including current node.
-    data[f"{load_col}_total_removed"] = load_removed + data.get(
-        f"{load_col}_removed_upstream", 0.0
-    )
+def accumulate_pollutant_columns(
+    block: numpy.ndarray,
+    upstream: numpy.ndarray,
+    loads: "PollutantColumns",
+) -> numpy.ndarray:
+    """Columnar version of the pollutant accumulation recipe shared by
+    `.wet_weather_loading.accumulate_wet_weather_loading` and
+    `.dry_weather_loading.accumulate_dry_weather_pollutant_loading_by_season`.
 
-    discharge_conc = load_to_conc_factor * safe_divide(
-        load_discharged, data[f"{vol_col}_discharged"]
-    )
-    data[f"{conc_col}_effluent"] = discharge_conc
+    All pollutants of all nodes in `block` are accumulated at once. The inflow
+    volume columns referenced by `loads.volume` must already be accumulated.
 
-    load_reduced_by_retention = (
-        data[f"{vol_col}_retained"] * influent_conc * conc_to_load_factor
-    )
+    Parameters
+    ----------
+    block : numpy.ndarray
+        2D array of node state rows to update in place, one row per node.
+    upstream : numpy.ndarray
+        2D array with the sum of the state rows of the immediate predecessors
+        of each node in `block`.
+    loads : PollutantColumns
+        column indices of the pollutant group to accumulate.
+        Reference: `nereid.src.watershed.node_state.NodeStateFields`
 
-    load_reduced_by_treatment = (
-        data[f"{vol_col}_treated"] * influent_conc * conc_to_load_factor
-        - mass_from_treated
-    )
+    """
 
-    mass_balance = inflow_load - (
-        load_reduced_by_retention
-        + load_reduced_by_treatment
-        + mass_from_treated
-        + mass_from_bypassed
+    inflow_load = upstream[:, loads.load] + upstream[:, loads.discharged]
+    influent_conc = (
+        safe_array_divide(inflow_load, block[:, loads.volume])
+        * loads.load_to_conc_factor
     )
 
-    if safe_divide(abs(mass_balance), inflow_load) > 0.01:  # pragma: no cover
-        data["node_errors"].append(
-            f"ERROR: pollutant mass balance error for {load_col}"
-        )
+    block[:, loads.direct] = upstream[:, loads.load]
+    block[:, loads.upstream] = upstream[:, loads.discharged]
+    block[:, loads.inflow] = inflow_load
+    block[:, loads.removed_upstream] = upstream[:, loads.total_removed]
+    block[:, loads.influent_conc] = influent_conc
 
-    # Use this value for reporting total load discharged from current node, accounting
-    # for all upstream inputs and reductions.
-    load = data.get(load_col, 0.0)
-    data[f"{load_col}_total_discharged"] = load + data[f"{load_col}_discharged"]
+    # initialize with assumption of no treatment
+    block[:, loads.effluent_conc] = influent_conc
+    block[:, loads.discharged] = inflow_load
+    block[:, loads.total_discharged] = inflow_load + block[:, loads.load]
+    block[:, loads.total_removed] = upstream[:, loads.total_removed]
 
-    return data
+    return block
@@ -0,0 +1,558 @@
+import copy
+from typing import Any, Iterable
+
+import networkx as nx
+import numpy
+
+from nereid.src.watershed.solve_plan import SolvePlan
+
+SEASONS = ["summer", "winter"]
+
+# these are read from the node's own input data. They are never accumulated, but
+# the solver needs them to compute the accumulated values.
+WET_WEATHER_INPUT_FIELDS = [
+    "eff_area_acres",
+    "runoff_volume_cuft",
+    "retention_volume_cuft",
+    "design_storm_depth_inches",
+    "vol_reduction_cuft",
+    "during_storm_det_volume_cuft",
+]
+
+# these are written for every non-leaf node by the accumulation step.
+WET_WEATHER_ACCUMULATION_FIELDS = [
+    "eff_area_acres_direct",
+    "eff_area_acres_upstream",
+    "eff_area_acres_cumul",
+    "eff_area_acres_total_cumul",
+    "runoff_volume_cuft_direct",
+    "runoff_volume_cuft_upstream",
+    "runoff_volume_cuft_inflow",
+    "runoff_volume_cuft_retained_upstream",
+    "retention_volume_cuft_upstream",
+    "retention_volume_cuft_cumul",
+    "design_volume_cuft_direct",
+    "design_volume_cuft_upstream",
+    "design_volume_cuft_cumul",
+    "during_storm_det_volume_cuft_upstream",
+    "vol_reduction_cuft_upstream",
+    "during_storm_design_vol_cuft_upstream",
+    "during_storm_design_vol_cuft_cumul",
+    "_has_upstream_vol_storage",
+]
+
+# these are written for every non-leaf node that does not perform treatment.
+WET_WEATHER_DISCHARGE_FIELDS = [
+    "retained_pct",
+    "captured_pct",
+    "treated_pct",
+    "bypassed_pct",
+    "runoff_volume_cuft_retained",
+    "runoff_volume_cuft_captured",
+    "runoff_volume_cuft_treated",
+    "runoff_volume_cuft_bypassed",
+    "vol_reduction_cuft_cumul",
+    "during_storm_det_volume_cuft_cumul",
+    "runoff_volume_cuft_total_retained",
+    "runoff_volume_cuft_discharged",
+    "runoff_volume_cuft_total_discharged",
+]
+
+BOOLEAN_FIELDS = ["_has_upstream_vol_storage"]
+
+
+class PollutantColumns:
+    """Column indices for a group of pollutant loads that are accumulated together.
+
+    Each attribute is an integer array with one entry per pollutant (and per season
+    for dry weather) so that every pollutant of a node can be accumulated with a
+    single array operation.
+    """
+
+    def __init__(
+        self,
+        fields: "NodeStateFields",
+        load_cols: list[str],
+        conc_cols: list[str],
+        load_to_conc_factors: list[float],
+        volume_cols: list[str],
+    ) -> None:
+        def add(cols: list[str], suffix: str) -> numpy.ndarray:
+            return numpy.array(
+                [fields.add(c + suffix, accumulated=True) for c in cols], dtype=int
+            )
+
+        self.names = load_cols
+        self.load = add(load_cols, "")
+        self.direct = add(load_cols, "_direct")
+        self.upstream = add(load_cols, "_upstream")
+        self.inflow = add(load_cols, "_inflow")
+        self.removed_upstream = add(load_cols, "_removed_upstream")
+        self.influent_conc = add(conc_cols, "_influent")
+        self.effluent_conc = add(conc_cols, "_effluent")
+        self.discharged = add(load_cols, "_discharged")
+        self.total_discharged = add(load_cols, "_total_discharged")
+        self.total_removed = add(load_cols, "_total_removed")
+        self.load_to_conc_factor = numpy.array(load_to_conc_factors, dtype=float)
+        self.volume = numpy.array([fields.add(c) for c in volume_cols], dtype=int)
+
+
+class FlowColumns:
+    """Column indices for the dry weather flow volumes and rates of each season."""
+
+    def __init__(self, fields: "NodeStateFields", flow_cols: list[str]) -> None:
+        def add(suffix: str) -> numpy.ndarray:
+            return numpy.array(
+                [fields.add(c + suffix, accumulated=True) for c in flow_cols],
+                dtype=int,
+            )
+
+        self.names = flow_cols
+        self.flow = add("")
+        self.direct = add("_direct")
+        self.upstream = add("_upstream")
+        self.inflow = add("_inflow")
+        self.retained_upstream = add("_retained_upstream")
+        self.bypassed = add("_bypassed")
+        self.discharged = add("_discharged")
+        self.total_discharged = add("_total_discharged")
+        self.total_retained = add("_total_retained")
+
+
+class NodeStateFields:
+    """Registry of every numeric attribute that the solver reads from or writes
+    to a node, mapped to a column of the `NodeState.values` array.
+
+    The registry is built once from the wet and dry weather parameter lists, and
+    all column names are formatted here rather than in the solver loop.
+
+    Parameters
+    ----------
+    wet_weather_parameters, dry_weather_parameters : list of dicts
+        Reference: `nereid.src.wq_parameters.init_wq_parameters`
+    """
+
+    def __init__(
+        self,
+        wet_weather_parameters: list[dict[str, Any]],
+        dry_weather_parameters: list[dict[str, Any]] | None = None,
+    ) -> None:
+        self.names: list[str] = []
+        self.index: dict[str, int] = {}
+        self.accumulation_fields: list[str] = []
+        self.discharge_fields: list[str] = []
+
+        for name in WET_WEATHER_INPUT_FIELDS:
+            self.add(name)
+
+        for name in WET_WEATHER_ACCUMULATION_FIELDS:
+            self.add(name, accumulated=True)
+
+        self.wet_loads = PollutantColumns(
+            self,
+            load_cols=[p["load_col"] for p in wet_weather_parameters],
+            conc_cols=[p["conc_col"] for p in wet_weather_parameters],
+            load_to_conc_factors=[
+                p["load_to_conc_factor"] for p in wet_weather_parameters
+            ],
+            volume_cols=["runoff_volume_cuft_inflow" for _ in wet_weather_parameters],
+        )
+
+        for name in WET_WEATHER_DISCHARGE_FIELDS:
+            self.add(name, discharged=True)
+
+        dry_weather_parameters = dry_weather_parameters or []
+        self.has_dry_weather = len(dry_weather_parameters) > 0
+
+        flow_cols = [
+            f"{season}_dry_weather_flow_cuft" + suffix
+            for season in SEASONS
+            for suffix in ["", "_psecond"]
+            if self.has_dry_weather
+        ]
+        self.dry_flows = FlowColumns(self, flow_cols)
+
+        dry_params = [(season, p) for season in SEASONS for p in dry_weather_parameters]
+        self.dry_loads = PollutantColumns(
+            self,
+            load_cols=[season + "_" + p["load_col"] for season, p in dry_params],
+            conc_cols=[season + "_" + p["conc_col"] for season, p in dry_params],
+            load_to_conc_factors=[p["load_to_conc_factor"] for _, p in dry_params],
+            volume_cols=[
+                f"{season}_dry_weather_flow_cuft_inflow" for season, _ in dry_params
+            ],
+        )
+
+        self.boolean_fields = [n for n in BOOLEAN_FIELDS if n in self.index]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, name: str) -> int:
+        return self.index[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.index
+
+    def add(
+        self, name: str, accumulated: bool = False, discharged: bool = False
+    ) -> int:
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        if accumulated and name not in self.accumulation_fields:
+            self.accumulation_fields.append(name)
+        if discharged and name not in self.discharge_fields:
+            self.discharge_fields.append(name)
+        return self.index[name]
+
+    @property
+    def output_fields(self) -> list[str]:
+        return self.accumulation_fields + [
+            n for n in self.discharge_fields if n not in self.accumulation_fields
+        ]
+
+
+class NodeState:
+    """Columnar store of the watershed solution.
+
+    Every attribute in the field registry is a column of the 2D `values` array,
+    and each node is a row addressed by its integer index in topological order.
+    The solver reads and writes columns; the per-node dicts are only updated by
+    `update_node_data` once the solution is complete.
+
+    Rows are sorted by topological generation, so the nodes of each generation are
+    a contiguous block of rows that can be solved together. `generations` holds the
+    (start, stop) row range of each generation, and `edge_src` and `edge_dst` hold
+    the row of each edge's source and target node, sorted by target and then by
+    source node id.
+
+    Nodes that perform treatment are solved with the dict-based strategies in
+    `nereid.src.watershed`. Their solved dicts are kept in `rows`, and their
+    numeric results are written back to the columns so that downstream nodes can
+    read them like any other node.
+
+    Parameters
+    ----------
+    fields : NodeStateFields
+        registry of the columns to store for each node.
+    plan : SolvePlan
+        the topology of the graph. Its node order is the row order of the state.
+    data : list of dicts
+        the input data of each node, in the order of `plan.nodes`. These are the
+        dicts that are updated in place by `update_node_data`.
+    """
+
+    def __init__(
+        self,
+        fields: NodeStateFields,
+        plan: SolvePlan,
+        data: list[dict[str, Any]],
+    ) -> None:
+        plan.check_solvable()
+
+        self.fields = fields
+        self.plan = plan
+        self.data = data
+
+        # the topology is shared by every solve that uses the plan.
+        self.nodes = plan.nodes
+        self.index = plan.index
+        self.predecessors = plan.predecessors
+        self.successors = plan.successors
+        self.is_leaf = plan.is_leaf
+        self.edge_dst = plan.edge_dst
+        self.edge_src = plan.edge_src
+        self.generations = plan.generations
+        self.is_forest = plan.is_forest
+
+        self.values = numpy.zeros((len(self.nodes), len(fields)), dtype=float)
+        self.rows: dict[int, dict[str, Any]] = {}
+        self.node_errors: dict[int, list[str]] = {}
+        self.node_warnings: dict[int, list[str]] = {}
+        self.node_attrs: dict[str, Any] = {}
+
+        self._load_node_data()
+
+    @classmethod
+    def from_graph(
+        cls,
+        g: nx.DiGraph,
+        fields: NodeStateFields,
+        plan: SolvePlan | None = None,
+    ) -> "NodeState":
+        if plan is None:
+            plan = SolvePlan.from_graph(g)
+        data = [g.nodes[n] for n in plan.nodes]
+
+        return cls(fields, plan, data)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __getitem__(self, name: str) -> numpy.ndarray:
+        """returns the column for `name` as a view, indexed by node index."""
+        return self.values[:, self.fields[name]]
+
+    def _load_node_data(self, rows: Iterable[int] | None = None) -> None:
+        index = self.fields.index
+        values = self.values
+        for i in range(len(self)) if rows is None else rows:
+            dct = self.data[i]
+            row = values[i]
+            for k, v in dct.items():
+                j = index.get(k)
+                if j is not None and v is not None:
+                    row[j] = v
+
+            if dct.get("node_id") is None:
+                self.warnings(i).append(
+                    "WARNING: This node is missing from all input tables."
+                )
+
+    def errors(self, i: int) -> list[str]:
+        return self.node_errors.setdefault(i, [])
+
+    def warnings(self, i: int) -> list[str]:
+        return self.node_warnings.setdefault(i, [])
+
+    def upstream(self, i: int) -> numpy.ndarray:
+        """sum the rows of the immediate predecessors of node `i`. Rows are added
+        in the order of the sorted predecessor ids.
+        """
+        predecessors = self.predecessors[i]
+        total = self.values[predecessors[0]].copy()
+        for p in predecessors[1:]:
+            total += self.values[p]
+        return total
+
+    def upstream_block(self, rows: numpy.ndarray) -> numpy.ndarray:
+        """sum the rows of the immediate predecessors of each node in `rows` with a
+        single scatter-add. The predecessors of each node are added in the order of
+        their sorted ids, like `upstream`.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            sorted integer array of the nodes to sum the predecessors of.
+
+        """
+        lo = numpy.searchsorted(self.edge_dst, rows, side="left")
+        counts = numpy.searchsorted(self.edge_dst, rows, side="right") - lo
+        offsets = numpy.cumsum(counts) - counts
+        edges = numpy.repeat(lo - offsets, counts) + numpy.arange(counts.sum())
+        targets = numpy.repeat(numpy.arange(len(rows)), counts)
+
+        total = numpy.zeros((len(rows), self.values.shape[1]), dtype=float)
+        numpy.add.at(total, targets, self.values[self.edge_src[edges]])
+        return total
+
+    @property
+    def post_order(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """see `SolvePlan.post_order`"""
+        return self.plan.post_order
+
+    def subtree_sums(
+        self, rows: numpy.ndarray, source: numpy.ndarray, inclusive: bool = False
+    ) -> numpy.ndarray:
+        """Sum `source` over every node upstream of each node in `rows` with prefix
+        sums over the post-order traversal. This is only valid for graphs where each
+        node has at most one successor, which are the only valid graphs.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            integer array of the nodes to sum the upstream values of.
+        source : numpy.ndarray
+            2D array with one row per node of the values to sum.
+        inclusive : bool, optional (default=False)
+            whether to include the value of the node itself in the sum.
+
+        """
+        position, size = self.post_order
+
+        prefix = numpy.zeros((len(source) + 1, source.shape[1]), dtype=float)
+        ordered = numpy.empty_like(source)
+        ordered[position] = source
+        numpy.cumsum(ordered, axis=0, out=prefix[1:])
+
+        end = position[rows] + int(inclusive)
+        start = position[rows] - size[rows] + 1
+        return prefix[end] - prefix[start]
+
+    def accumulate_subtrees(
+        self,
+        rows: numpy.ndarray,
+        mask: numpy.ndarray,
+        carry: numpy.ndarray,
+        own: numpy.ndarray | None = None,
+        cumulative: bool = False,
+    ) -> None:
+        """Set the `carry` columns of each node in `rows` to the total of their
+        upstream nodes in closed form.
+
+        This is only valid if nothing is retained or removed upstream of `rows`.
+        In that case each value passed downstream is a plain sum over the upstream
+        nodes. Leaves are read only, so they pass their `carry` values as given.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            integer array of the nodes to accumulate.
+        mask : numpy.ndarray
+            boolean array of the nodes that may be summed. This must include `rows`
+            and every node upstream of them.
+        carry : numpy.ndarray
+            columns of the values passed downstream, e.g., "runoff_volume_cuft_discharged".
+        own : numpy.ndarray, optional
+            columns of the values sourced from each node, e.g., "runoff_volume_cuft".
+        cumulative : bool, optional (default=False)
+            if False, each node passes downstream its `own` value plus its `carry`
+            value, e.g., "eff_area_acres" and "eff_area_acres_cumul".
+            If True, the `carry` value of each solved node includes its `own` value,
+            e.g., "retention_volume_cuft_cumul".
+
+        """
+        leaf = self.is_leaf[:, numpy.newaxis]
+        own_values = self.values[:, own] if own is not None else 0.0
+
+        if cumulative:
+            source = numpy.where(leaf, self.values[:, carry], own_values)
+        else:
+            source = numpy.where(leaf, self.values[:, carry], 0.0) + own_values
+        source[~mask] = 0.0
+
+        self.values[numpy.ix_(rows, carry)] = self.subtree_sums(
+            rows, source, inclusive=cumulative
+        )
+
+    def row(self, i: int) -> dict[str, Any]:
+        """returns the accumulated values of node `i` as a dict."""
+        names = self.fields.accumulation_fields
+        cols = [self.fields[n] for n in names]
+        dct: dict[str, Any] = dict(
+            zip(names, self.values[i, cols].tolist(), strict=True)
+        )
+        for name in self.fields.boolean_fields:
+            dct[name] = bool(dct[name])
+        return dct
+
+    def node_row(self, i: int) -> dict[str, Any]:
+        """returns a copy of the input data of node `i` merged with its accumulated
+        values, ready to be solved with the dict-based treatment strategies.
+        """
+        dct = {**self.data[i], **self.row(i)}
+        dct["node_id"] = dct.get("node_id", None) or self.nodes[i]
+        dct["node_errors"] = self.errors(i)
+        dct["node_warnings"] = self.warnings(i)
+        return dct
+
+    def set_row(self, i: int, data: dict[str, Any]) -> None:
+        """write the registered values of a solved node dict back to the columns."""
+        index = self.fields.index
+        row = self.values[i]
+        for k, v in data.items():
+            j = index.get(k)
+            if j is not None and v is not None:
+                row[j] = v
+        self.rows[i] = data
+
+        # the strategies are allowed to replace these lists rather than append to them.
+        self.node_errors[i] = data.get("node_errors") or []
+        self.node_warnings[i] = data.get("node_warnings") or []
+
+    def branch(
+        self,
+        rows: numpy.ndarray,
+        data: dict[int, dict[str, Any]] | None = None,
+    ) -> "NodeState":
+        """Copy this state with `rows` reset to their input data, so they can be
+        solved again without changing this state, e.g., for a scenario that changes
+        the data of some nodes.
+
+        The other rows keep their solved values and share their input dicts with
+        this state, so this must be called before `update_node_data`.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            sorted integer array of the nodes to reset. Every node downstream of
+            a changed node must be included.
+        data : dict, optional
+            new input data of some of `rows`, by node index.
+
+        """
+        new = copy.copy(self)
+        reset = set(rows.tolist())
+        data = data or {}
+
+        new.data = list(self.data)
+        for i in reset:
+            new.data[i] = dict(data.get(i, self.data[i]))
+
+        new.rows = {i: row for i, row in self.rows.items() if i not in reset}
+        new.node_errors = {
+            i: list(v) for i, v in self.node_errors.items() if i not in reset
+        }
+        new.node_warnings = {
+            i: list(v) for i, v in self.node_warnings.items() if i not in reset
+        }
+        new.node_attrs = dict(self.node_attrs)
+
+        new.values = self.values.copy()
+        new.values[rows] = 0.0
+        new._load_node_data(rows.tolist())
+
+        return new
+
+    def update_node_data(self, rows: numpy.ndarray | None = None) -> None:
+        """Rebuild the per-node dicts from the columns. This updates the input
+        dicts in place, so if the state was built from a graph, the graph nodes
+        will contain the results.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray, optional
+            sorted integer array of the nodes to update. Defaults to all nodes.
+
+        """
+
+        names = self.fields.output_fields
+        cols = [self.fields[n] for n in names]
+        booleans = self.fields.boolean_fields
+
+        if rows is None:
+            rows = numpy.arange(len(self))
+        selected = set(rows.tolist())
+
+        solved = [i for i in rows[~self.is_leaf[rows]].tolist() if i not in self.rows]
+        for i, vals in zip(solved, self.values[solved][:, cols].tolist(), strict=True):
+            dct = self.data[i]
+            dct.update(zip(names, vals, strict=True))
+            for name in booleans:
+                dct[name] = bool(dct[name])
+
+        for i, row in self.rows.items():
+            if i in selected:
+                self.data[i].update(row)
+
+        for i in rows.tolist():
+            node, dct = self.nodes[i], self.data[i]
+            dct.update(self.node_attrs)
+            dct["_current_node"] = node
+            dct["_visited"] = True
+            dct["node_errors"] = self.node_errors.get(i, [])
+            dct["node_warnings"] = self.node_warnings.get(i, [])
+
+            if dct.get("node_id") is None:
+                dct["node_id"] = node
+
+            is_leaf = bool(self.is_leaf[i])
+            dct["_is_leaf"] = is_leaf
+            if not is_leaf:
+                dct["_ds_node_id"] = ",".join(
+                    str(self.nodes[s]) for s in self.successors[i]
+                )
+                dct["_us_node_ids"] = ",".join(
+                    str(self.nodes[p]) for p in self.predecessors[i]
+                )
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from typing import Any
+
+import numpy
+
+from nereid.src.watershed.node_state import NodeState
+
+# lower edges of the solve time bins, in seconds. The last bin is open ended.
+PROFILE_BIN_EDGES = [0.0, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0]
+
+
+class NodeProfile:
+    """Solve time of each node of a watershed, grouped by node type and nomograph
+    solution status, see `solve_watershed_loading`.
+
+    Treatment nodes are timed one at a time. The nodes of a block that are solved
+    together by vectorized column operations share the time of those operations
+    equally, so in the "generation" and "subtree" modes the time of a node without
+    treatment is the mean of its block. In the "node" mode each node is timed on its
+    own. Leaf nodes are never solved, so they are not profiled.
+
+    Parameters
+    ----------
+    bin_edges : list of floats, optional
+        lower edges of the solve time histogram bins, in seconds. Defaults to
+        `PROFILE_BIN_EDGES`.
+    """
+
+    def __init__(self, bin_edges: list[float] | None = None) -> None:
+        self.bin_edges = list(PROFILE_BIN_EDGES if bin_edges is None else bin_edges)
+        self.seconds = numpy.zeros(0)
+        self.solved = numpy.zeros(0, dtype=bool)
+        self.node_ids: list[str] = []
+        self.node_types: list[str] = []
+        self.statuses: list[str | None] = []
+
+    def start(self, state: NodeState) -> None:
+        """Reset the profile for the rows of `state`."""
+        self.seconds = numpy.zeros(len(state))
+        self.solved = numpy.zeros(len(state), dtype=bool)
+
+    def add(self, rows: numpy.ndarray | int, seconds: float) -> None:
+        """Split the time of solving `rows` equally between them."""
+        rows = numpy.atleast_1d(rows)
+        if len(rows):
+            self.seconds[rows] += seconds / len(rows)
+            self.solved[rows] = True
+
+    def collect(self, state: NodeState) -> None:
+        """Look up the id, type and nomograph solution status of the solved nodes."""
+        self.node_ids, self.node_types, self.statuses = [], [], []
+        for i in numpy.flatnonzero(self.solved).tolist():
+            self.node_ids.append(str(state.nodes[i]))
+            self.node_types.append(str(state.data[i].get("node_type") or "virtual"))
+            self.statuses.append(
+                state.rows.get(i, {}).get("_nomograph_solution_status")
+            )
+
+    @property
+    def node_seconds(self) -> numpy.ndarray:
+        """the solve time of each collected node, in the order of `node_ids`."""
+        return self.seconds[self.solved]
+
+    def histogram(self) -> list[dict[str, Any]]:
+        """Histogram of the solve time of the nodes of each node type and nomograph
+        solution status, with the slowest groups first.
+        """
+        seconds = self.node_seconds
+        bins = numpy.searchsorted(self.bin_edges, seconds, side="right") - 1
+
+        groups: dict[tuple[str, str | None], list[int]] = defaultdict(list)
+        for j, key in enumerate(zip(self.node_types, self.statuses, strict=True)):
+            groups[key].append(j)
+
+        histogram = []
+        for (node_type, status), members in groups.items():
+            times = seconds[members]
+            histogram.append(
+                {
+                    "node_type": node_type,
+                    "status": status,
+                    "count": len(members),
+                    "total_s": float(times.sum()),
+                    "mean_s": float(times.mean()),
+                    "max_s": float(times.max()),
+                    "bins": numpy.bincount(
+                        bins[members], minlength=len(self.bin_edges)
+                    ).tolist(),
+                }
+            )
+
+        return sorted(histogram, key=lambda dct: dct["total_s"], reverse=True)
+
+    def slowest(self, n: int = 10) -> list[dict[str, Any]]:
+        """The `n` nodes that took the longest to solve, slowest first."""
+        seconds = self.node_seconds
+        order = numpy.argsort(-seconds, kind="stable")[:n]
+        return [
+            {
+                "node_id": self.node_ids[j],
+                "node_type": self.node_types[j],
+                "status": self.statuses[j],
+                "seconds": float(seconds[j]),
+            }
+            for j in order.tolist()
+        ]
+
+    def to_dict(self, top_n: int = 10) -> dict[str, Any]:
+        return {
+            "total_s": float(self.node_seconds.sum()),
+            "bin_edges_s": self.bin_edges,
+            "histogram": self.histogram(),
+            "slowest": self.slowest(top_n),
+        }
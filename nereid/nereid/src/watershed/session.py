@@ -0,0 +1,78 @@
+from copy import deepcopy
+from typing import Any
+
+from nereid.src.watershed.utils import attrs_to_resubmit
+
+WATERSHED_TABLES = ["land_surfaces", "treatment_facilities", "treatment_sites"]
+
+
+def session_watershed(watershed: dict[str, Any]) -> dict[str, Any]:
+    """The parts of a watershed request that a session keeps between solves."""
+    session = {
+        "graph": deepcopy(watershed["graph"]),
+    }
+    for key in WATERSHED_TABLES:
+        session[key] = deepcopy(watershed.get(key) or [])
+
+    return session
+
+
+def apply_watershed_delta(
+    watershed: dict[str, Any],
+    delta: dict[str, Any],
+) -> tuple[dict[str, Any], list[str]]:
+    """Apply the changes of a `WatershedDelta` to a session watershed.
+
+    Returns
+    -------
+    watershed : dict
+        the updated watershed. The input is not modified.
+    dirty_nodes : list
+        every node whose data or connections changed. Both ends of an added or
+        removed edge are dirty, since the upstream loading of the target and the
+        downstream node of the source both change.
+
+    """
+    watershed = deepcopy(watershed)
+    dirty: set[str] = set()
+
+    graph = watershed["graph"]
+    remove_edges = {(e["source"], e["target"]) for e in delta.get("remove_edges") or []}
+    if remove_edges:
+        graph["edges"] = [
+            e for e in graph["edges"] if (e["source"], e["target"]) not in remove_edges
+        ]
+    add_edges = delta.get("add_edges") or []
+    graph["edges"] = graph["edges"] + deepcopy(add_edges)
+    for s, t in remove_edges | {(e["source"], e["target"]) for e in add_edges}:
+        dirty.update([s, t])
+
+    for key in WATERSHED_TABLES:
+        upsert = delta.get(key) or []
+        remove = set(delta.get(f"remove_{key}") or [])
+        replaced = {dct["node_id"] for dct in upsert} | remove
+
+        watershed[key] = [
+            dct for dct in watershed.get(key) or [] if dct["node_id"] not in replaced
+        ] + deepcopy(upsert)
+        dirty.update(replaced)
+
+    return watershed, sorted(dirty)
+
+
+def merge_previous_results(
+    previous_results: list[dict[str, Any]],
+    results: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Update the stored results of a session with the results of a re-solve.
+
+    Only the attributes that a later solve needs from its upstream nodes are kept,
+    see `nereid.src.watershed.utils.attrs_to_resubmit`.
+    """
+
+    keys = attrs_to_resubmit(results)
+    merged = {dct["node_id"]: dct for dct in previous_results}
+    for dct in results:
+        merged[dct["node_id"]] = {k: dct[k] for k in keys if k in dct}
+
+    return list(merged.values())
@@ -0,0 +1,270 @@
+from collections import defaultdict
+from typing import Any, Callable
+
+import numpy
+
+from nereid.core.units import Constants
+from nereid.core.utils import safe_divide
+
+SIZING_TARGETS = ["captured_pct", "retained_pct", "load_removed_pct"]
+
+# the facility inputs that scale with a sized volume, so that the depths and the
+# drawdown times of the constructed facility do not change.
+VOLUME_DESIGN_INPUTS = [
+    "total_volume_cuft",
+    "retention_volume_cuft",
+    "treatment_volume_cuft",
+    "pool_volume_cuft",
+    "area_sqft",
+]
+
+
+def sizing_problem(
+    data: dict[str, Any],
+    target: dict[str, Any],
+    wet_weather_parameters: list[dict[str, Any]],
+    nomograph_map: dict[str, Callable],
+) -> dict[str, Any]:
+    """Convert a sizing target of a solved facility node into the inverse nomograph
+    lookup that meets it.
+
+    The size of a facility does not change its inflow, so the upstream state from a
+    single solve is enough to find the size that meets a target. Only facilities
+    with a single sizeable compartment are supported:
+
+    * volume-based facilities without upstream volume storage, with either a
+      retention or a treatment volume. The volume is sized at a constant drawdown
+      time. Cisterns are not supported, since their drawdown time depends on their
+      volume.
+    * flow-based facilities. The treatment rate is sized.
+
+    Load removal targets are converted to a capture target with the effluent
+    concentration of the node, since the retained volume removes all of its load
+    and the treated volume removes `1 - effluent / influent` of its load.
+
+    Parameters
+    ----------
+    data : dict
+        the solved data of the facility node, see `NodeState.rows`
+    target : dict
+        a `FacilitySizingTarget`
+    wet_weather_parameters : list of dicts
+        Reference: `nereid.src.wq_parameters.init_wq_parameters`
+    nomograph_map : mapping
+        Reference: `nereid.src.nomograph.nomo.load_nomograph_mapping`
+
+    Returns
+    -------
+    dict
+        the `size_field` to size, the `nomograph` file to invert, the trace `t`,
+        the required `capture` fraction and the `scale` from the nomograph x to the
+        size. If the target cannot be sized, this only holds the `errors`.
+
+    """
+    node_type = str(data.get("node_type") or "virtual")
+    errors: list[str] = []
+    problem: dict[str, Any] = {"errors": errors}
+
+    # retained = a * captured + b, as fractions of the inflow volume.
+    if "cistern" in node_type:
+        errors.append(f"ERROR: facilities of type '{node_type}' cannot be sized.")
+        return problem
+
+    elif all(v in node_type for v in ["volume_based", "facility"]):
+        if data.get("_has_upstream_vol_storage"):
+            errors.append(
+                "ERROR: facilities with upstream volume storage cannot be sized."
+            )
+            return problem
+
+        ret_vol = data.get("retention_volume_cuft") or 0.0
+        trt_vol = data.get("treatment_volume_cuft") or 0.0
+        if ret_vol > 0 and trt_vol > 0:
+            errors.append(
+                "ERROR: facilities with both a retention and a treatment volume "
+                "cannot be sized."
+            )
+            return problem
+
+        if ret_vol <= 0 and trt_vol <= 0:
+            errors.append("ERROR: facilities without a volume cannot be sized.")
+            return problem
+
+        if trt_vol > 0:
+            field, t = "treatment_volume_cuft", data.get("treatment_ddt_hr") or 0.0
+            a, b = 0.0, (data.get("minimum_retention_pct_override") or 0.0) / 100
+        else:
+            field, t = "retention_volume_cuft", data.get("retention_ddt_hr") or 0.0
+            a, b = 1.0, 0.0
+
+        nomograph = data.get("volume_nomograph", "")
+        scale = data.get("design_volume_cuft_cumul", 0.0)
+
+    elif "flow_based_facility" in node_type:
+        field = "treatment_rate_cfs"
+        t = data.get("tributary_area_tc_min")
+        if t is None or t < 5:
+            t = 5
+
+        volume_nomo = nomograph_map.get(data.get("volume_nomograph", ""))
+        size_fraction = safe_divide(
+            data.get("retention_volume_cuft", 0.0), data["design_volume_cuft_cumul"]
+        )
+        a = (
+            float(
+                volume_nomo(size=size_fraction, ddt=data.get("retention_ddt_hr", 0.0))
+                or 0.0
+            )
+            if volume_nomo is not None
+            else 0.0
+        )
+        b = 0.0
+
+        nomograph = data.get("flow_nomograph", "")
+        scale = data.get("eff_area_acres_cumul", 0.0) / Constants.CFS_per_ACRE_to_INHR
+
+    else:
+        errors.append(f"ERROR: facilities of type '{node_type}' cannot be sized.")
+        return problem
+
+    if nomograph not in nomograph_map:
+        errors.append(f"ERROR: nomograph '{nomograph}' not found.")
+        return problem
+
+    value = target["value"] / 100
+    kind = target["target"]
+    if kind == "captured_pct":
+        capture = value
+
+    elif kind == "retained_pct":
+        if a <= 0:
+            errors.append(f"ERROR: '{field}' does not change the retained volume.")
+            return problem
+        capture = (value - b) / a
+
+    else:
+        param = next(
+            (
+                p
+                for p in wet_weather_parameters
+                if target.get("pollutant") in (p["short_name"], p["long_name"])
+            ),
+            None,
+        )
+        if param is None:
+            errors.append(f"ERROR: pollutant '{target.get('pollutant')}' not found.")
+            return problem
+
+        conc_col = param["conc_col"]
+        influent = data.get(f"{conc_col}_influent", 0.0)
+        effluent = data.get(f"{conc_col}_treated_effluent", influent)
+        k = min(1.0, max(0.0, 1 - safe_divide(effluent, influent)))
+
+        # removed = retained + k * treated
+        removal_per_capture = a + (1 - a) * k
+        if influent <= 0 or removal_per_capture <= 0:
+            errors.append(
+                f"ERROR: '{field}' does not change the load removal of "
+                f"'{target.get('pollutant')}'."
+            )
+            return problem
+        capture = (value - b * (1 - k)) / removal_per_capture
+
+    problem.update(
+        {
+            "size_field": field,
+            "nomograph": nomograph,
+            "t": float(t),
+            "capture": min(1.0, max(0.0, capture)),
+            "scale": scale,
+        }
+    )
+    return problem
+
+
+def solve_sizing_problems(
+    problems: list[dict[str, Any]],
+    nomograph_map: dict[str, Callable],
+) -> list[dict[str, Any]]:
+    """Find the size of each problem from `sizing_problem` with one batched inverse
+    lookup per nomograph. Each problem is updated in place with its `size` and
+    whether the inverse lookup `converged`.
+    """
+
+    groups: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for problem in problems:
+        if not problem["errors"]:
+            groups[problem["nomograph"]].append(problem)
+
+    for nomograph, group in groups.items():
+        nomo = nomograph_map[nomograph].nomo  # type: ignore[attr-defined]
+        x, converged = nomo.get_x_array(
+            at_y=numpy.array([p["capture"] for p in group]),
+            t=numpy.array([p["t"] for p in group]),
+        )
+        for problem, _x, _converged in zip(group, x, converged, strict=True):
+            problem["size"] = float(_x * problem["scale"])
+            problem["converged"] = bool(_converged)
+
+    return problems
+
+
+def sized_facility(
+    facility: dict[str, Any],
+    data: dict[str, Any],
+    size_field: str,
+    size: float,
+) -> dict[str, Any]:
+    """The treatment facility input of a sized facility, to be constructed again
+    with `nereid.src.treatment_facility.tasks.initialize_treatment_facilities`,
+    so that the fields derived from the size are updated too.
+
+    Volumes are sized at a constant drawdown time, see `sizing_problem`, so the
+    facility is scaled as a whole: its volumes and area, and the design rate of a
+    dry well, are scaled by the ratio of the size to the constructed value of the
+    `size_field`. Flow-based facilities are sized by their treatment rate.
+
+    Parameters
+    ----------
+    facility : dict
+        the treatment facility of the node in the watershed request.
+    data : dict
+        the constructed data of the facility node.
+    size_field, size : see `solve_sizing_problems`
+
+    """
+    sized = dict(facility)
+    if size_field == "treatment_rate_cfs":
+        sized[size_field] = size
+        return sized
+
+    scale = safe_divide(size, data[size_field])
+    inputs = list(VOLUME_DESIGN_INPUTS)
+    if data.get("constructor") == "dry_well_facility_constructor":
+        inputs.append("treatment_rate_cfs")
+
+    for k in inputs:
+        if sized.get(k) is not None:
+            sized[k] = sized[k] * scale
+    return sized
+
+
+def achieved_pct(
+    data: dict[str, Any],
+    target: dict[str, Any],
+    wet_weather_parameters: list[dict[str, Any]],
+) -> float | None:
+    """The value of a sizing target in the solved data of a node."""
+    kind = target["target"]
+    if kind != "load_removed_pct":
+        value = data.get(kind)
+        return None if value is None else float(value)
+
+    for p in wet_weather_parameters:
+        if target.get("pollutant") in (p["short_name"], p["long_name"]):
+            load_col = p["load_col"]
+            return 100 * safe_divide(
+                data.get(f"{load_col}_removed", 0.0),
+                data.get(f"{load_col}_inflow", 0.0),
+            )
+    return None
@@ -0,0 +1,305 @@
+from functools import cached_property
+from typing import Any, Hashable, Iterable
+
+import networkx as nx
+import numpy
+
+from nereid.core.cache import LRUCache, content_hash
+from nereid.core.config import settings
+from nereid.core.timings import count
+from nereid.src.network.algorithms import any_in_intervals
+from nereid.src.network.compact import CompactGraph
+from nereid.src.network.utils import GraphType, graph_factory
+from nereid.src.network.validate import validate_network
+
+# node strategies, see `node_strategy`
+LOADING = 0
+TREATMENT_SITE = 1
+TREATMENT_FACILITY = 2
+
+
+def node_strategy(node_type: str | None) -> int:
+    """Code of the solver strategy for a node type.
+
+    Site-based treatment takes precedence over facility treatment, like the
+    dispatch in `nereid.src.watershed.solve_watershed.solve_node_treatment`.
+    """
+    node_type = str(node_type or "virtual")
+    if "site_based" in node_type:
+        return TREATMENT_SITE
+    if "facility" in node_type:
+        return TREATMENT_FACILITY
+    return LOADING
+
+
+def network_validation_errors(g: GraphType | CompactGraph) -> list[str]:
+    errors = validate_network(g)
+    if not any(errors):
+        return []
+
+    err_msg = "NetworkValidationError: "
+    _keys = ["node_cycles", "edge_cycles", "multiple_out_edges", "duplicate_edges"]
+    for key, value in zip(_keys, errors, strict=True):
+        if len(value) > 0:
+            err_msg += ", " + ": ".join([key, str(value)])
+
+    return [err_msg]
+
+
+class SolvePlan:
+    """Everything the solver derives from the topology of a graph.
+
+    None of this depends on the node data, so a plan can be reused by every solve
+    of the same network, see `get_solve_plan`.
+
+    Nodes are sorted by topological generation, and each node is addressed by its
+    integer index in this order. This is the row order of `NodeState`.
+
+    Attributes
+    ----------
+    nodes : list
+        node ids sorted by topological generation.
+    index : dict
+        the integer index of each node id.
+    graph_nodes : list
+        node ids in the order of the input graph. Responses list nodes in this order.
+    predecessors, successors : list of integer arrays
+        indices of the immediate neighbors of each node, sorted by node id.
+    is_leaf : numpy.ndarray
+        boolean array of the nodes without predecessors.
+    edge_src, edge_dst : numpy.ndarray
+        index of each edge's source and target node, sorted by target and then by
+        source node id.
+    generations : list of tuples
+        the (start, stop) index range of each topological generation.
+    is_forest : bool
+        whether each node has at most one successor.
+    is_valid : bool
+        whether the graph passed the network validation.
+    errors : list of str
+        the network validation error message, if the graph is not valid.
+    cycle_error : str or None
+        the reason the graph cannot be sorted topologically, if it has a cycle. Such
+        graphs have no nodes to solve.
+    """
+
+    def __init__(
+        self,
+        nodes: list[Hashable],
+        predecessors: list[numpy.ndarray],
+        successors: list[numpy.ndarray],
+        graph_nodes: list[Hashable] | None = None,
+        errors: list[str] | None = None,
+        cycle_error: str | None = None,
+    ) -> None:
+        self.nodes = nodes
+        self.index = {n: i for i, n in enumerate(nodes)}
+        self.graph_nodes = graph_nodes if graph_nodes is not None else nodes
+        self.predecessors = predecessors
+        self.successors = successors
+        self.errors = errors or []
+        self.is_valid = not self.errors
+        self.cycle_error = cycle_error
+
+        self.is_leaf = numpy.array([len(p) == 0 for p in predecessors], dtype=bool)
+        self.edge_dst = numpy.repeat(
+            numpy.arange(len(nodes)), [len(p) for p in predecessors]
+        )
+        self.edge_src = (
+            numpy.concatenate(predecessors) if predecessors else numpy.array([], int)
+        ).astype(int)
+        self.generations = self._generations()
+        self.is_forest = all(len(s) <= 1 for s in successors)
+
+        self._strategy_cache: tuple[tuple, numpy.ndarray] | None = None
+
+    @classmethod
+    def from_graph(cls, g: GraphType) -> "SolvePlan":
+        errors = network_validation_errors(g)
+        dg = g if type(g) is nx.DiGraph else nx.DiGraph(g)
+
+        try:
+            nodes = [n for gen in nx.topological_generations(dg) for n in gen]
+        except nx.NetworkXUnfeasible as e:
+            return cls([], [], [], list(dg.nodes), errors, cycle_error=str(e))
+
+        index = {n: i for i, n in enumerate(nodes)}
+
+        def indices(neighbors: Iterable[Any]) -> numpy.ndarray:
+            return numpy.array([index[n] for n in sorted(neighbors)], dtype=int)
+
+        predecessors = [indices(dg.predecessors(n)) for n in nodes]
+        successors = [indices(dg.successors(n)) for n in nodes]
+
+        return cls(nodes, predecessors, successors, list(dg.nodes), errors)
+
+    @classmethod
+    def from_compact(cls, cg: CompactGraph) -> "SolvePlan":
+        """The same plan as `from_graph`, from the integer arrays of a network."""
+        errors = network_validation_errors(cg)
+
+        try:
+            rows = [i for gen in cg.topological_generations() for i in gen]
+        except nx.NetworkXUnfeasible as e:
+            return cls([], [], [], cg.ids, errors, cycle_error=str(e))
+
+        nodes = cg.labels(rows)
+        index = {n: i for i, n in enumerate(nodes)}
+
+        def indices(neighbors: list[int]) -> numpy.ndarray:
+            ids = sorted(set(cg.labels(neighbors)))
+            return numpy.array([index[n] for n in ids], dtype=int)
+
+        predecessors = [indices(cg.predecessors(i)) for i in rows]
+        successors = [indices(cg.successors(i)) for i in rows]
+
+        return cls(nodes, predecessors, successors, cg.ids, errors)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _generations(self) -> list[tuple[int, int]]:
+        level = numpy.zeros(len(self.nodes), dtype=int)
+        for i, predecessors in enumerate(self.predecessors):
+            if len(predecessors):
+                level[i] = level[predecessors].max() + 1
+
+        if numpy.any(numpy.diff(level) < 0):
+            raise ValueError("nodes must be sorted by topological generation.")
+
+        bounds = [0, *(numpy.flatnonzero(numpy.diff(level)) + 1).tolist(), len(level)]
+        return [(a, b) for a, b in zip(bounds[:-1], bounds[1:], strict=True) if b > a]
+
+    def check_solvable(self) -> None:
+        if self.cycle_error is not None:
+            raise nx.NetworkXUnfeasible(self.cycle_error)
+
+    def descendants(self, rows: Iterable[int]) -> set[int]:
+        """indices of every node downstream of `rows`."""
+        seen: set[int] = set()
+        stack = list(rows)
+        while stack:
+            for s in self.successors[stack.pop()].tolist():
+                if s not in seen:
+                    seen.add(s)
+                    stack.append(s)
+        return seen
+
+    def subset(self, nodes: Iterable[Hashable]) -> set[Hashable]:
+        """The nodes that must be re-solved if `nodes` are dirty, plus the immediate
+        parents that they read from. This is `nereid.src.network.algorithms.get_subset`
+        without the graph.
+        """
+        rows = {self.index[n] for n in nodes if n in self.index}
+        if not self.is_forest:
+            solve = rows | self.descendants(rows)
+            parents = {p for i in solve for p in self.predecessors[i].tolist()}
+            return {self.nodes[i] for i in solve | parents}
+
+        # a node is downstream of a dirty node if its subtree holds the dirty node.
+        position, size = self.post_order
+        points = position[list(rows)]
+        mask = any_in_intervals(position - size + 1, position, points)
+        mask[self.edge_src[mask[self.edge_dst]]] = True
+        return {self.nodes[i] for i in numpy.flatnonzero(mask).tolist()}
+
+    def strategies(self, data: list[dict[str, Any]]) -> numpy.ndarray:
+        """Solver strategy code of each node, from the `node_type` in its data.
+
+        The node types of the last call are remembered, so repeated solves with the
+        same treatment layout skip the string matching.
+        """
+        node_types = tuple(dct.get("node_type") for dct in data)
+
+        # plans are shared by threads, so the cache is read once.
+        cache = self._strategy_cache
+        if cache is not None and cache[0] == node_types:
+            return cache[1]
+
+        codes = numpy.array([node_strategy(t) for t in node_types], dtype=numpy.int8)
+        self._strategy_cache = (node_types, codes)
+        return codes
+
+    @cached_property
+    def post_order(self) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Post-order traversal of the forest of in-trees formed by the nodes.
+
+        Returns
+        -------
+        position : numpy.ndarray
+            the post-order position of each node.
+        size : numpy.ndarray
+            the number of nodes in the subtree of each node, including itself. The
+            subtree of node `i` occupies positions
+            `position[i] - size[i] + 1` to `position[i]`, inclusive.
+
+        """
+        predecessors = [p.tolist() for p in self.predecessors]
+
+        # visit the predecessors in reverse so that the reversed traversal visits
+        # them in order.
+        stack = [i for i, s in enumerate(self.successors) if len(s) == 0]
+        traversal = []
+        while stack:
+            i = stack.pop()
+            traversal.append(i)
+            stack.extend(predecessors[i])
+        order = traversal[::-1]
+
+        size = [1] * len(order)
+        for i in order:
+            for p in predecessors[i]:
+                size[i] += size[p]
+
+        position = numpy.empty(len(order), dtype=int)
+        position[order] = numpy.arange(len(order))
+
+        return position, numpy.array(size, dtype=int)
+
+
+def plan_key(graph: dict[str, Any]) -> str:
+    """Content hash of everything in a graph request that `graph_factory` turns
+    into topology. Node and edge metadata are not part of the key.
+    """
+    edges = graph.get("edges") or []
+    nodes = graph.get("nodes") or []
+
+    return content_hash(
+        [
+            graph.get("directed", False),
+            graph.get("multigraph", True),
+            [[d.get("source"), d.get("target"), d.get("key")] for d in edges],
+            [n.get("id") for n in nodes],
+        ]
+    )
+
+
+_plan_cache: LRUCache[SolvePlan] = LRUCache()
+
+
+def get_solve_plan(graph: dict[str, Any], maxsize: int | None = None) -> SolvePlan:
+    """Return the plan for a graph request, building and validating the network
+    only on a cache miss.
+
+    The cache is per-process and keeps at most `maxsize` plans, which defaults to
+    `settings.PLAN_CACHE_SIZE`.
+    """
+
+    if maxsize is None:
+        maxsize = settings.PLAN_CACHE_SIZE
+
+    key = plan_key(graph)
+    count("plan_cache_hits" if key in _plan_cache else "plan_cache_misses")
+
+    return _plan_cache.get_or_build(key, lambda: _build_plan(graph), maxsize=maxsize)
+
+
+def _build_plan(graph: dict[str, Any]) -> SolvePlan:
+    # directed networks are read straight from the edge list of the request.
+    if graph.get("directed", False):
+        return SolvePlan.from_compact(CompactGraph.from_graph_dict(graph))
+    return SolvePlan.from_graph(graph_factory(graph))
+
+
+def plan_cache_clear() -> None:
+    _plan_cache.clear()
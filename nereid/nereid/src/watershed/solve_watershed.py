@@ -1,39 +1,55 @@
-from typing import Any, Callable
+import time
+from typing import Any, Callable, Hashable, Iterable, Iterator
 
 import networkx as nx
+import numpy
 
+from nereid.core.timings import count, phase
 from nereid.core.utils import dictlist_to_dict
 from nereid.src.land_surface.tasks import land_surface_loading
 from nereid.src.network.utils import graph_factory
-from nereid.src.network.validate import is_valid, validate_network
-from nereid.src.nomograph.nomo import load_nomograph_mapping
-from nereid.src.tmnt_performance.tasks import effluent_function_map
 from nereid.src.treatment_facility.constructors import (
     TreatmentFacilityConstructor as TMNTConstructor,
 )
 from nereid.src.treatment_facility.tasks import initialize_treatment_facilities
 from nereid.src.treatment_site.tasks import initialize_treatment_sites
 from nereid.src.watershed.dry_weather_loading import (
+    accumulate_dry_weather_columns,
     accumulate_dry_weather_loading,
+    accumulate_dry_weather_subtree_columns,
     compute_dry_weather_load_reduction,
     compute_dry_weather_volume_performance,
 )
+from nereid.src.watershed.engine import WatershedEngine, get_watershed_engine
+from nereid.src.watershed.loading import LoadReductions
+from nereid.src.watershed.node_state import NodeState
+from nereid.src.watershed.profiling import NodeProfile
 from nereid.src.watershed.simple_facility_capture import (
     compute_simple_facility_dry_weather_volume_capture,
     compute_simple_facility_wet_weather_volume_capture,
 )
+from nereid.src.watershed.solve_plan import (
+    LOADING,
+    SolvePlan,
+    get_solve_plan,
+    network_validation_errors,
+    node_strategy,
+)
 from nereid.src.watershed.treatment_facility_capture import (
     compute_volume_capture_with_nomograph,
 )
 from nereid.src.watershed.treatment_site_capture import solve_treatment_site
 from nereid.src.watershed.utils import attrs_to_resubmit
+from nereid.src.watershed.verification import check_verify_mode, verify_state
 from nereid.src.watershed.wet_weather_loading import (
+    accumulate_wet_weather_columns,
     accumulate_wet_weather_loading,
+    accumulate_wet_weather_subtree_columns,
     check_node_results_close,
     compute_wet_weather_load_reduction,
     compute_wet_weather_volume_discharge,
+    compute_wet_weather_volume_discharge_columns,
 )
-from nereid.src.wq_parameters import init_wq_parameters
 
 
 def initialize_graph(
@@ -41,17 +57,191 @@ def initialize_graph(
     treatment_pre_validated: bool,
     context: dict[str, Any],
 ) -> tuple[nx.DiGraph, list[str]]:
-    errors: list[str] = []
-
     g = graph_factory(watershed["graph"])
+    errors = network_validation_errors(g)
+
+    data, node_errors = initialize_node_data(
+        watershed, treatment_pre_validated, context
+    )
+    errors.extend(node_errors)
+
+    nx.set_node_attributes(g, data)
+
+    return nx.DiGraph(g), errors
+
+
+def initialize_watershed(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> tuple[SolvePlan, dict[Hashable, dict[str, Any]], list[str]]:
+    """Graph-free equivalent of `initialize_graph`.
+
+    The topology comes from the `SolvePlan` cache, so repeated solves of the same
+    network skip building and validating the graph.
+
+    Returns
+    -------
+    plan : SolvePlan
+    node_data : dict
+        the data of each node in the plan, in the order of `plan.graph_nodes`.
+        These are the same dicts that `initialize_graph` would attach to the graph.
+    errors : list of str
+
+    """
+    graph = watershed["graph"]
+    plan = get_solve_plan(graph)
+    errors = list(plan.errors)
+
+    tables, node_errors = initialize_node_tables(
+        watershed, treatment_pre_validated, context
+    )
+    errors.extend(node_errors)
+
+    return plan, build_node_data(plan, graph, tables), errors
+
+
+def build_node_data(
+    plan: SolvePlan,
+    graph: dict[str, Any],
+    tables: dict[str, dict[Hashable, dict[str, Any]]],
+    nodes: Iterable[Hashable] | None = None,
+) -> dict[Hashable, dict[str, Any]]:
+    """The data of each node from its graph metadata and the input tables, in the
+    order of `plan.graph_nodes`. If `nodes` is given, only their data is built.
+    """
+    subset = None if nodes is None else set(nodes)
+    data = merge_node_tables(tables, subset)
+
+    node_data: dict[Hashable, dict[str, Any]] = {
+        n: {} for n in plan.graph_nodes if subset is None or n in subset
+    }
+    for n in graph.get("nodes") or []:
+        if n.get("id") in node_data:
+            node_data[n.get("id")].update(n.get("metadata", {}))
+    for n, dct in node_data.items():
+        dct.update(data.get(n, {}))
+
+    return node_data
+
+
+def dirty_subgraph_request(
+    watershed: dict[str, Any],
+    dirty_nodes: list[Hashable],
+) -> tuple[dict[str, Any] | None, set[Hashable], list[str]]:
+    """Reduce a watershed request to the subgraph that must be re-solved when
+    `dirty_nodes` change.
+
+    The subgraph holds the dirty nodes, everything downstream of them, and the
+    immediate parents of those nodes. The parents are not re-solved; they are
+    leaves of the subgraph and pass downstream their values from the
+    `previous_results` of the request, like the subgraphs of a solution sequence.
+    Only the land surfaces, treatment facilities and treatment sites of the
+    subgraph nodes are kept, so their loading is not recomputed for the rest of
+    the network.
+
+    Returns
+    -------
+    request : dict or None
+        the subgraph request, or None if the full request must be solved instead
+    changed : set
+        the nodes whose results are re-solved
+    warnings : list of str
+        why the full request must be solved, if it must.
+
+    """
+    plan = get_solve_plan(watershed["graph"])
+
+    if not plan.is_valid or plan.cycle_error is not None:
+        msg = "WARNING: 'dirty_nodes' are ignored because the graph is not valid."
+        return None, set(plan.graph_nodes), [msg]
+
+    rows = {plan.index[n] for n in dirty_nodes if n in plan.index}
+    changed = {plan.nodes[i] for i in rows | plan.descendants(rows)}
+    subset = plan.subset(dirty_nodes)
+
+    previous_results = {
+        dct["node_id"]: dct
+        for dct in watershed.get("previous_results") or []
+        if dct.get("node_id") in subset and dct.get("node_id") not in changed
+    }
+    missing = sorted(
+        str(n)
+        for n in subset - changed
+        if not plan.is_leaf[plan.index[n]] and n not in previous_results
+    )
+    if missing:
+        msg = (
+            "WARNING: 'dirty_nodes' are ignored because 'previous_results' are "
+            f"missing for these upstream nodes: {missing}"
+        )
+        return None, set(plan.graph_nodes), [msg]
+
+    metadata = {
+        n.get("id"): n.get("metadata", {})
+        for n in watershed["graph"].get("nodes") or []
+    }
+    edges = [
+        {"source": plan.nodes[p], "target": plan.nodes[i]}
+        for i in sorted(plan.index[n] for n in subset)
+        for p in plan.predecessors[i].tolist()
+        if plan.nodes[p] in subset
+    ]
+    nodes = [
+        {"id": n, "metadata": metadata.get(n, {})}
+        for n in plan.graph_nodes
+        if n in subset
+    ]
+
+    request = {
+        k: v
+        for k, v in watershed.items()
+        if k not in ["graph", "dirty_nodes", "previous_results"]
+    }
+    for key in ["land_surfaces", "treatment_facilities", "treatment_sites"]:
+        if watershed.get(key) is not None:
+            request[key] = [
+                dct for dct in watershed[key] if dct.get("node_id") in subset
+            ]
+
+    request["graph"] = {
+        "directed": True,
+        "multigraph": False,
+        "edges": edges,
+        "nodes": nodes,
+    }
+    request["previous_results"] = list(previous_results.values())
+
+    return request, changed, []
+
+
+def initialize_node_data(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> tuple[dict[Hashable, dict[str, Any]], list[str]]:
+    tables, errors = initialize_node_tables(watershed, treatment_pre_validated, context)
+    return merge_node_tables(tables), errors
+
+
+# the order in which the input tables update the data of each node.
+NODE_TABLES = [
+    "previous_results",
+    "land_surfaces",
+    "treatment_facilities",
+    "treatment_sites",
+]
 
-    if not is_valid(g):
-        err_msg = "NetworkValidationError: "
-        _keys = ["node_cycles", "edge_cycles", "multiple_out_edges", "duplicate_edges"]
-        for key, value in zip(_keys, validate_network(g), strict=True):
-            if len(value) > 0:
-                err_msg += ", " + ": ".join([key, str(value)])
-        errors.append(err_msg)
+
+def initialize_node_tables(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> tuple[dict[str, dict[Hashable, dict[str, Any]]], list[str]]:
+    """Load each input table of the watershed into a mapping of node id to the
+    node data from that table. See `merge_node_tables` to combine them.
+    """
+    errors: list[str] = []
 
     land_surface = land_surface_loading(watershed, details=False, context=context)
     errors.extend(land_surface["errors"])
@@ -72,62 +262,232 @@ def initialize_graph(
         for dct in previous_results_submitted
     ]
 
-    data: dict[str, Any] = {}
-    for dictlist in [
+    dictlists = [
         previous_results,
         land_surface.get("summary") or [],
         treatment_facilities.get("treatment_facilities") or [],
         treatment_sites.get("treatment_sites") or [],
-    ]:
-        node_data = dictlist_to_dict(dictlist, "node_id")
-        for n, _data in node_data.items():
+    ]
+    tables = {
+        name: dictlist_to_dict(dictlist, "node_id")
+        for name, dictlist in zip(NODE_TABLES, dictlists, strict=True)
+    }
+
+    return tables, errors
+
+
+def merge_node_tables(
+    tables: dict[str, dict[Hashable, dict[str, Any]]],
+    nodes: Iterable[Hashable] | None = None,
+) -> dict[Hashable, dict[str, Any]]:
+    """Combine the input tables into the data of each node. If `nodes` is given,
+    only the data of those nodes is built.
+    """
+    data: dict[Hashable, dict[str, Any]] = {}
+    for name in NODE_TABLES:
+        table = tables[name]
+        keys = table if nodes is None else (n for n in nodes if n in table)
+        for n in keys:
             if n not in data:
                 data[n] = {}
-            data[n].update(_data)
+            data[n].update(table[n])
 
-    nx.set_node_attributes(g, data)
+    return data
 
-    return nx.DiGraph(g), errors
+
+SOLVER_MODES = ["subtree", "generation", "node"]
 
 
 def solve_watershed_loading(
     g: nx.DiGraph,
     context: dict[str, Any],
+    mode: str = "generation",
+    engine: WatershedEngine | None = None,
+    plan: SolvePlan | None = None,
+    verify: str | None = None,
+    profile: NodeProfile | None = None,
 ) -> None:
-    wet_weather_parameters = init_wq_parameters(
-        "land_surface_emc_table", context=context
-    )
-    dry_weather_parameters = init_wq_parameters(
-        "dry_weather_land_surface_emc_table", context=context
-    )
+    """Solve the graph and store the results in-place in the graph data structure.
 
-    wet_weather_facility_performance_map = effluent_function_map(
-        "tmnt_performance_table", context=context
-    )
-    dry_weather_facility_performance_map = effluent_function_map(
-        "dry_weather_tmnt_performance_table", context=context
+    See `solve_watershed_state` for a description of the solver modes.
+
+    If a `profile` is given, the solve time of each node is recorded in it, e.g.,
+    to find the node types and the nodes that make a watershed slow to solve::
+
+        profile = NodeProfile()
+        solve_watershed_loading(g, context, profile=profile)
+        profile.histogram(), profile.slowest(10)
+
+    """
+
+    state = solve_watershed_state(
+        g, context, mode=mode, engine=engine, plan=plan, verify=verify, profile=profile
     )
+    state.update_node_data()
+
+    return
 
-    nomograph_map = load_nomograph_mapping(context=context)
 
-    nereid_version = context.get("version", "error: no version info")
-    cfg_version = context.get("config_date", "error: no config version info")
+def solve_watershed_state(
+    g: nx.DiGraph,
+    context: dict[str, Any],
+    mode: str = "generation",
+    engine: WatershedEngine | None = None,
+    plan: SolvePlan | None = None,
+    verify: str | None = None,
+    profile: NodeProfile | None = None,
+) -> NodeState:
+    """Solve the graph into a columnar `NodeState`.
 
-    for node in nx.topological_sort(g):
-        g.nodes[node]["_version"] = nereid_version
-        g.nodes[node]["_config_version"] = cfg_version
+    The node dicts of `g` are not modified. Call `NodeState.update_node_data` to
+    write the results back to the graph.
 
-        solve_node(
-            g,
-            node,
-            wet_weather_parameters=wet_weather_parameters,
-            wet_weather_facility_performance_map=wet_weather_facility_performance_map,
-            nomograph_map=nomograph_map,
-            dry_weather_parameters=dry_weather_parameters,
-            dry_weather_facility_performance_map=dry_weather_facility_performance_map,
+    Parameters
+    ----------
+    g : nx.DiGraph
+        directed and acyclic graph data structure with nodes
+        representing facilities or tributary areas
+    context : dict
+        request context
+    mode : {"subtree", "generation", "node"}
+        "generation" solves all nodes of a topological generation at once, since they
+        do not depend on each other. "node" solves one node at a time. Both modes
+        give results identical to `solve_node`.
+        "subtree" first solves every node with no treatment upstream of it in closed
+        form, see `treatment_free_nodes`, and then solves the rest by generation.
+        This does not depend on the depth of the network, but its sums are not
+        associated like the other modes, so its results differ from them by floating
+        point error. This also means that solving a subgraph with previous results
+        is not bit-for-bit reproducible in this mode.
+    engine : WatershedEngine, optional
+        the parameters, performance functions and nomographs of the context. By
+        default this is fetched from the per-process cache, see
+        `nereid.src.watershed.engine.get_watershed_engine`.
+    plan : SolvePlan, optional
+        the topology of `g`, e.g., from `nereid.src.watershed.solve_plan.get_solve_plan`.
+        By default this is derived from `g`.
+    verify : {"off", "sample", "full"}, optional
+        the mass balance checks of the solved nodes, see
+        `nereid.src.watershed.verification.verify_state`.
+    profile : NodeProfile, optional
+        records the solve time of each node, see
+        `nereid.src.watershed.profiling.NodeProfile`.
+
+    """
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"mode must be one of {SOLVER_MODES}, got '{mode}'.")
+
+    if engine is None:
+        engine = get_watershed_engine(context)
+
+    state = NodeState.from_graph(g, engine.fields, plan=plan)
+    solve_state(state, engine, mode=mode, verify=verify, profile=profile)
+
+    return state
+
+
+def solve_state(
+    state: NodeState,
+    engine: WatershedEngine,
+    mode: str = "generation",
+    rows: numpy.ndarray | None = None,
+    verify: str | None = None,
+    profile: NodeProfile | None = None,
+) -> None:
+    """Solve a `NodeState` in place. See `solve_watershed_state` for the modes.
+
+    If `rows` is given, only those nodes are solved and the others keep their
+    values, e.g., the rows reset by `NodeState.branch`. The "subtree" mode solves
+    these like the "generation" mode.
+
+    The mass balance of the solved nodes is checked once they are all solved, see
+    `nereid.src.watershed.verification.verify_state` for the `verify` modes.
+
+    If a `profile` is given, the solve time of each node is recorded in it.
+    """
+
+    check_verify_mode(verify)
+    for _ in iter_solve_state(state, engine, mode, rows, verify="off", profile=profile):
+        pass
+
+    if profile is not None:
+        profile.collect(state)
+
+    verify_state(state, engine, rows=rows, verify=verify)
+
+
+def iter_solve_state(
+    state: NodeState,
+    engine: WatershedEngine,
+    mode: str = "generation",
+    rows: numpy.ndarray | None = None,
+    verify: str | None = None,
+    profile: NodeProfile | None = None,
+) -> Iterator[numpy.ndarray]:
+    """Solve a `NodeState` in place like `solve_state`, and yield the rows of each
+    block of nodes as soon as it is solved. Each row is yielded once, and always
+    after every row upstream of it. Each block is verified before it is yielded.
+    """
+
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"mode must be one of {SOLVER_MODES}, got '{mode}'.")
+    check_verify_mode(verify)
+
+    rng = numpy.random.default_rng()
+
+    def verified(block: numpy.ndarray) -> numpy.ndarray:
+        verify_state(state, engine, rows=block, verify=verify, rng=rng)
+        return block
+
+    state.node_attrs["_version"] = engine.version
+    state.node_attrs["_config_version"] = engine.config_version
+
+    kwargs: dict[str, Any] = engine.solver_kwargs
+    count("nodes", len(state) if rows is None else len(rows))
+    if profile is not None:
+        profile.start(state)
+
+    if mode == "node":
+        for i in range(len(state)) if rows is None else rows.tolist():
+            with phase("solve_state"):
+                start = time.perf_counter()
+                solve_node_state(state, i, **kwargs)
+                if profile is not None and not state.is_leaf[i]:
+                    profile.add(i, time.perf_counter() - start)
+            yield verified(numpy.array([i]))
+
+    else:
+        is_treatment = state.plan.strategies(state.data) != LOADING
+        is_solved = state.is_leaf.copy()
+        if rows is not None:
+            is_solved[:] = True
+            is_solved[rows] = state.is_leaf[rows]
+
+        # leaf nodes are read only, so they are solved once the state is loaded.
+        yield (
+            numpy.flatnonzero(state.is_leaf)
+            if rows is None
+            else rows[state.is_leaf[rows]]
         )
 
-    return
+        if mode == "subtree" and state.is_forest and rows is None:
+            with phase("solve_state"):
+                start = time.perf_counter()
+                block, mask = treatment_free_nodes(state, is_treatment)
+                accumulate_wet_weather_subtree_columns(state, block, mask)
+                accumulate_dry_weather_subtree_columns(state, block, mask)
+                if profile is not None:
+                    profile.add(block, time.perf_counter() - start)
+                solve_block_state(state, block, is_treatment, profile, **kwargs)
+            is_solved[block] = True
+            yield verified(block)
+
+        for start, stop in state.generations:
+            block = start + numpy.flatnonzero(~is_solved[start:stop])
+            if len(block):
+                with phase("solve_state"):
+                    solve_block_state(state, block, is_treatment, profile, **kwargs)
+                yield verified(block)
 
 
 def solve_node(
@@ -219,6 +579,216 @@ def solve_node(
     accumulate_wet_weather_loading(g, data, predecessors, wet_weather_parameters)
     accumulate_dry_weather_loading(g, data, predecessors, dry_weather_parameters)
 
+    solve_node_treatment(
+        data,
+        wet_weather_parameters=wet_weather_parameters,
+        wet_weather_facility_performance_map=wet_weather_facility_performance_map,
+        nomograph_map=nomograph_map,
+        dry_weather_parameters=dry_weather_parameters,
+        dry_weather_facility_performance_map=dry_weather_facility_performance_map,
+    )
+
+    check_node_results_close(data)
+
+    return
+
+
+def is_treatment_node_type(node_type: str) -> bool:
+    return node_strategy(node_type) != LOADING
+
+
+def solve_node_state(
+    state: NodeState,
+    i: int,
+    **kwargs: Any,
+) -> None:
+    """Solve a single node of a `NodeState` in place.
+
+    This is the columnar equivalent of `solve_node` and it _must_ be called for each
+    node index in order, since the node state rows are sorted topologically.
+
+    Nodes that perform treatment are solved with the same dict-based strategies as
+    `solve_node`, and their results are written back to the node state columns.
+
+    Parameters
+    ----------
+    state : NodeState
+        columnar store of the watershed solution.
+    i : int
+        the index of the node to be analyzed.
+    **kwargs : see `solve_node`
+
+    """
+
+    # leaf nodes are read only
+    if state.is_leaf[i]:
+        return
+
+    fields = state.fields
+    block = state.values[i : i + 1]
+    upstream = state.upstream(i)[numpy.newaxis, :]
+
+    accumulate_wet_weather_columns(block, upstream, fields)
+    accumulate_dry_weather_columns(block, upstream, fields)
+
+    node_type = str(state.data[i].get("node_type", None) or "virtual")
+
+    if is_treatment_node_type(node_type):
+        solve_node_state_treatment(state, i, **kwargs)
+
+    else:
+        compute_wet_weather_volume_discharge_columns(block, fields)
+
+    return
+
+
+def treatment_free_nodes(
+    state: NodeState,
+    is_treatment: numpy.ndarray,
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Find the nodes with no treatment anywhere upstream of them or in themselves.
+
+    These are the nodes of the maximal treatment-free subtrees that can be solved in
+    closed form. Leaves are read only, so they never count as treatment. A node that
+    retains volume without being a treatment node also breaks the closed form.
+
+    Returns
+    -------
+    rows : numpy.ndarray
+        integer array of the treatment-free nodes.
+    mask : numpy.ndarray
+        boolean array of the treatment-free nodes and the leaves upstream of them.
+
+    """
+    solvable = ~state.is_leaf
+    blocking = solvable & (is_treatment | (state["retained_pct"] != 0))
+
+    n_blocking_upstream = state.subtree_sums(
+        numpy.arange(len(state)), blocking[:, numpy.newaxis].astype(float)
+    )[:, 0]
+    is_free = solvable & ~blocking & (n_blocking_upstream == 0)
+
+    mask = is_free.copy()
+    mask[state.edge_src[is_free[state.edge_dst]]] = True
+
+    return numpy.flatnonzero(is_free), mask
+
+
+def solve_block_state(
+    state: NodeState,
+    rows: numpy.ndarray,
+    is_treatment: numpy.ndarray,
+    profile: NodeProfile | None = None,
+    **kwargs: Any,
+) -> None:
+    """Solve a block of nodes of a `NodeState` in place.
+
+    The predecessors of each node in `rows` must already be solved, or at least
+    the values that they pass downstream must already be accumulated, e.g., by
+    `accumulate_wet_weather_subtree_columns`. The nodes of a topological generation
+    always meet this condition.
+
+    The accumulation of every node in the block is done with one scatter-add of the
+    predecessor rows, followed by a vectorized volume discharge for the nodes that
+    do not perform treatment. The volume capture of the treatment nodes is then
+    solved one at a time, and their pollutant load reductions are computed together,
+    see `nereid.src.watershed.loading.LoadReductions`.
+
+    Parameters
+    ----------
+    state : NodeState
+        columnar store of the watershed solution.
+    rows : numpy.ndarray
+        sorted integer array of the non-leaf nodes to solve.
+    is_treatment : numpy.ndarray
+        boolean array of the nodes that must be solved with their treatment strategy.
+    profile : NodeProfile, optional
+        records the time of the vectorized operations, split equally between the
+        nodes of the block, and the time of each treatment node, including an equal
+        share of their load reductions.
+    **kwargs : see `solve_node`
+
+    """
+
+    start = time.perf_counter()
+    fields = state.fields
+    upstream = state.upstream_block(rows)
+    block = state.values[rows]
+
+    accumulate_wet_weather_columns(block, upstream, fields)
+    accumulate_dry_weather_columns(block, upstream, fields)
+
+    treated = is_treatment[rows]
+    untreated = numpy.flatnonzero(~treated)
+    sub = block[untreated] if treated.any() else block
+
+    compute_wet_weather_volume_discharge_columns(sub, fields)
+
+    if treated.any():
+        block[untreated] = sub
+    state.values[rows] = block
+    if profile is not None:
+        profile.add(rows, time.perf_counter() - start)
+
+    treatment_rows = rows[treated].tolist()
+    load_reductions = LoadReductions()
+    node_data = []
+    for i in treatment_rows:
+        start = time.perf_counter()
+        data = state.node_row(i)
+        solve_node_treatment(data, load_reductions=load_reductions, **kwargs)
+        node_data.append(data)
+        if profile is not None:
+            profile.add(i, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    load_reductions.compute()
+    for i, data in zip(treatment_rows, node_data, strict=True):
+        state.set_row(i, data)
+    if profile is not None and treatment_rows:
+        profile.add(numpy.array(treatment_rows), time.perf_counter() - start)
+
+    return
+
+
+def solve_node_state_treatment(
+    state: NodeState,
+    i: int,
+    **kwargs: Any,
+) -> None:
+    """Solve the treatment of an accumulated node of a `NodeState` with the
+    dict-based strategies, and write the results back to the columns.
+    """
+    data = state.node_row(i)
+    solve_node_treatment(data, **kwargs)
+    state.set_row(i, data)
+
+
+def solve_node_treatment(
+    data: dict[str, Any],
+    *,
+    wet_weather_parameters: list[dict[str, Any]],
+    wet_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    nomograph_map: dict[str, Callable],
+    dry_weather_parameters: list[dict[str, Any]],
+    dry_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
+) -> None:
+    """Apply the treatment strategy of the node type to an accumulated node dict.
+
+    This must be called after the upstream loading has been accumulated for the node.
+
+    Parameters
+    ----------
+    data : dict
+        information about the current node, including the accumulated upstream loading.
+    * : see `solve_node`
+    load_reductions : LoadReductions, optional
+        if given, the pollutant load reductions of the node are deferred to
+        `LoadReductions.compute`, so that the node is only solved after that call.
+
+    """
+
     node_type = str(data.get("node_type", None) or "virtual")
 
     if "site_based" in node_type:
@@ -238,6 +808,7 @@ def solve_node(
             dry_weather_parameters=dry_weather_parameters,
             wet_weather_facility_performance_map=wet_weather_facility_performance_map,
             dry_weather_facility_performance_map=dry_weather_facility_performance_map,
+            load_reductions=load_reductions,
         )
 
     elif "facility" in node_type:
@@ -263,7 +834,10 @@ def solve_node(
 
             compute_wet_weather_volume_discharge(data)
             compute_wet_weather_load_reduction(
-                data, wet_weather_parameters, wet_weather_facility_performance_map
+                data,
+                wet_weather_parameters,
+                wet_weather_facility_performance_map,
+                load_reductions,
             )
 
         else:
@@ -283,6 +857,7 @@ def solve_node(
                 data,
                 dry_weather_parameters,  # type: ignore
                 dry_weather_facility_performance_map,  # type: ignore
+                load_reductions,
             )
 
     else:
@@ -290,6 +865,4 @@ def solve_node(
         # pass-along values and continue.
         compute_wet_weather_volume_discharge(data)
 
-    check_node_results_close(data)
-
     return
@@ -1,20 +1,52 @@
 import logging
-from typing import Any
+from typing import Any, Hashable, Iterator
 
-from nereid.core.units import update_reg_from_context
+import numpy
+
+from nereid.core.session_store import get_session_store
+from nereid.core.timings import phase, timed_task
+from nereid.core.utils import dictlist_to_dict, project_dicts
+from nereid.models.treatment_facility_models import (
+    validate_treatment_facility_models,
+)
+from nereid.src.treatment_facility.tasks import initialize_treatment_facilities
+from nereid.src.watershed.engine import WatershedEngine, get_watershed_engine
+from nereid.src.watershed.node_state import NodeState
+from nereid.src.watershed.session import (
+    apply_watershed_delta,
+    merge_previous_results,
+    session_watershed,
+)
+from nereid.src.watershed.sizing import (
+    achieved_pct,
+    sized_facility,
+    sizing_problem,
+    solve_sizing_problems,
+)
+from nereid.src.watershed.solve_plan import SolvePlan, get_solve_plan
 from nereid.src.watershed.solve_watershed import (
-    initialize_graph,
-    solve_watershed_loading,
+    build_node_data,
+    dirty_subgraph_request,
+    initialize_node_tables,
+    initialize_watershed,
+    iter_solve_state,
+    solve_state,
 )
-from nereid.src.watershed.utils import attrs_to_resubmit
+from nereid.src.watershed.utils import attrs_to_resubmit, minimum_attrs
 
 logger = logging.getLogger(__name__)
 
+# solves of a session update that may be discarded due to concurrent updates.
+SESSION_UPDATE_ATTEMPTS = 3
+
 
+@timed_task
 def solve_watershed(
     watershed: dict[str, Any],
     treatment_pre_validated: bool,
     context: dict[str, Any],
+    projection: dict[str, Any] | None = None,
+    verify: str | None = None,
 ) -> dict[str, Any]:
     """Main program function. This function builds the network and solves for water quality
     at each node in the input graph.
@@ -28,34 +60,552 @@ def solve_watershed(
                 other/nothing/null. See src.network.
             2. land_surfaces :  which load the graph with
 
+        If the watershed has a `dirty_nodes` list and the `previous_results` of a full
+        solve, only the dirty nodes and the nodes downstream of them are re-solved and
+        returned. See `nereid.src.watershed.solve_watershed.dirty_subgraph_request`.
+
+    projection : dict, optional
+        the `fields` and `include_patterns` of the result keys to return, see
+        `nereid.core.utils.project_dicts`. If `include_resubmit` is true, the
+        `previous_results_keys` are returned too, so that the results can be
+        resubmitted as `previous_results`. The `previous_results_keys` always
+        list the keys of the full results.
+    verify : {"off", "sample", "full"}, optional
+        the mass balance checks of the solved nodes. Nodes that do not balance get
+        an error in their `node_errors`, see
+        `nereid.src.watershed.verification.verify_state`.
+    timings : bool, optional (default=False)
+        whether to add the `timings` of each phase to the response, see
+        `nereid.core.timings.timed_task`.
+
+    """
+
+    with phase("initialize"):
+        engine, plan, node_data, changed, msgs = _initialize_solve(
+            watershed, treatment_pre_validated, context
+        )
+
+    response: dict[str, Any] = {}
+    response["errors"] = [e for e in msgs if "error" in e.lower()]
+    response["warnings"] = [w for w in msgs if "warning" in w.lower()]
+
+    try:  # pragma: no branch
+        state = NodeState(engine.fields, plan, [node_data[n] for n in plan.nodes])
+        solve_state(state, engine, verify=verify)
+
+        with phase("results"):
+            state.update_node_data()
+
+            all_results: list[Any] = [
+                dct for n, dct in node_data.items() if changed is None or n in changed
+            ]
+            results = [dct for dct in all_results if not dct["_is_leaf"]]
+            leafs = [dct for dct in all_results if dct["_is_leaf"]]
+            previous_results_keys = attrs_to_resubmit(all_results)
+
+            keep = _projection_keep(projection, previous_results_keys)
+            response["results"] = project_dicts(results, projection, keep)
+            response["leaf_results"] = project_dicts(leafs, projection, keep)
+            response["previous_results_keys"] = previous_results_keys
+
+    except Exception as e:  # pragma: no cover
+        logger.exception(e)
+        response["errors"].append(str(e))
+
+    return response
+
+
+def _projection_keep(
+    projection: dict[str, Any] | None, previous_results_keys: list[str]
+) -> list[str]:
+    if projection is not None and projection.get("include_resubmit"):
+        return previous_results_keys
+    return []
+
+
+def _initialize_solve(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> tuple[
+    WatershedEngine,
+    SolvePlan,
+    dict[Hashable, dict[str, Any]],
+    set[Hashable] | None,
+    list[str],
+]:
+    """The engine, plan and node data of a watershed request, plus the nodes whose
+    results are returned if it has `dirty_nodes`, or None to return every node.
     """
 
-    update_reg_from_context(context)
+    # this also applies the context's unit definitions the first time it is seen.
+    engine = get_watershed_engine(context)
+
+    msgs: list[str] = []
 
-    response = {}
+    changed = None
+    dirty_nodes = watershed.get("dirty_nodes")
+    if dirty_nodes is not None:
+        request, changed, msgs = dirty_subgraph_request(watershed, dirty_nodes)
+        watershed = request or watershed
 
-    g, msgs = initialize_graph(
+    plan, node_data, init_msgs = initialize_watershed(
         watershed,
         treatment_pre_validated,
         context,
     )
+    msgs.extend(init_msgs)
+
+    return engine, plan, node_data, changed, msgs
+
+
+@timed_task
+def solve_watershed_stream(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+    projection: dict[str, Any] | None = None,
+    verify: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Solve a watershed like `solve_watershed`, but yield the result of each node
+    as soon as it is solved, in topological order. Each result is projected and
+    verified like in `solve_watershed`.
+
+    The last item is a `{"trailer": {...}}` dict with the `errors`, `warnings` and
+    `previous_results_keys` of the response. Solved nodes are released once they
+    are yielded, so the results of the whole graph are never held at once.
+    """
+
+    with phase("initialize"):
+        engine, plan, node_data, changed, msgs = _initialize_solve(
+            watershed, treatment_pre_validated, context
+        )
+    data = [node_data[n] for n in plan.nodes]
+    del node_data
+
+    keys: set[str] = set()
+    try:  # pragma: no branch
+        state = NodeState(engine.fields, plan, data)
+        del data
+
+        for rows in iter_solve_state(state, engine, verify=verify):
+            state.update_node_data(rows)
+            for i in rows.tolist():
+                # downstream nodes only read the columns of their upstream nodes.
+                dct, state.data[i] = state.data[i], {}
+                state.rows.pop(i, None)
+
+                if changed is None or state.nodes[i] in changed:
+                    keys.update(dct)
+                    keep = _projection_keep(projection, minimum_attrs(dct))
+                    yield project_dicts([dct], projection, keep)[0]
+
+    except Exception as e:  # pragma: no cover
+        logger.exception(e)
+        msgs.append(str(e))
+
+    yield {
+        "trailer": {
+            "errors": [e for e in msgs if "error" in e.lower()],
+            "warnings": [w for w in msgs if "warning" in w.lower()],
+            "previous_results_keys": minimum_attrs(keys),
+        }
+    }
+
+
+def iter_watershed_response(response: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Yield the items of a finished `solve_watershed` response in the same format
+    as `solve_watershed_stream`.
+    """
+    yield from response.get("results") or []
+    yield from response.get("leaf_results") or []
+    trailer: dict[str, Any] = {
+        k: response.get(k) or []
+        for k in ["errors", "warnings", "previous_results_keys"]
+    }
+    if "timings" in response:
+        trailer["timings"] = response["timings"]
+    yield {"trailer": trailer}
+
+
+@timed_task
+def create_watershed_session(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> dict[str, Any]:
+    """Solve a watershed and keep it in the session store so that later requests
+    only need to send their changes, see `update_watershed_session`.
+    """
+
+    response = solve_watershed(watershed, treatment_pre_validated, context)
+    results = response.get("results", []) + response.get("leaf_results", [])
+
+    # the stored facilities are always validated, so later solves can skip it.
+    stored = session_watershed(watershed)
+    if not treatment_pre_validated:
+        stored["treatment_facilities"] = validate_treatment_facility_models(
+            stored["treatment_facilities"], context
+        )
+
+    session = {
+        "state": context.get("state"),
+        "region": context.get("region"),
+        "watershed": stored,
+        "previous_results": merge_previous_results([], results),
+    }
+
+    response["session_id"] = get_session_store().create(session)
+
+    return response
+
+
+@timed_task
+def update_watershed_session(
+    session_id: str,
+    delta: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> dict[str, Any]:
+    """Apply the changes of a `WatershedDelta` to a session and re-solve the nodes
+    that they affect. The response only holds the results of those nodes.
+
+    Concurrent updates of a session do not lose each other's changes: the session
+    is only stored if no other update stored it since it was read, otherwise the
+    delta is solved again on the new version, up to `SESSION_UPDATE_ATTEMPTS` times.
+    """
+
+    store = get_session_store()
+    validated = treatment_pre_validated
+
+    for _ in range(SESSION_UPDATE_ATTEMPTS):
+        found = store.get_versioned(session_id)
+
+        if found is None:
+            msg = f"ERROR: session '{session_id}' does not exist or has expired."
+            return {"errors": [msg], "warnings": [], "session_id": None}
+
+        session, version = found
+        if (session["state"], session["region"]) != (
+            context.get("state"),
+            context.get("region"),
+        ):
+            msg = (
+                f"ERROR: session '{session_id}' belongs to state "
+                f"'{session['state']}' and region '{session['region']}'."
+            )
+            return {"errors": [msg], "warnings": [], "session_id": session_id}
+
+        if not validated and delta.get("treatment_facilities"):
+            delta = {
+                **delta,
+                "treatment_facilities": validate_treatment_facility_models(
+                    delta["treatment_facilities"], context
+                ),
+            }
+        validated = True
+
+        watershed, dirty_nodes = apply_watershed_delta(session["watershed"], delta)
+        request = {
+            **watershed,
+            "previous_results": session["previous_results"],
+            "dirty_nodes": dirty_nodes,
+        }
+
+        response = solve_watershed(request, True, context)
+        results = response.get("results", []) + response.get("leaf_results", [])
+
+        session["watershed"] = watershed
+        session["previous_results"] = merge_previous_results(
+            session["previous_results"], results
+        )
+        if store.put(session_id, session, version=version):
+            response["session_id"] = session_id
+            return response
+
+        logger.info("session '%s' changed during an update, retrying.", session_id)
+
+    msg = (
+        f"ERROR: session '{session_id}' was changed by other updates "
+        f"{SESSION_UPDATE_ATTEMPTS} times during this one, please retry."
+    )
+    return {"errors": [msg], "warnings": [], "session_id": session_id}
+
+
+@timed_task
+def solve_watershed_scenarios(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> dict[str, Any]:
+    """Solve a base watershed and each of its `scenarios`.
+
+    Each scenario replaces the treatment facilities of some nodes. The land surface
+    loading, the network and the base solution are computed once; each scenario only
+    re-solves the nodes with a replaced facility and the nodes downstream of them.
+
+    Returns
+    -------
+    dict
+        the response of `solve_watershed` for the base watershed, plus a
+        `scenarios` list with the `scenario_id`, `results`, `leaf_results`,
+        `errors` and `warnings` of each scenario. The results of a scenario only
+        hold the nodes it re-solved; the others are the same as the base results.
+
+    """
+
+    engine = get_watershed_engine(context)
+    scenarios = watershed.get("scenarios") or []
+
+    response: dict[str, Any] = {}
+
+    graph = watershed["graph"]
+    plan = get_solve_plan(graph)
+    msgs = list(plan.errors)
+
+    tables, table_msgs = initialize_node_tables(
+        watershed, treatment_pre_validated, context
+    )
+    msgs.extend(table_msgs)
     response["errors"] = [e for e in msgs if "error" in e.lower()]
     response["warnings"] = [w for w in msgs if "warning" in w.lower()]
 
     try:  # pragma: no branch
-        solve_watershed_loading(g, context=context)
+        node_data = build_node_data(plan, graph, tables)
+        state = NodeState(engine.fields, plan, [node_data[n] for n in plan.nodes])
+        solve_state(state, engine)
+
+        # branches share the solved rows of the base state, so they must be solved
+        # before the base results are written to the node data.
+        response["scenarios"] = [
+            _solve_scenario(
+                state, engine, graph, tables, scenario, treatment_pre_validated, context
+            )
+            for scenario in scenarios
+        ]
 
-        all_results: list[Any] = [dct for n, dct in g.nodes(data=True)]
-        results = [dct for dct in all_results if not dct["_is_leaf"]]
-        leafs = [dct for dct in all_results if dct["_is_leaf"]]
-        previous_results_keys = attrs_to_resubmit(all_results)
+        state.update_node_data()
 
-        response["results"] = results
-        response["leaf_results"] = leafs
-        response["previous_results_keys"] = previous_results_keys
+        all_results: list[Any] = list(node_data.values())
+        response["results"] = [dct for dct in all_results if not dct["_is_leaf"]]
+        response["leaf_results"] = [dct for dct in all_results if dct["_is_leaf"]]
+        response["previous_results_keys"] = attrs_to_resubmit(all_results)
 
     except Exception as e:  # pragma: no cover
         logger.exception(e)
         response["errors"].append(str(e))
 
     return response
+
+
+def _solve_scenario(
+    state: NodeState,
+    engine: WatershedEngine,
+    graph: dict[str, Any],
+    tables: dict[str, Any],
+    scenario: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> dict[str, Any]:
+    plan = state.plan
+    response: dict[str, Any] = {"scenario_id": scenario.get("scenario_id")}
+
+    facilities = initialize_treatment_facilities(
+        scenario, pre_validated=treatment_pre_validated, context=context
+    )
+    msgs: list[str] = list(facilities["errors"])
+    overrides = dictlist_to_dict(
+        facilities.get("treatment_facilities") or [], "node_id"
+    )
+
+    unknown = sorted(str(n) for n in overrides if n not in plan.index)
+    if unknown:
+        msgs.append(
+            f"WARNING: treatment facilities of scenario {response['scenario_id']!r} "
+            f"are ignored for these nodes which are not in the graph: {unknown}"
+        )
+
+    dirty = [plan.index[n] for n in overrides if n in plan.index]
+
+    scenario_tables = {
+        **tables,
+        "treatment_facilities": {**tables["treatment_facilities"], **overrides},
+    }
+    data = build_node_data(plan, graph, scenario_tables, [plan.nodes[i] for i in dirty])
+
+    _, results = _solve_branch(state, engine, {i: data[plan.nodes[i]] for i in dirty})
+    response["results"] = [dct for dct in results if not dct["_is_leaf"]]
+    response["leaf_results"] = [dct for dct in results if dct["_is_leaf"]]
+    response["errors"] = [e for e in msgs if "error" in e.lower()]
+    response["warnings"] = [w for w in msgs if "warning" in w.lower()]
+
+    return response
+
+
+def _solve_branch(
+    state: NodeState,
+    engine: WatershedEngine,
+    data: dict[int, dict[str, Any]],
+) -> tuple[NodeState, list[dict[str, Any]]]:
+    """Re-solve a solved state with new input `data` for some of its nodes.
+
+    Returns the solved branch and the results of the nodes it re-solved, which are
+    the changed nodes and every node downstream of them.
+    """
+    plan = state.plan
+    rows = numpy.array(sorted(set(data) | plan.descendants(data)), dtype=int)
+
+    branch = state.branch(rows, data)
+    solve_state(branch, engine, rows=rows)
+    branch.update_node_data(rows)
+
+    return branch, [branch.data[i] for i in rows.tolist()]
+
+
+@timed_task
+def size_watershed_facilities(
+    watershed: dict[str, Any],
+    treatment_pre_validated: bool,
+    context: dict[str, Any],
+) -> dict[str, Any]:
+    """Size treatment facilities to meet capture or load removal targets.
+
+    The watershed is solved once. The size that meets each of the `sizing_targets`
+    is found from the inflow of its facility with batched inverse nomograph lookups,
+    see `nereid.src.watershed.sizing`, and only the nodes downstream of the sized
+    facilities are re-solved. Targets downstream of other targets are sized after
+    them, with the inflow from the sized facilities.
+
+    Returns
+    -------
+    dict
+        the `sizing` of each target, and the `results` and `leaf_results` of the
+        nodes that the sized facilities changed.
+
+    """
+
+    engine = get_watershed_engine(context)
+    targets = watershed.get("sizing_targets") or []
+
+    response: dict[str, Any] = {}
+
+    graph = watershed["graph"]
+    plan = get_solve_plan(graph)
+    msgs = list(plan.errors)
+
+    tables, table_msgs = initialize_node_tables(
+        watershed, treatment_pre_validated, context
+    )
+    msgs.extend(table_msgs)
+    facilities = dictlist_to_dict(
+        watershed.get("treatment_facilities") or [], "node_id"
+    )
+
+    try:  # pragma: no branch
+        node_data = build_node_data(plan, graph, tables)
+        state = NodeState(engine.fields, plan, [node_data[n] for n in plan.nodes])
+        solve_state(state, engine)
+
+        sizing: list[dict[str, Any]] = []
+        pending: dict[int, dict[str, Any]] = {}
+        for target in targets:
+            sizing.append({**target, "errors": []})
+            i = plan.index.get(target["node_id"])
+            if i is None:
+                msg = f"ERROR: node '{target['node_id']}' is not in the graph."
+                sizing[-1]["errors"].append(msg)
+            elif i in pending:
+                msg = f"ERROR: node '{target['node_id']}' has several targets."
+                sizing[-1]["errors"].append(msg)
+            else:
+                pending[i] = sizing[-1]
+
+        # a sized facility changes the inflow of the facilities downstream of it, so
+        # each wave only sizes the targets without pending targets upstream of them.
+        current, solved = state, set()
+        while pending:
+            downstream = plan.descendants(pending)
+            wave = {i: pending.pop(i) for i in list(pending) if i not in downstream}
+
+            for i, target in wave.items():
+                if i not in current.rows:
+                    msg = f"ERROR: node '{target['node_id']}' is not a facility."
+                    target["errors"].append(msg)
+                    continue
+                target.update(
+                    sizing_problem(
+                        current.rows[i],
+                        target,
+                        engine.wet_weather_parameters,
+                        engine.nomograph_map,
+                    )
+                )
+            solve_sizing_problems(list(wave.values()), engine.nomograph_map)
+
+            # sized facilities are constructed again, like the ones of the request.
+            sized = {i: p for i, p in wave.items() if not p["errors"]}
+            constructed = initialize_treatment_facilities(
+                {
+                    "treatment_facilities": [
+                        sized_facility(
+                            facilities[plan.nodes[i]],
+                            state.data[i],
+                            p["size_field"],
+                            p["size"],
+                        )
+                        for i, p in sized.items()
+                    ]
+                },
+                pre_validated=treatment_pre_validated,
+                context=context,
+            )
+            msgs.extend(constructed["errors"])
+            data = {
+                i: {**state.data[i], **dct}
+                for i, dct in zip(
+                    sized, constructed.get("treatment_facilities") or [], strict=True
+                )
+            }
+            rows = numpy.array(sorted(set(data) | plan.descendants(data)), dtype=int)
+            current = current.branch(rows, data)
+            solve_state(current, engine, rows=rows)
+            solved.update(rows.tolist())
+
+        changed = numpy.array(sorted(solved), dtype=int)
+        current.update_node_data(changed)
+        for target in sizing:
+            i = plan.index.get(target["node_id"])
+            if not target["errors"] and i is not None:
+                target["achieved_pct"] = achieved_pct(
+                    current.data[i], target, engine.wet_weather_parameters
+                )
+
+        results = [current.data[i] for i in changed.tolist()]
+        response["sizing"] = [
+            {
+                k: dct.get(k)
+                for k in [
+                    "node_id",
+                    "target",
+                    "value",
+                    "pollutant",
+                    "size_field",
+                    "size",
+                    "converged",
+                    "achieved_pct",
+                    "errors",
+                ]
+            }
+            for dct in sizing
+        ]
+        response["results"] = [dct for dct in results if not dct["_is_leaf"]]
+        response["leaf_results"] = [dct for dct in results if dct["_is_leaf"]]
+
+    except Exception as e:  # pragma: no cover
+        logger.exception(e)
+        msgs.append(str(e))
+
+    response["errors"] = [e for e in msgs if "error" in e.lower()]
+    response["warnings"] = [w for w in msgs if "warning" in w.lower()]
+
+    return response
@@ -1,8 +1,16 @@
-from itertools import product
 from typing import Any, Callable
 
-from nereid.core.utils import safe_divide
-from nereid.src.watershed.loading import compute_pollutant_load_reduction
+import numpy
+
+from nereid.core.utils import safe_array_divide, safe_divide
+from nereid.src.watershed.loading import (
+    DRY_WEATHER_VOLUMES,
+    WET_WEATHER_VOLUMES,
+    LoadReductions,
+    PollutantKeys,
+    compute_pollutant_load_reductions,
+    pollutant_keys,
+)
 from nereid.src.watershed.simple_facility_capture import (
     compute_simple_facility_volume_capture,
 )
@@ -15,6 +23,7 @@ def solve_treatment_site(
     dry_weather_parameters: list[dict[str, Any]],
     wet_weather_facility_performance_map: dict[tuple[str, str], Callable],
     dry_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
 ) -> dict[str, Any]:
     """This function computes the volume reduction/capture performance and the
     load reduction for each individual facility of a treatment site. Treatment sites
@@ -47,17 +56,24 @@ def solve_treatment_site(
         Reference: `nereid.src.tmnt_performance.tmnt.effluent_conc`
         Reference: `nereid.src.tmnt_performance.tasks.effluent_function_map`
 
+    load_reductions : LoadReductions, optional
+        Reference: `nereid.src.watershed.loading.compute_pollutant_load_reduction`
+
     """
 
     compute_site_volume_capture(data)
     compute_site_wet_weather_load_reduction(
-        data, wet_weather_parameters, wet_weather_facility_performance_map
+        data,
+        wet_weather_parameters,
+        wet_weather_facility_performance_map,
+        load_reductions,
     )
     if all(map(len, [dry_weather_parameters, dry_weather_facility_performance_map])):
         compute_site_dry_weather_load_reduction(
             data,
             dry_weather_parameters,  # type: ignore
             dry_weather_facility_performance_map,  # type: ignore
+            load_reductions,
         )
 
     return data
@@ -122,173 +138,112 @@ def compute_site_wet_weather_load_reduction(
     data: dict[str, Any],
     wet_weather_parameters: list[dict[str, Any]],
     wet_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
 ) -> dict[str, Any]:
-    facilities = data.get("treatment_facilities", [])
-    vol_col = "runoff_volume_cuft"
-
-    for facility_data in facilities:
-        tmnt_facility_type = facility_data.get(
-            "tmnt_performance_facility_type", r"¯\_(ツ)_/¯"
-        )
-
-        for param in wet_weather_parameters:
-            conc_unit = param["concentration_unit"]
-            poc_long = param["long_name"]
-
-            load_col = param["load_col"]
-            conc_col = param["conc_col"]
-
-            load_to_conc_factor = param["load_to_conc_factor"]
-            conc_to_load_factor = param["conc_to_load_factor"]
-
-            conc_to_load_factor = param["conc_to_load_factor"]
-
-            influent_conc = facility_data[f"{conc_col}_influent"] = data[
-                f"{conc_col}_influent"
-            ]
-            inflow_load = facility_data[f"{load_col}_inflow"] = (
-                facility_data[f"{vol_col}_inflow"] * influent_conc * conc_to_load_factor
-            )
-
-            compute_pollutant_load_reduction(
-                facility_data,
-                wet_weather_facility_performance_map,
-                tmnt_facility_type,
-                conc_unit,
-                poc_long,
-                load_col,
-                conc_col,
-                vol_col,
-                load_to_conc_factor,
-                conc_to_load_factor,
-                inflow_load,
-                influent_conc,
-            )
-
-    # combine individual facilities into a total value to report for the node.
-    for param in wet_weather_parameters:
-        load_col = param["load_col"]
-        conc_col = param["conc_col"]
-        load_to_conc_factor = param["load_to_conc_factor"]
-
-        # accumulate loads reduced on the whole wqmp site
-        data[f"{load_col}_discharged"] = sum(
-            [
-                facility_data.get(f"{load_col}_discharged", 0)
-                for facility_data in facilities
-            ]
-        )
-
-        data[f"{load_col}_removed"] = sum(
-            [
-                facility_data.get(f"{load_col}_removed", 0)
-                for facility_data in facilities
-            ]
-        )
-
-        data[f"{load_col}_total_removed"] = data[f"{load_col}_removed"] + data.get(
-            f"{load_col}_removed_upstream", 0.0
-        )
-
-        discharge_conc = (
-            safe_divide(data[f"{load_col}_discharged"], data[f"{vol_col}_discharged"])
-            * load_to_conc_factor
-        )
-        data[f"{conc_col}_effluent"] = discharge_conc
-
-        # for symmetry with non-treatment nodes, though it's the same as '_discharge'.
-        data[f"{load_col}_total_discharged"] = (
-            data[load_col] + data[f"{load_col}_discharged"]
-        )
-
-    return data
+    return compute_site_load_reduction(
+        data,
+        pollutant_keys(wet_weather_parameters, WET_WEATHER_VOLUMES),
+        wet_weather_facility_performance_map,
+        load_reductions,
+    )
 
 
 def compute_site_dry_weather_load_reduction(
     data: dict[str, Any],
     dry_weather_parameters: list[dict[str, Any]],
     dry_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
 ) -> dict[str, Any]:
-    facilities = data.get("treatment_facilities", [])
-    seasons = ["summer", "winter"]
-
-    for facility_data in facilities:
-        tmnt_facility_type = facility_data.get(
-            "tmnt_performance_facility_type", r"¯\_(ツ)_/¯"
-        )
-
-        for season, param in product(seasons, dry_weather_parameters):
-            vol_col = f"{season}_dry_weather_flow_cuft"
+    return compute_site_load_reduction(
+        data,
+        pollutant_keys(dry_weather_parameters, DRY_WEATHER_VOLUMES),
+        dry_weather_facility_performance_map,
+        load_reductions,
+    )
 
-            conc_unit = param["concentration_unit"]
-            poc_long = param["long_name"]
 
-            load_col = season + "_" + param["load_col"]
-            conc_col = season + "_" + param["conc_col"]
+def compute_site_load_reduction(
+    data: dict[str, Any],
+    keys: PollutantKeys,
+    effluent_function_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
+) -> dict[str, Any]:
+    """Compute the load reduction of each facility of a treatment site, and combine
+    them into a total for the node.
 
-            load_to_conc_factor = param["load_to_conc_factor"]
-            conc_to_load_factor = param["conc_to_load_factor"]
+    Parameters
+    ----------
+    data : dict
+        information about the current node, including the `treatment_facilities` of
+        the site with their volume capture.
+    keys : PollutantKeys
+        the keys of the pollutants to compute, see
+        `nereid.src.watershed.loading.pollutant_keys`.
+    effluent_function_map : mapping
+        Reference: `nereid.src.watershed.loading.compute_pollutant_load_reduction`
+    load_reductions : LoadReductions, optional
+        if given, the load reduction of the facilities and the site total are
+        deferred to `LoadReductions.compute`.
 
-            conc_to_load_factor = param["conc_to_load_factor"]
+    """
+    facilities = data.get("treatment_facilities", [])
 
-            influent_conc = facility_data[f"{conc_col}_influent"] = data[
-                f"{conc_col}_influent"
-            ]
-            inflow_load = facility_data[f"{load_col}_inflow"] = (
-                facility_data[f"{vol_col}_inflow"] * influent_conc * conc_to_load_factor
-            )
+    influent_conc = numpy.array([data[k] for k in keys.influent_conc], dtype=float)
 
-            compute_pollutant_load_reduction(
-                facility_data,
-                dry_weather_facility_performance_map,
-                tmnt_facility_type,
-                conc_unit,
-                poc_long,
-                load_col,
-                conc_col,
-                vol_col,
-                load_to_conc_factor,
-                conc_to_load_factor,
-                inflow_load,
-                influent_conc,
-            )
+    vol_inflow = numpy.array(
+        [[dct[k] for k in keys.vol_inflow] for dct in facilities], dtype=float
+    ).reshape(len(facilities), len(keys))
+    inflow_load = vol_inflow * influent_conc * keys.conc_to_load_factor
 
-    # combine individual facilities into a total value to report for the node.
-    for season, param in product(seasons, dry_weather_parameters):
-        vol_col = f"{season}_dry_weather_flow_cuft"
-
-        load_col = season + "_" + param["load_col"]
-        conc_col = season + "_" + param["conc_col"]
-        load_to_conc_factor = param["load_to_conc_factor"]
-
-        # accumulate loads reduced on the whole wqmp site
-        data[f"{load_col}_discharged"] = sum(
-            [
-                facility_data.get(f"{load_col}_discharged", 0)
-                for facility_data in facilities
-            ]
+    for facility_data, row in zip(facilities, inflow_load.tolist(), strict=True):
+        facility_data.update(
+            zip(keys.influent_conc, influent_conc.tolist(), strict=True)
         )
+        facility_data.update(zip(keys.inflow, row, strict=True))
 
-        data[f"{load_col}_removed"] = sum(
-            [
-                facility_data.get(f"{load_col}_removed", 0)
-                for facility_data in facilities
-            ]
-        )
+    facility_types = [
+        dct.get("tmnt_performance_facility_type", r"¯\_(ツ)_/¯") for dct in facilities
+    ]
+    if load_reductions is not None:
+        load_reductions.add(facilities, keys, effluent_function_map, facility_types)
+        load_reductions.then(lambda: _total_site_load_reduction(data, keys))
+        return data
 
-        data[f"{load_col}_total_removed"] = data[f"{load_col}_removed"] + data.get(
-            f"{load_col}_removed_upstream", 0.0
-        )
+    compute_pollutant_load_reductions(
+        facilities, keys, effluent_function_map, facility_types
+    )
+    return _total_site_load_reduction(data, keys)
 
-        discharge_conc = (
-            safe_divide(data[f"{load_col}_discharged"], data[f"{vol_col}_discharged"])
-            * load_to_conc_factor
-        )
-        data[f"{conc_col}_effluent"] = discharge_conc
 
+def _total_site_load_reduction(
+    data: dict[str, Any], keys: PollutantKeys
+) -> dict[str, Any]:
+    facilities = data.get("treatment_facilities", [])
+
+    # combine individual facilities into a total value to report for the node.
+    def total(keys: list[str]) -> numpy.ndarray:
+        values = [[dct.get(k, 0) for k in keys] for dct in facilities]
+        return numpy.array(values, dtype=float).reshape(len(facilities), -1).sum(axis=0)
+
+    # accumulate loads reduced on the whole wqmp site
+    discharged = total(keys.outputs["discharged"])
+    removed = total(keys.outputs["removed"])
+    removed_upstream = numpy.array(
+        [data.get(k, 0.0) for k in keys.removed_upstream], dtype=float
+    )
+    vol_discharged = numpy.array([data[k] for k in keys.vol_discharged], dtype=float)
+    load = numpy.array([data[k] for k in keys.load], dtype=float)
+
+    outputs = {
+        "discharged": discharged,
+        "removed": removed,
+        "total_removed": removed + removed_upstream,
+        "effluent_conc": safe_array_divide(discharged, vol_discharged)
+        * keys.load_to_conc_factor,
         # for symmetry with non-treatment nodes, though it's the same as '_discharge'.
-        data[f"{load_col}_total_discharged"] = (
-            data[load_col] + data[f"{load_col}_discharged"]
-        )
+        "total_discharged": load + discharged,
+    }
+    for name, array in outputs.items():
+        data.update(zip(keys.outputs[name], array.tolist(), strict=True))
 
     return data
@@ -0,0 +1,160 @@
+from typing import Any
+
+import numpy
+
+from nereid.core.config import settings
+from nereid.core.timings import phase
+from nereid.src.watershed.engine import WatershedEngine
+from nereid.src.watershed.loading import (
+    DRY_WEATHER_VOLUMES,
+    WET_WEATHER_VOLUMES,
+    check_pollutant_mass_balance,
+    pollutant_keys,
+)
+from nereid.src.watershed.node_state import NodeState
+from nereid.src.watershed.wet_weather_loading import check_node_results_close_columns
+
+VERIFY_MODES = ["off", "sample", "full"]
+
+
+def check_verify_mode(verify: str | None) -> None:
+    if verify is not None and verify not in VERIFY_MODES:
+        raise ValueError(f"verify must be one of {VERIFY_MODES}, got '{verify}'.")
+
+
+def verification_rows(
+    state: NodeState,
+    rows: numpy.ndarray | None = None,
+    verify: str | None = None,
+    sample_fraction: float | None = None,
+    rng: numpy.random.Generator | None = None,
+) -> numpy.ndarray:
+    """The solved nodes of `rows` to check in a `verify` mode, see `verify_state`."""
+
+    check_verify_mode(verify)
+    if verify is None:
+        verify = settings.WATERSHED_VERIFY
+
+    if rows is None:
+        rows = numpy.arange(len(state))
+    rows = rows[~state.is_leaf[rows]]
+
+    if verify == "off":
+        return rows[:0]
+
+    if verify == "sample":
+        if sample_fraction is None:
+            sample_fraction = settings.WATERSHED_VERIFY_SAMPLE_FRACTION
+        if rng is None:
+            rng = numpy.random.default_rng()
+        rows = rows[rng.random(len(rows)) < sample_fraction]
+
+    return rows
+
+
+def check_volume_balance(
+    state: NodeState, rows: numpy.ndarray
+) -> list[tuple[int, str]]:
+    """Check the wet weather volume balance of the solved nodes in `rows` with
+    `check_node_results_close_columns`.
+
+    Treatment strategies that do not bypass any volume may leave the bypassed volume
+    unset, which counts as the whole inflow like in `check_node_results_close`.
+    """
+    fields = state.fields
+    block = state.values[rows]
+
+    unset = [
+        r
+        for r, i in enumerate(rows.tolist())
+        if i in state.rows and "runoff_volume_cuft_bypassed" not in state.rows[i]
+    ]
+    block[unset, fields["runoff_volume_cuft_bypassed"]] = block[
+        unset, fields["runoff_volume_cuft_inflow"]
+    ]
+
+    return [
+        (int(rows[r]), msg)
+        for r, msg in check_node_results_close_columns(block, fields)
+    ]
+
+
+@phase("verify_state")
+def verify_state(
+    state: NodeState,
+    engine: WatershedEngine,
+    rows: numpy.ndarray | None = None,
+    verify: str | None = None,
+    sample_fraction: float | None = None,
+    rng: numpy.random.Generator | None = None,
+) -> list[tuple[int, str]]:
+    """Check the volume and pollutant mass balance of the solved nodes of a
+    `NodeState`, and append an error to each node that does not balance.
+
+    The checks run over all of the selected nodes at once after they are solved,
+    rather than in the solver loop. The volume balance is checked for every node,
+    and the pollutant mass balance for each node, or each facility of a treatment
+    site, that computed a load reduction. Errors of the facilities of a treatment
+    site are appended to the `node_errors` of the facility.
+
+    Parameters
+    ----------
+    state : NodeState
+        a solved node state. This must be called before `NodeState.update_node_data`.
+    engine : WatershedEngine
+        the engine that solved the state.
+    rows : numpy.ndarray, optional
+        sorted integer array of the nodes to check. Defaults to all nodes. Leaves are
+        read only, so they are never checked.
+    verify : {"off", "sample", "full"}, optional
+        "full" checks every node, "sample" checks a random `sample_fraction` of the
+        nodes and "off" skips the checks. Defaults to `settings.WATERSHED_VERIFY`.
+    sample_fraction : float, optional
+        defaults to `settings.WATERSHED_VERIFY_SAMPLE_FRACTION`.
+    rng : numpy.random.Generator, optional
+        the random generator of the "sample" mode.
+
+    Returns
+    -------
+    list of (row, message) tuples for each check that failed.
+
+    """
+
+    rows = verification_rows(state, rows, verify, sample_fraction, rng)
+    if not len(rows):
+        return []
+
+    errors = check_volume_balance(state, rows)
+    for i, msg in errors:
+        state.errors(i).append(msg)
+
+    treatment = [i for i in rows.tolist() if i in state.rows]
+    for parameters, volumes in [
+        (engine.wet_weather_parameters, WET_WEATHER_VOLUMES),
+        (engine.dry_weather_parameters, DRY_WEATHER_VOLUMES),
+    ]:
+        keys = pollutant_keys(parameters, volumes)
+        if not len(keys):
+            continue
+
+        # the load reduction of a treatment site is computed for each facility.
+        solved_key = keys.outputs["released_from_treated"][0]
+        units: list[tuple[int, dict[str, Any]]] = [
+            (i, dct)
+            for i in treatment
+            for dct in [
+                state.rows[i],
+                *(state.rows[i].get("treatment_facilities") or []),
+            ]
+            if solved_key in dct
+        ]
+
+        for u, msg in check_pollutant_mass_balance([dct for _, dct in units], keys):
+            i, dct = units[u]
+            if dct is state.rows[i]:
+                state.errors(i).append(msg)
+            else:
+                dct.setdefault("node_errors", []).append(msg)
+            errors.append((i, msg))
+
+    return sorted(errors, key=lambda e: e[0])
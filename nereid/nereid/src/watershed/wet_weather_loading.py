@@ -1,11 +1,20 @@
 from typing import Any, Callable
 
 import networkx as nx
+import numpy
 
-from nereid.core.utils import safe_divide
+from nereid.core.units import Constants
+from nereid.core.utils import safe_array_divide, safe_divide
 from nereid.src.network.utils import sum_node_attr
 from nereid.src.watershed.design_functions import design_volume_cuft
-from nereid.src.watershed.loading import compute_pollutant_load_reduction
+from nereid.src.watershed.loading import (
+    WET_WEATHER_VOLUMES,
+    LoadReductions,
+    accumulate_pollutant_columns,
+    compute_pollutant_load_reduction,
+    pollutant_keys,
+)
+from nereid.src.watershed.node_state import NodeState, NodeStateFields
 
 
 def accumulate_wet_weather_loading(
@@ -280,6 +289,7 @@ def compute_wet_weather_load_reduction(
     data: dict[str, Any],
     wet_weather_parameters: list[dict[str, Any]],
     wet_weather_facility_performance_map: dict[tuple[str, str], Callable],
+    load_reductions: LoadReductions | None = None,
 ) -> dict[str, Any]:
     """this function relies on the volume treated and volume retained to be set by
     other functions before computing the whole facility load reduction by considering
@@ -307,39 +317,20 @@ def compute_wet_weather_load_reduction(
         that returns effluent concentration as output when given influent concentration as input.
         Reference: `nereid.src.tmnt_performance.tmnt.effluent_conc`
         Reference: `nereid.src.tmnt_performance.tasks.effluent_function_map`
+    load_reductions : LoadReductions, optional
+        Reference: `nereid.src.watershed.loading.compute_pollutant_load_reduction`
 
     """
 
     tmnt_facility_type = data.get("tmnt_performance_facility_type", r"¯\_(ツ)_/¯")
-    vol_col = "runoff_volume_cuft"
 
-    for param in wet_weather_parameters:
-        conc_unit = param["concentration_unit"]
-        poc_long = param["long_name"]
-
-        load_col = param["load_col"]
-        conc_col = param["conc_col"]
-
-        load_to_conc_factor = param["load_to_conc_factor"]
-        conc_to_load_factor = param["conc_to_load_factor"]
-
-        inflow_load = data[f"{load_col}_inflow"]
-        influent_conc = data[f"{conc_col}_influent"]
-
-        compute_pollutant_load_reduction(
-            data,
-            wet_weather_facility_performance_map,
-            tmnt_facility_type,
-            conc_unit,
-            poc_long,
-            load_col,
-            conc_col,
-            vol_col,
-            load_to_conc_factor,
-            conc_to_load_factor,
-            inflow_load,
-            influent_conc,
-        )
+    compute_pollutant_load_reduction(
+        data,
+        pollutant_keys(wet_weather_parameters, WET_WEATHER_VOLUMES),
+        wet_weather_facility_performance_map,
+        tmnt_facility_type,
+        load_reductions,
+    )
 
     return data
 
@@ -376,3 +367,258 @@ def check_node_results_close(data: dict[str, Any]) -> dict[str, Any]:
         )
 
     return data
+
+
+def accumulate_wet_weather_columns(
+    block: numpy.ndarray,
+    upstream: numpy.ndarray,
+    fields: NodeStateFields,
+) -> numpy.ndarray:
+    """Columnar version of `accumulate_wet_weather_loading`.
+
+    This computes the same values for every node in `block` at once. See
+    `accumulate_wet_weather_loading` for a description of each accumulated value.
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        2D array of node state rows to update in place, one row per node.
+    upstream : numpy.ndarray
+        2D array with the sum of the state rows of the immediate predecessors
+        of each node in `block`.
+    fields : NodeStateFields
+        the column registry of the node state.
+        Reference: `nereid.src.watershed.node_state.NodeStateFields`
+
+    """
+    f = fields.index
+
+    eff_area_direct = block[:, f["eff_area_acres_direct"]] = upstream[
+        :, f["eff_area_acres"]
+    ]
+    eff_area_upstream = block[:, f["eff_area_acres_upstream"]] = upstream[
+        :, f["eff_area_acres_cumul"]
+    ]
+    eff_area_cumul = eff_area_direct + eff_area_upstream
+    block[:, f["eff_area_acres_cumul"]] = eff_area_cumul
+    block[:, f["eff_area_acres_total_cumul"]] = (
+        block[:, f["eff_area_acres"]] + eff_area_cumul
+    )
+
+    block[:, f["runoff_volume_cuft_direct"]] = upstream[:, f["runoff_volume_cuft"]]
+    block[:, f["runoff_volume_cuft_upstream"]] = upstream[
+        :, f["runoff_volume_cuft_discharged"]
+    ]
+    block[:, f["runoff_volume_cuft_inflow"]] = (
+        upstream[:, f["runoff_volume_cuft"]]
+        + upstream[:, f["runoff_volume_cuft_discharged"]]
+    )
+
+    block[:, f["runoff_volume_cuft_retained_upstream"]] = upstream[
+        :, f["runoff_volume_cuft_total_retained"]
+    ]
+
+    retention_upstream = upstream[:, f["retention_volume_cuft_cumul"]]
+    block[:, f["retention_volume_cuft_upstream"]] = retention_upstream
+    block[:, f["retention_volume_cuft_cumul"]] = (
+        block[:, f["retention_volume_cuft"]] + retention_upstream
+    )
+
+    # see `.design_functions.design_volume_cuft`
+    depth = block[:, f["design_storm_depth_inches"]]
+    to_cuft = Constants.INCH_ACRES_to_CUFT
+    design_volume_upstream = depth * eff_area_upstream * to_cuft
+    block[:, f["design_volume_cuft_direct"]] = depth * eff_area_direct * to_cuft
+    block[:, f["design_volume_cuft_upstream"]] = design_volume_upstream
+    block[:, f["design_volume_cuft_cumul"]] = depth * eff_area_cumul * to_cuft
+
+    det_upstream = upstream[:, f["during_storm_det_volume_cuft_cumul"]]
+    block[:, f["during_storm_det_volume_cuft_upstream"]] = det_upstream
+    block[:, f["vol_reduction_cuft_upstream"]] = upstream[
+        :, f["vol_reduction_cuft_cumul"]
+    ]
+
+    design_vol_upstream = numpy.maximum(
+        design_volume_upstream - retention_upstream - det_upstream, 0
+    )
+    block[:, f["during_storm_design_vol_cuft_upstream"]] = design_vol_upstream
+    block[:, f["during_storm_design_vol_cuft_cumul"]] = (
+        block[:, f["design_volume_cuft_direct"]] + design_vol_upstream
+    )
+
+    block[:, f["_has_upstream_vol_storage"]] = (retention_upstream + det_upstream) > 0
+
+    accumulate_pollutant_columns(block, upstream, fields.wet_loads)
+
+    return block
+
+
+def accumulate_wet_weather_subtree_columns(
+    state: NodeState,
+    rows: numpy.ndarray,
+    mask: numpy.ndarray,
+) -> NodeState:
+    """Closed-form accumulation of the wet weather values that nodes pass downstream,
+    for nodes that have no treatment upstream.
+
+    Since nothing upstream of `rows` retains volume or removes load, the values each
+    node passes downstream are sums over its upstream nodes, and they are computed
+    for every node in `rows` at once with prefix sums. After this, each node in `rows`
+    only depends on these values in its immediate predecessors, so the whole set can
+    be solved as a single block with `accumulate_wet_weather_columns`.
+
+    Parameters
+    ----------
+    state : NodeState
+        columnar store of the watershed solution.
+        Reference: `nereid.src.watershed.node_state.NodeState.accumulate_subtrees`
+    rows : numpy.ndarray
+        integer array of the treatment-free nodes.
+    mask : numpy.ndarray
+        boolean array of `rows` and the leaves upstream of them.
+
+    """
+    f = state.fields.index
+    loads = state.fields.wet_loads
+
+    def cols(names: list[str]) -> numpy.ndarray:
+        return numpy.array([f[n] for n in names], dtype=int)
+
+    state.accumulate_subtrees(
+        rows,
+        mask,
+        carry=numpy.r_[
+            cols(["eff_area_acres_cumul", "runoff_volume_cuft_discharged"]),
+            loads.discharged,
+        ],
+        own=numpy.r_[cols(["eff_area_acres", "runoff_volume_cuft"]), loads.load],
+    )
+
+    state.accumulate_subtrees(
+        rows,
+        mask,
+        carry=numpy.r_[
+            cols(["runoff_volume_cuft_total_retained"]), loads.total_removed
+        ],
+    )
+
+    state.accumulate_subtrees(
+        rows,
+        mask,
+        carry=cols(
+            [
+                "retention_volume_cuft_cumul",
+                "during_storm_det_volume_cuft_cumul",
+                "vol_reduction_cuft_cumul",
+            ]
+        ),
+        own=cols(
+            [
+                "retention_volume_cuft",
+                "during_storm_det_volume_cuft",
+                "vol_reduction_cuft",
+            ]
+        ),
+        cumulative=True,
+    )
+
+    return state
+
+
+def _round(values: numpy.ndarray, prec: int) -> numpy.ndarray:
+    """round like the builtin `round`. `numpy.round` can disagree with it when the
+    value is not already rounded, so those few values are rounded one at a time.
+    """
+    rounded = numpy.round(values, prec)
+    for i in numpy.flatnonzero(rounded != values):
+        rounded[i] = round(float(values[i]), prec)
+    return rounded
+
+
+def compute_wet_weather_volume_discharge_columns(
+    block: numpy.ndarray,
+    fields: NodeStateFields,
+) -> numpy.ndarray:
+    """Columnar version of `compute_wet_weather_volume_discharge` for nodes that
+    do not perform treatment.
+
+    This function must always be called after `accumulate_wet_weather_columns`.
+
+    """
+    f = fields.index
+
+    inflow = block[:, f["runoff_volume_cuft_inflow"]]
+
+    prec = 2
+    retained_pct = _round(block[:, f["retained_pct"]], prec)
+    captured_pct = _round(block[:, f["captured_pct"]], prec)
+    treated_pct = _round(block[:, f["treated_pct"]], prec)
+    bypassed_pct = _round(100 - captured_pct, prec)
+
+    retained = inflow * retained_pct / 100
+    captured = inflow * captured_pct / 100
+    treated = inflow * treated_pct / 100
+    bypassed = inflow * bypassed_pct / 100
+
+    block[:, f["runoff_volume_cuft_retained"]] = retained
+    block[:, f["runoff_volume_cuft_captured"]] = captured
+    block[:, f["runoff_volume_cuft_treated"]] = treated
+    block[:, f["runoff_volume_cuft_bypassed"]] = bypassed
+
+    block[:, f["retained_pct"]] = numpy.where(retained != 0, retained_pct, 0.0)
+    block[:, f["captured_pct"]] = numpy.where(captured != 0, captured_pct, 0.0)
+    block[:, f["treated_pct"]] = numpy.where(treated != 0, treated_pct, 0.0)
+    block[:, f["bypassed_pct"]] = numpy.where(bypassed != 0, bypassed_pct, 0.0)
+
+    block[:, f["vol_reduction_cuft_cumul"]] = (
+        block[:, f["vol_reduction_cuft"]] + block[:, f["vol_reduction_cuft_upstream"]]
+    )
+    block[:, f["during_storm_det_volume_cuft_cumul"]] = (
+        block[:, f["during_storm_det_volume_cuft"]]
+        + block[:, f["during_storm_det_volume_cuft_upstream"]]
+    )
+    block[:, f["runoff_volume_cuft_total_retained"]] = (
+        retained + block[:, f["runoff_volume_cuft_retained_upstream"]]
+    )
+
+    discharged = inflow - retained
+    block[:, f["runoff_volume_cuft_discharged"]] = discharged
+    block[:, f["runoff_volume_cuft_total_discharged"]] = (
+        block[:, f["runoff_volume_cuft"]] + discharged
+    )
+
+    return block
+
+
+def check_node_results_close_columns(
+    block: numpy.ndarray,
+    fields: NodeStateFields,
+) -> list[tuple[int, str]]:
+    """Columnar version of `check_node_results_close`.
+
+    Returns
+    -------
+    list of (row, message) tuples for each row of `block` that failed a check.
+
+    """
+    f = fields.index
+
+    inflow = block[:, f["runoff_volume_cuft_inflow"]]
+    discharged = block[:, f["runoff_volume_cuft_discharged"]]
+    retained = block[:, f["runoff_volume_cuft_retained"]]
+    treated = block[:, f["runoff_volume_cuft_treated"]]
+    bypassed = block[:, f["runoff_volume_cuft_bypassed"]]
+
+    check1 = safe_array_divide(inflow - retained - treated - bypassed, inflow)
+    errors = [
+        (int(i), f"inflow did not close within 1%. difference is: {check1[i]:%}")
+        for i in numpy.flatnonzero(numpy.abs(check1) > 0.01)
+    ]
+
+    check2 = safe_array_divide(numpy.abs(discharged - treated - bypassed), discharged)
+    errors.extend(
+        (int(i), f"discharge did not close within 1 %. difference is: {check2[i]:%}")
+        for i in numpy.flatnonzero(numpy.abs(check2) > 0.01)
+    )
+
+    return sorted(errors, key=lambda e: e[0])
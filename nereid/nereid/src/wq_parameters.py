@@ -55,11 +55,13 @@ def init_wq_parameters(tablename: str, context: dict[str, Any]) -> list[dict[str
 
     """
 
-    parameters: list[dict[str, Any]] = (
-        context.get("project_reference_data", {})
+    # the specs are copied, so that the context does not change once it is loaded.
+    parameters: list[dict[str, Any]] = [
+        dict(param)
+        for param in context.get("project_reference_data", {})
         .get(tablename, {})
         .get("parameters", [])
-    )
+    ]
 
     for param in parameters:
         conc_unit = param["concentration_unit"]
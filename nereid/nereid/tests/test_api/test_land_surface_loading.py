@@ -3,6 +3,12 @@ import json
 import pytest
 
 from nereid.models import land_surface_models
+from nereid.tests.utils import poll_testclient_url
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
 
 
 @pytest.mark.parametrize("details", ["true", "false"])
@@ -55,3 +61,55 @@ def test_get_land_surface_loading(
     except AssertionError:  # pragma: no cover
         print(json.dumps(grjson, indent=2))
         raise
+
+
+@pytest.mark.parametrize("details", ["true", "false"])
+def test_post_land_surface_loading_projection(
+    client, land_surface_loading_response_dicts, details
+):
+    payload = land_surface_loading_response_dicts[50, 5]
+    route = (
+        "api/v1/land_surface/loading"
+        f"?details={details}&fields=area_acres&include_patterns=*_volume_cuft"
+    )
+    response = client.post(route, json=payload)
+    assert response.status_code == 200, response.content
+
+    rjson = response.json()
+    if rjson.get("result_route"):
+        response = poll_testclient_url(client, rjson["result_route"])
+        rjson = response.json()
+
+    assert land_surface_models.LandSurfaceResponse(**rjson)
+    data = rjson["data"]
+    exp = {"node_id", "area_acres", "imp_ro_volume_cuft", "perv_ro_volume_cuft"}
+    for dct in data["summary"] + (data["details"] or []):
+        assert set(dct) == exp | {"runoff_volume_cuft"}
+
+
+@pytest.mark.skipif(pyarrow is None, reason="optional pyarrow is not installed")
+@pytest.mark.parametrize("details", ["true", "false"])
+def test_post_land_surface_loading_table(
+    client, land_surface_loading_response_dicts, details
+):
+    payload = land_surface_loading_response_dicts[50, 5]
+    headers = {"accept": "application/vnd.apache.arrow.stream"}
+    route = f"api/v1/land_surface/loading?details={details}"
+    response = client.post(route, json=payload, headers=headers)
+    assert response.status_code == 200, response.content
+
+    if "application/json" in response.headers["content-type"]:
+        result_route = response.json()["result_route"]
+        response = poll_testclient_url(client, result_route)
+        response = client.get(result_route, headers=headers)
+
+    assert response.headers["content-type"] == headers["accept"]
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+
+    assert json.loads(table.schema.metadata[b"errors"]) == []
+    if details == "true":
+        assert table.num_rows == 50
+        assert "surface_key" in table.column_names
+    else:
+        assert table.num_rows <= 5
+        assert table.schema.field("eff_area_acres").type == pyarrow.float64()
@@ -3,7 +3,10 @@ import pytest
 
 from nereid.models import network_models
 from nereid.src.network.utils import clean_graph_dict
-from nereid.tests.utils import poll_testclient_url
+from nereid.tests.utils import (
+    generate_n_random_valid_watershed_graphs,
+    poll_testclient_url,
+)
 
 
 @pytest.mark.parametrize(
@@ -281,3 +284,25 @@ def test_get_render_solution_sequence_bad_media_type(
         svg_response = client.get(result_route + "/img?media_type=png")
         assert svg_response.status_code == 400
         assert "media_type not supported" in svg_response.content.decode()
+
+
+def test_post_solution_sequence_schedule(client):
+    g = generate_n_random_valid_watershed_graphs(3, 20, 40)
+    payload = clean_graph_dict(g)
+
+    route = "api/v1/network/solution_sequence"
+    response = client.post(route, json=payload, params={"n_partitions": 4})
+    assert response.status_code == 200, response.content
+
+    rjson = response.json()
+    if rjson.get("result_route"):
+        response = poll_testclient_url(client, rjson["result_route"])
+        rjson = response.json()
+
+    schedule = rjson["data"]["schedule"]
+    assert schedule["total_cost"] == len(g)
+    nodes = {n["id"] for p in schedule["partitions"] for n in p["nodes"]}
+    assert nodes == {str(n) for n in g.nodes}
+
+    response = client.post(route, json=payload, params={"n_partitions": 0})
+    assert response.status_code == 422
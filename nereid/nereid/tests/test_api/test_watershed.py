@@ -1,3 +1,4 @@
+import json
 from copy import deepcopy
 
 import networkx as nx
@@ -8,6 +9,12 @@ from nereid.src.network.algorithms import get_subset
 from nereid.src.network.utils import graph_factory, nxGraph_to_dict
 from nereid.tests.utils import check_subgraph_response_equal, poll_testclient_url
 
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
 
 @pytest.mark.parametrize("size", [50, 100])
 @pytest.mark.parametrize("pct_tmnt", [0, 0.3, 0.6])
@@ -93,3 +100,296 @@ def test_post_solve_watershed_stable(
     subgraph_results = data["results"]
 
     check_subgraph_response_equal(subgraph_results, results)
+
+
+def test_post_solve_watershed_dirty_nodes(
+    client, watershed_requests, watershed_responses, watershed_test_case
+):
+    size, pct_tmnt, dirty_nodes = watershed_test_case
+    watershed_request = watershed_requests[size, pct_tmnt]
+    post_response = watershed_responses[size, pct_tmnt]
+
+    post_response_json = post_response.json()
+    data = post_response_json.get("data", None)
+
+    if post_response_json["result_route"]:
+        task_response = poll_testclient_url(client, post_response_json["result_route"])
+        data = task_response.json()["data"]
+
+    results = data["results"] + data["leaf_results"]
+
+    new_request = deepcopy(watershed_request)
+    new_request["previous_results"] = results
+    new_request["dirty_nodes"] = dirty_nodes
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=new_request)
+    response_json = response.json()
+    data = response_json.get("data", None)
+
+    if response_json["result_route"]:
+        task_response = poll_testclient_url(client, response_json["result_route"])
+        data = task_response.json()["data"]
+
+    dirty_results = data["results"] + data["leaf_results"]
+
+    g = nx.DiGraph(graph_factory(watershed_request["graph"]))
+    changed = set(dirty_nodes) | {d for n in dirty_nodes for d in nx.descendants(g, n)}
+
+    assert {dct["node_id"] for dct in dirty_results} == changed
+    check_subgraph_response_equal(dirty_results, results)
+
+
+def test_post_watershed_session(client, watershed_requests):
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+
+    route = "api/v1/watershed/session"
+    response = client.post(route, json=watershed_request)
+    assert response.status_code == 200, response.content
+    response_json = response.json()
+    data = response_json.get("data", None)
+    if response_json["result_route"]:
+        task_response = poll_testclient_url(client, response_json["result_route"])
+        data = task_response.json()["data"]
+
+    assert watershed_models.WatershedSessionResponse(**response_json)
+    session_id = data["session_id"]
+    results = data["results"] + data["leaf_results"]
+    assert len(results) == 100
+
+    # land surfaces replace all of the existing ones on their node.
+    land_surface = watershed_request["land_surfaces"][0]
+    delta = {
+        "land_surfaces": [
+            dct
+            for dct in watershed_request["land_surfaces"]
+            if dct["node_id"] == land_surface["node_id"]
+        ]
+    }
+
+    response = client.post(f"{route}/{session_id}", json=delta)
+    assert response.status_code == 200, response.content
+    response_json = response.json()
+    data = response_json.get("data", None)
+    if response_json["result_route"]:
+        task_response = poll_testclient_url(client, response_json["result_route"])
+        data = task_response.json()["data"]
+
+    assert data["session_id"] == session_id
+    delta_results = data["results"] + data["leaf_results"]
+    assert land_surface["node_id"] in {dct["node_id"] for dct in delta_results}
+    assert len(delta_results) < len(results)
+    check_subgraph_response_equal(delta_results, results)
+
+    response = client.post(f"{route}/not-a-session", json=delta)
+    data = response.json()["data"]
+    if data is None:  # pragma: no cover
+        return
+    assert "does not exist" in data["errors"][0]
+
+
+def test_post_solve_watershed_scenarios(client, watershed_requests):
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+    facility = watershed_request["treatment_facilities"][0]
+    scenario = {
+        "scenario_id": "moved",
+        "treatment_facilities": [
+            {**facility, "node_id": watershed_request["graph"]["nodes"][-1]["id"]}
+        ],
+    }
+
+    route = "api/v1/watershed/solve_scenarios"
+    response = client.post(route, json={**watershed_request, "scenarios": [scenario]})
+    assert response.status_code == 200, response.content
+    response_json = response.json()
+    data = response_json.get("data", None)
+    if response_json["result_route"]:
+        task_response = poll_testclient_url(client, response_json["result_route"])
+        data = task_response.json()["data"]
+
+    assert watershed_models.WatershedScenariosResponse(**response_json)
+    assert len(data["results"] + data["leaf_results"]) == 100
+
+    (scenario_data,) = data["scenarios"]
+    assert scenario_data["scenario_id"] == "moved"
+    scenario_results = scenario_data["results"] + scenario_data["leaf_results"]
+    assert scenario["treatment_facilities"][0]["node_id"] in {
+        dct["node_id"] for dct in scenario_results
+    }
+    assert len(scenario_results) < 100
+
+
+def test_post_size_watershed_facilities(client, watershed_requests):
+    watershed_request = deepcopy(watershed_requests[100, 0.6])
+    targets = [
+        {"node_id": dct["node_id"], "target": "captured_pct", "value": 80}
+        for dct in watershed_request["treatment_facilities"]
+    ]
+
+    route = "api/v1/watershed/size_facilities"
+    response = client.post(route, json={**watershed_request, "sizing_targets": targets})
+    assert response.status_code == 200, response.content
+    response_json = response.json()
+    data = response_json.get("data", None)
+    if response_json["result_route"]:
+        task_response = poll_testclient_url(client, response_json["result_route"])
+        data = task_response.json()["data"]
+
+    assert watershed_models.WatershedSizingResponse(**response_json)
+    assert len(data["sizing"]) == len(targets)
+    assert any(dct["size"] for dct in data["sizing"])
+
+    response = client.post(
+        route,
+        json={
+            **watershed_request,
+            "sizing_targets": [{"node_id": "0", "target": "nope", "value": 80}],
+        },
+    )
+    assert response.status_code == 422
+
+
+def test_post_solve_watershed_ndjson(client, watershed_requests):
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+    headers = {"accept": "application/x-ndjson"}
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=watershed_request, headers=headers)
+    assert response.status_code == 200, response.content
+
+    if "application/json" in response.headers["content-type"]:
+        result_route = response.json()["result_route"]
+        response = poll_testclient_url(client, result_route)
+        response = client.get(result_route, headers=headers)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    items = [json.loads(line) for line in response.text.splitlines()]
+    trailer = items.pop()["trailer"]
+
+    assert trailer["errors"] == []
+    assert "node_id" in trailer["previous_results_keys"]
+    assert len(items) == 100
+    assert all("node_id" in dct for dct in items)
+
+
+@pytest.mark.parametrize("include_resubmit", [True, False])
+def test_post_solve_watershed_projection(client, watershed_requests, include_resubmit):
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+    params = {
+        "fields": ["node_type", "missing"],
+        "include_patterns": ["TSS_*"],
+        "include_resubmit": include_resubmit,
+    }
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=watershed_request, params=params)
+    assert response.status_code == 200, response.content
+
+    rjson = response.json()
+    if rjson.get("result_route"):
+        response = poll_testclient_url(client, rjson["result_route"])
+        rjson = response.json()
+
+    data = rjson["data"]
+    assert data["errors"] == []
+    resubmit = set(data["previous_results_keys"])
+    assert "TSS_load_lbs_discharged" in resubmit
+
+    results = data["results"] + data["leaf_results"]
+    assert len(results) == 100
+    for dct in results:
+        extra = set(dct) - resubmit if include_resubmit else set(dct)
+        assert all(
+            k in ("node_id", "node_type") or k.startswith("TSS_") for k in extra
+        ), extra
+
+    for dct in data["results"]:
+        assert include_resubmit == ("eff_area_acres_cumul" in dct)
+
+
+@pytest.mark.parametrize("verify", ["off", "sample", "full"])
+def test_post_solve_watershed_verify(client, watershed_requests, verify):
+    watershed_request = deepcopy(watershed_requests[50, 0.3])
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=watershed_request, params={"verify": verify})
+    assert response.status_code == 200, response.content
+
+    rjson = response.json()
+    if rjson.get("result_route"):
+        response = poll_testclient_url(client, rjson["result_route"])
+        rjson = response.json()
+
+    data = rjson["data"]
+    assert data["errors"] == []
+    assert all(dct["node_errors"] == [] for dct in data["results"])
+
+    response = client.post(route, json=watershed_request, params={"verify": "some"})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("timings", [True, False])
+def test_post_solve_watershed_timings(client, watershed_requests, timings):
+    watershed_request = deepcopy(watershed_requests[50, 0.3])
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=watershed_request, params={"timings": timings})
+    assert response.status_code == 200, response.content
+
+    rjson = response.json()
+    polled = bool(rjson.get("result_route"))
+    if polled:
+        response = poll_testclient_url(client, rjson["result_route"])
+        rjson = response.json()
+
+    data = rjson["data"]
+    if not timings:
+        assert data.get("timings") is None
+        return
+
+    assert data["timings"]["task"] == "solve_watershed"
+    assert data["timings"]["counts"]["nodes"] > 0
+    phases = data["timings"]["phases"]
+    assert {"initialize", "solve_state", "results"} <= set(phases)
+
+    # the api layer times itself, except for the results of a task route.
+    if not polled:
+        assert phases["validate_request"]["calls"] == 1
+        assert phases["validate_request"]["wall_s"] > 0
+
+        server_timing = response.headers["server-timing"]
+        assert server_timing.startswith("validate_request;dur=")
+        assert ", serialize_response;dur=" in server_timing
+
+
+@pytest.mark.skipif(pyarrow is None, reason="optional pyarrow is not installed")
+@pytest.mark.parametrize(
+    "media_type", ["application/vnd.apache.arrow.stream", "application/x-parquet"]
+)
+def test_post_solve_watershed_table(client, watershed_requests, media_type):
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+    headers = {"accept": media_type}
+
+    route = "api/v1/watershed/solve"
+    response = client.post(route, json=watershed_request, headers=headers)
+    assert response.status_code == 200, response.content
+
+    if "application/json" in response.headers["content-type"]:
+        result_route = response.json()["result_route"]
+        response = poll_testclient_url(client, result_route)
+        response = client.get(result_route, headers=headers)
+
+    assert response.headers["content-type"] == media_type
+    if media_type == "application/x-parquet":
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.content))
+    else:
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+
+    metadata = table.schema.metadata
+    assert json.loads(metadata[b"errors"]) == []
+    assert "node_id" in json.loads(metadata[b"previous_results_keys"])
+
+    assert table.num_rows == 100
+    assert table.schema.field("node_id").type == pyarrow.string()
+    assert table.schema.field("_is_leaf").type == pyarrow.bool_()
+    assert table.schema.field("runoff_volume_cuft").type == pyarrow.float64()
@@ -8,6 +8,11 @@ import nereid.core.io
 import nereid.data
 from nereid.core import io
 
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
 
 def test_io_load_multiple_cfgs():
     cfgbase = Path(nereid.core.io.__file__).parent.resolve() / "base_config.yml"
@@ -119,3 +124,38 @@ def test_parse_api_recognize(
         assert len(msg) == 0, msg
     else:
         assert len(msg) > 0, msg
+
+
+@pytest.mark.skipif(pyarrow is None, reason="optional pyarrow is not installed")
+def test_records_to_arrow():
+    records = [
+        {"node_id": "0", "area": 1, "flag": True, "errs": ["a"], "nan": numpy.nan},
+        {"node_id": 1, "area": numpy.float64(2.5), "extra": None},
+    ]
+    table = io.records_to_arrow(records, metadata={"errors": ["err"]})
+
+    assert table.column_names == ["node_id", "area", "flag", "errs", "nan", "extra"]
+    assert [str(t) for t in table.schema.types] == [
+        "string",
+        "double",
+        "bool",
+        "string",
+        "double",
+        "string",
+    ]
+    assert table.schema.metadata == {b"errors": b'["err"]'}
+
+    columns = table.to_pydict()
+    assert columns["node_id"] == ["0", "1"]
+    assert columns["area"] == [1.0, 2.5]
+    assert columns["errs"] == ['["a"]', None]
+    assert columns["flag"] == [True, None]
+    assert numpy.isnan(columns["nan"][0])
+    assert columns["nan"][1] is None
+
+    stream = pyarrow.ipc.open_stream(io.arrow_ipc_bytes(table)).read_all()
+    assert stream.schema.equals(table.schema, check_metadata=True)
+    assert stream.column("area").equals(table.column("area"))
+
+    parquet = pandas.read_parquet(pyarrow.BufferReader(io.parquet_bytes(table)))
+    assert parquet["area"].tolist() == [1.0, 2.5]
@@ -0,0 +1,71 @@
+import time
+
+import numpy
+import pytest
+
+from nereid.core.session_store import SessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(tmp_path / "sessions.sqlite", max_entries=3, ttl_seconds=60)
+
+
+def test_session_store_roundtrip(store):
+    data = {"a": [1, 2.5, None], "b": {"c": float("nan")}}
+    session_id = store.create(data)
+
+    assert session_id in store
+    loaded = store.get(session_id)
+    assert loaded["a"] == data["a"]
+    assert numpy.isnan(loaded["b"]["c"])
+
+    store.put(session_id, {"a": 1})
+    assert store.get(session_id) == {"a": 1}
+    assert len(store) == 1
+
+    assert store.delete(session_id)
+    assert not store.delete(session_id)
+    assert store.get(session_id) is None
+
+
+def test_session_store_lru_eviction(store):
+    ids = [store.create({"i": i}) for i in range(3)]
+
+    # touch the oldest so the second one is evicted instead.
+    time.sleep(0.01)
+    assert store.get(ids[0]) == {"i": 0}
+    time.sleep(0.01)
+    new = store.create({"i": 3})
+
+    assert len(store) == 3
+    assert ids[1] not in store
+    assert all(i in store for i in [ids[0], ids[2], new])
+
+
+def test_session_store_ttl(store):
+    session_id = store.create({"a": 1})
+    store.ttl_seconds = 0
+
+    time.sleep(0.01)
+    assert store.get(session_id) is None
+    assert len(store) == 0
+
+
+def test_session_store_shared_file(tmp_path):
+    path = tmp_path / "sessions.sqlite"
+    session_id = SessionStore(path).create({"a": 1})
+    assert SessionStore(path).get(session_id) == {"a": 1}
+
+
+def test_session_store_versions(store):
+    session_id = store.create({"a": 1})
+    data, version = store.get_versioned(session_id)
+
+    assert store.put(session_id, {"a": 2}, version=version)
+    # a writer that read the first version must not overwrite the second one.
+    assert not store.put(session_id, {"a": 3}, version=version)
+    assert store.get_versioned(session_id) == ({"a": 2}, version + 1)
+
+    assert not store.put("missing", {"a": 1}, version=0)
+    assert "missing" not in store
@@ -0,0 +1,130 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from nereid.core.log import JSONLogFormatter
+from nereid.core.timings import Timings, activate, count, phase, timed_task
+
+
+@phase("inner")
+def _inner():
+    count("items", 2)
+    return 1
+
+
+@timed_task
+def _task(n):
+    with phase("outer"):
+        for _ in range(n):
+            _inner()
+    count("items")
+    return {"data": n}
+
+
+@timed_task
+def _caller():
+    return {"data": _task(2)}
+
+
+@timed_task
+def _stream(n):
+    for i in range(n):
+        _inner()
+        yield {"i": i}
+    yield {"trailer": {}}
+
+
+def test_timings_phases():
+    timings = Timings("task")
+    with timings.phase("a"):
+        with timings.phase("b"):
+            timings.count("n", 3)
+        timings.count("n")
+
+    report = timings.to_dict()
+    assert report["task"] == "task"
+    assert report["counts"] == {"n": 4}
+    assert set(report["phases"]) == {"a", "b"}
+    assert report["phases"]["a"]["calls"] == 1
+    assert report["wall_s"] >= report["phases"]["a"]["wall_s"] >= 0
+
+
+def test_phase_inactive():
+    # nothing is collected without an active timed task.
+    assert _inner() == 1
+    assert _task(3) == {"data": 3}
+
+
+def test_timed_task():
+    response = _task(3, timings=True)
+    timings = response["timings"]
+
+    assert response["data"] == 3
+    assert timings["task"] == "_task"
+    assert timings["counts"] == {"items": 7}
+    assert timings["phases"]["inner"]["calls"] == 3
+    assert timings["phases"]["outer"]["calls"] == 1
+
+
+def test_timed_task_nested():
+    response = _caller(timings=True)
+
+    assert "timings" not in response["data"]
+    assert response["timings"]["phases"]["_task"]["calls"] == 1
+    assert response["timings"]["phases"]["inner"]["calls"] == 2
+
+
+def test_timed_generator():
+    items = list(_stream(3, timings=True))
+
+    assert items[:3] == [{"i": i} for i in range(3)]
+    timings = items[-1]["trailer"]["timings"]
+    assert timings["task"] == "_stream"
+    assert timings["phases"]["inner"]["calls"] == 3
+
+    assert list(_stream(1)) == [{"i": 0}, {"trailer": {}}]
+
+
+def test_timed_generator_threads():
+    # like a `StreamingResponse`, request each item on a thread of a pool.
+    items = _stream(20, timings=True)
+    with ThreadPoolExecutor(4) as pool:
+        streamed = [pool.submit(next, items).result() for _ in range(21)]
+
+    timings = streamed[-1]["trailer"]["timings"]
+    assert timings["phases"]["inner"]["calls"] == 20
+    assert 0 <= timings["phases"]["inner"]["cpu_s"] <= timings["cpu_s"]
+
+
+def test_timings_steps():
+    timings = Timings("task")
+    with timings.step():
+        sum(range(100_000))
+    cpu_s = timings.to_dict()["cpu_s"]
+
+    # time outside of the steps is not counted.
+    sum(range(1_000_000))
+    assert timings.to_dict()["cpu_s"] == cpu_s > 0
+
+
+def test_activate():
+    with activate(Timings("outside")) as timings:
+        response = _task(2)
+
+    assert "timings" not in response
+    assert timings.counts == {"items": 5}
+    assert timings.phases["_task"]["calls"] == 1
+    assert timings.phases["inner"]["calls"] == 2
+
+    # the timings are only active in the block.
+    _inner()
+    assert timings.counts == {"items": 5}
+
+
+def test_timings_log_record(caplog):
+    with caplog.at_level(logging.INFO, logger="nereid.core.timings"):
+        response = _task(1, timings=True)
+
+    (record,) = caplog.records
+    message = json.loads(JSONLogFormatter().format(record))
+    assert message["timings"] == response["timings"]
@@ -62,3 +62,28 @@ def test_validate_request_context(contexts, key):
 def test_safe_divide(x, y, exp):
     result = utils.safe_divide(x, y)
     assert result == exp
+
+
+@pytest.mark.parametrize(
+    "projection, keep, exp",
+    [
+        (None, [], ["node_id", "TSS_load_lbs", "TSS_conc_mg/l", "area_acres"]),
+        ({"fields": ["area_acres"]}, [], ["node_id", "area_acres"]),
+        (
+            {"include_patterns": ["TSS_*"]},
+            [],
+            ["node_id", "TSS_load_lbs", "TSS_conc_mg/l"],
+        ),
+        ({"fields": ["missing"]}, ["area_acres"], ["node_id", "area_acres"]),
+        (
+            {"fields": [], "include_patterns": ["*_lbs"]},
+            [],
+            ["node_id", "TSS_load_lbs"],
+        ),
+    ],
+)
+def test_project_dicts(projection, keep, exp):
+    dct = {"node_id": "0", "TSS_load_lbs": 1.0, "TSS_conc_mg/l": 2.0, "area_acres": 3.0}
+    result = utils.project_dicts([dct, {**dct, "node_id": "1"}], projection, keep)
+    assert [list(r) for r in result] == [exp, exp]
+    assert [r["node_id"] for r in result] == ["0", "1"]
@@ -1,7 +1,11 @@
 import networkx as nx
+import numpy
 import pytest
 
 from nereid.src.network.algorithms import (
+    AncestorIndex,
+    EulerTourIndex,
+    any_in_intervals,
     find_leafy_branch_larger_than_size,
     get_all_predecessors,
     get_all_successors,
@@ -60,6 +64,92 @@ def test_network_algo_get_all_successors(g):
         assert all(tsort.index(i) > nix for i in succs)
 
 
+def test_network_algo_ancestor_index(g):
+    index = AncestorIndex(g)
+    # query downstream nodes first, so later queries are partly memoized.
+    for node in reversed(list(nx.topological_sort(g))):
+        assert index.ancestors(node) == nx.ancestors(g, node)
+    for node in nx.topological_sort(g):
+        assert index.descendants(node) == nx.descendants(g, node)
+        assert index.descendants(node) is index.descendants(node)
+
+
+def _forest(n_nodes, n_trees):
+    g = nx.DiGraph()
+    for i in range(n_trees):
+        tree = nx.gnr_graph(n_nodes, p=0.0, seed=i)
+        g.update(nx.relabel_nodes(tree, {n: f"{i}-{n}" for n in tree}))
+    g.add_node("isolated")
+    return g
+
+
+@pytest.mark.parametrize("n_nodes, n_trees", [(1, 1), (25, 1), (40, 5)])
+def test_network_algo_euler_tour_index(n_nodes, n_trees):
+    g = _forest(n_nodes, n_trees)
+    index = EulerTourIndex(g)
+
+    assert len(index) == len(g)
+    for node in g:
+        assert set(index.ancestors(node)) == nx.ancestors(g, node)
+        for other in g:
+            assert index.is_upstream(node, other) == (other in nx.descendants(g, node))
+
+    nodes = list(g)
+    for dirty in [nodes[:1], nodes[-3:], nodes[::7], ["not a node"], []]:
+        subset = get_subset(g, dirty)
+        assert index.subset(dirty) == subset
+
+        components = index.subset_components(dirty)
+        expected = nx.weakly_connected_components(g.subgraph(subset))
+        assert sorted(map(sorted, components)) == sorted(map(sorted, expected))
+
+
+def test_network_algo_euler_tour_index_long_chain():
+    n = 5000
+    g = nx.DiGraph(nx.path_graph(n, create_using=nx.DiGraph))
+    index = EulerTourIndex(g)
+
+    assert index.ancestors(n - 1) == list(range(n - 1))[::-1]
+    assert index.is_upstream(0, n - 1)
+    assert index.subset(10) == set(range(9, n))
+
+
+@pytest.mark.parametrize(
+    "edges",
+    [
+        [(0, 1), (0, 2)],  # many out edges
+        [(0, 1), (1, 2), (2, 1)],  # cycle
+    ],
+)
+def test_network_algo_euler_tour_index_invalid(edges):
+    with pytest.raises(nx.NetworkXUnfeasible):
+        EulerTourIndex(nx.DiGraph(edges))
+
+
+def test_network_algo_any_in_intervals():
+    lo, hi = numpy.array([0, 2, 5, 7]), numpy.array([1, 4, 5, 9])
+    assert any_in_intervals(lo, hi, numpy.array([5, 3])).tolist() == [
+        False,
+        True,
+        True,
+        False,
+    ]
+    assert not any_in_intervals(lo, hi, numpy.array([], dtype=int)).any()
+
+
+def test_network_algo_long_chain():
+    # longer than the recursion limit
+    n = 5000
+    g = nx.DiGraph(nx.path_graph(n, create_using=nx.DiGraph))
+
+    assert get_all_predecessors(g, n - 1) == set(range(n - 1))
+    assert get_all_successors(g, 0) == set(range(1, n))
+    assert get_subset(g, [0, 10]) == set(range(n))
+
+    subset = {"a"}
+    assert get_all_successors(g, n - 3, subset=subset) == {"a", n - 2, n - 1}
+
+
 def test_network_algo_get_subset_dag(g):
     for node in g.nodes():
         subset = get_subset(g, node)
@@ -186,6 +276,53 @@ def test_sequential_subgraph_nodes(graph, size):
             assert check_sequential(seqs, ls)
 
 
+@pytest.mark.parametrize("size", [2, 3, 10, 100])
+@pytest.mark.parametrize("n_nodes", [1, 2, 250, 5000])
+def test_sequential_subgraph_nodes_branches(n_nodes, size):
+    g = nx.gnr_graph(n_nodes, p=0.0, seed=42)
+    seqs = sequential_subgraph_nodes(g, size)
+
+    assert bool(seqs) == (n_nodes > 1)
+    if n_nodes <= size:
+        assert seqs == [] or [set(seqs[0])] == [set(g)]
+        return
+
+    seen, outputs = set(), set()
+    for i, seq in enumerate(seqs):
+        *upstream, root = seq
+        sg = g.subgraph(seq)
+
+        # each branch drains to its root, which is last
+        assert nx.is_weakly_connected(sg)
+        assert [n for n, deg in sg.out_degree if deg == 0] == [root]
+        assert len(seq) >= size or i == len(seqs) - 1
+
+        # branches only share the roots of earlier branches
+        assert all(n not in seen or n in outputs for n in upstream)
+        seen.update(seq)
+        outputs.add(root)
+
+    assert seen == set(g)
+
+
+def test_sequential_subgraph_nodes_chain():
+    # longer than the recursion limit
+    n = 5000
+    g = nx.DiGraph(nx.path_graph(n, create_using=nx.DiGraph))
+    seqs = sequential_subgraph_nodes(g, 10)
+
+    assert seqs[0] == list(range(10))
+    assert all(len(seq) == 10 for seq in seqs[:-1])
+    assert seqs[-1][-1] == n - 1
+
+
+def test_sequential_subgraph_nodes_dag():
+    # not a valid network, since nodes have more than one out edge.
+    g = nx.gnc_graph(25, seed=42)
+    seqs = sequential_subgraph_nodes(g, 4)
+    assert {n for seq in seqs for n in seq} == set(g)
+
+
 @pytest.mark.parametrize("size", [1, 3, 5, 10, 100])
 def test_parallel_sequential_subgraph_nodes(graph, size):
     if size == 1:
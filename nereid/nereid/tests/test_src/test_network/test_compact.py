@@ -0,0 +1,102 @@
+import networkx as nx
+import numpy
+import pytest
+
+from nereid.src.network.algorithms import parallel_sequential_subgraph_nodes
+from nereid.src.network.compact import CompactGraph
+from nereid.src.network.utils import graph_factory, nxGraph_to_dict
+
+
+def _graph_dict():
+    return {
+        "directed": True,
+        "multigraph": True,
+        "edges": [
+            {"source": "c", "target": "b"},
+            {"source": "a", "target": "b"},
+            {"source": "b", "target": "d"},
+            {"source": "a", "target": "b"},
+        ],
+        "nodes": [{"id": "e"}, {"id": "a"}],
+    }
+
+
+def test_compact_graph_from_graph_dict():
+    graph = _graph_dict()
+    cg = CompactGraph.from_graph_dict(graph)
+
+    assert cg.ids == list(graph_factory(graph).nodes)
+    assert cg.ids == ["c", "b", "a", "d", "e"]
+    assert cg.src.dtype == numpy.int32
+    assert len(cg) == 5
+    assert cg.number_of_edges() == 4
+
+    b = cg.index["b"]
+    assert cg.labels(cg.predecessors(b)) == ["c", "a", "a"]
+    assert cg.labels(cg.successors(cg.index["a"])) == ["b", "b"]
+    assert cg.out_degrees.tolist() == [1, 1, 2, 0, 0]
+    assert cg.in_degrees.tolist() == [0, 3, 0, 1, 0]
+    assert cg.duplicate_edges().tolist() == [3]
+
+
+@pytest.mark.parametrize("multigraph", [True, False])
+def test_compact_graph_to_networkx(multigraph):
+    graph = _graph_dict()
+    graph["multigraph"] = multigraph
+    g = graph_factory(graph)
+    cg = CompactGraph.from_graph_dict(graph)
+
+    _g = cg.to_networkx()
+    assert list(_g.nodes) == list(g.nodes)
+    assert _g.is_multigraph() == multigraph
+    assert list(_g.edges) == list(g.edges)
+
+    sg = cg.to_networkx([cg.index["b"], cg.index["a"]])
+    assert list(sg.nodes) == ["b", "a"]
+    assert len(sg.edges) == (2 if multigraph else 1)
+
+
+def test_compact_graph_from_networkx():
+    g = nx.gnr_graph(30, 0.1, seed=0)
+    cg = CompactGraph.from_networkx(g)
+
+    assert cg.ids == list(g.nodes)
+    for n in g:
+        assert cg.labels(cg.predecessors(cg.index[n])) == sorted(g.predecessors(n))
+        assert cg.labels(cg.successors(cg.index[n])) == list(g.successors(n))
+
+    assert nx.is_isomorphic(cg.to_networkx(), g)
+
+
+def test_compact_graph_undirected():
+    with pytest.raises(nx.NetworkXNotImplemented):
+        CompactGraph.from_graph_dict({"edges": [{"source": "a", "target": "b"}]})
+
+    with pytest.raises(nx.NetworkXNotImplemented):
+        CompactGraph.from_networkx(nx.path_graph(3))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compact_topological_generations(seed):
+    g = nx.MultiDiGraph(nx.gnc_graph(40, seed=seed))
+    g.add_edges_from(list(g.edges)[:5])
+    cg = CompactGraph.from_networkx(g)
+
+    assert [cg.labels(gen) for gen in cg.topological_generations()] == list(
+        nx.topological_generations(nx.DiGraph(g))
+    )
+
+    g.add_edge(0, 39)
+    with pytest.raises(nx.NetworkXUnfeasible):
+        CompactGraph.from_networkx(g).topological_generations()
+
+
+@pytest.mark.parametrize("size", [2, 4, 10])
+def test_compact_parallel_sequential_subgraph_nodes(size):
+    g = nx.union(nx.gnr_graph(50, 0.1, seed=1), nx.gn_graph(20, seed=2), rename="ab")
+    g.add_node("isolated")
+    cg = CompactGraph.from_graph_dict(nxGraph_to_dict(g))
+
+    assert parallel_sequential_subgraph_nodes(
+        cg, size
+    ) == parallel_sequential_subgraph_nodes(nx.DiGraph(g), size)
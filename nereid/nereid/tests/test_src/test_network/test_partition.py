@@ -0,0 +1,124 @@
+import networkx as nx
+import pytest
+
+from nereid.src.network.partition import (
+    DEFAULT_NODE_COSTS,
+    node_cost,
+    partition_schedule,
+)
+
+
+def _check_schedule(g, schedule, costs=None):
+    costs = costs or {}
+    partitions = schedule["partitions"]
+    solved = {}  # node: partition that solves it
+
+    for i, p in enumerate(partitions):
+        assert p["id"] == i
+        sg = g.subgraph(p["nodes"])
+        assert p["nodes"][-1] in p["roots"]
+        assert all(not set(g.successors(n)) & set(sg) for n in p["roots"])
+
+        # the only nodes solved elsewhere are the roots of the partitions it
+        # depends on, which come before it.
+        inputs = [n for n in p["nodes"] if n in solved]
+        assert sorted({solved[n] for n in inputs}) == p["depends_on"]
+        assert all(d < i for d in p["depends_on"])
+        assert all(sg.in_degree(n) == 0 for n in inputs)
+
+        own = [n for n in p["nodes"] if n not in solved]
+        assert p["cost"] == pytest.approx(sum(costs.get(n, 1) for n in own))
+        solved.update(dict.fromkeys(own, i))
+
+        # nodes are in post-order, so upstream nodes come first.
+        order = {n: k for k, n in enumerate(p["nodes"])}
+        assert all(order[u] < order[v] for u, v in sg.edges)
+
+        stages = [partitions[d]["stage"] for d in p["depends_on"]]
+        assert p["stage"] == 1 + max(stages, default=0)
+
+    assert set(solved) == set(g)
+    assert schedule["total_cost"] == pytest.approx(sum(p["cost"] for p in partitions))
+    path = schedule["critical_path"]
+    assert schedule["critical_path_cost"] == pytest.approx(
+        sum(partitions[i]["cost"] for i in path)
+    )
+    assert all(
+        a in partitions[b]["depends_on"] for a, b in zip(path, path[1:], strict=False)
+    )
+
+
+@pytest.mark.parametrize("n_nodes", [1, 10, 500])
+@pytest.mark.parametrize("n_partitions", [1, 4, 16])
+def test_partition_schedule_tree(n_nodes, n_partitions):
+    g = nx.gnr_graph(n_nodes, p=0.0, seed=42)
+    schedule = partition_schedule(g, n_partitions)
+    _check_schedule(g, schedule)
+
+    if n_partitions == 1:
+        assert len(schedule["partitions"]) == 1
+    # the partitions of a random tree are balanced, and many are solved in parallel.
+    if n_nodes == 500:
+        target = schedule["target_cost"]
+        assert max(p["cost"] for p in schedule["partitions"]) < 3 * target
+        assert schedule["critical_path_cost"] < 0.8 * n_nodes or n_partitions == 1
+
+
+def test_partition_schedule_chain():
+    g = nx.path_graph(5000, create_using=nx.DiGraph)
+    schedule = partition_schedule(g, 10)
+    _check_schedule(g, schedule)
+
+    # a chain cannot be solved in parallel.
+    assert len(schedule["partitions"]) == 10
+    assert schedule["critical_path"] == list(range(10))
+    assert schedule["partitions"][-1]["stage"] == 10
+
+
+def test_partition_schedule_costs():
+    # a tree with two branches, one of which is 10x as costly
+    g = nx.DiGraph()
+    nx.add_path(g, ["a1", "a2", "out"])
+    nx.add_path(g, ["b1", "b2", "out"])
+    costs = {"a1": 10, "a2": 10}
+    schedule = partition_schedule(g, 2, costs)
+    _check_schedule(g, schedule, costs)
+
+    first, *_ = schedule["partitions"]
+    assert first["nodes"] == ["a1", "a2"]
+    assert first["roots"] == ["a2"]
+    assert first["cost"] == 20
+
+
+def test_partition_schedule_small_networks():
+    g = nx.DiGraph()
+    for i in range(20):
+        nx.add_path(g, [f"{i}-a", f"{i}-b"])
+    schedule = partition_schedule(g, 4)
+    _check_schedule(g, schedule)
+
+    assert len(schedule["partitions"]) == 4
+    assert schedule["critical_path_cost"] == 10
+
+
+def test_partition_schedule_invalid():
+    with pytest.raises(ValueError):
+        partition_schedule(nx.DiGraph([(0, 1)]), 0)
+    with pytest.raises(nx.NetworkXUnfeasible):
+        partition_schedule(nx.DiGraph([(0, 1), (0, 2)]), 2)
+    with pytest.raises(nx.NetworkXUnfeasible):
+        partition_schedule(nx.DiGraph([(0, 1), (1, 2), (2, 1), (3, 2)]), 2)
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ({}, 1.0),
+        ({"node_type": "site_based"}, DEFAULT_NODE_COSTS["site_based"]),
+        ({"node_type": "unknown_facility"}, 1.0),
+        ({"node_type": "site_based", "cost": 2}, 2.0),
+        ({"cost": True}, 1.0),
+    ],
+)
+def test_node_cost(data, expected):
+    assert node_cost(data) == expected
@@ -99,6 +99,19 @@ def test_solution_sequence_result(solution_sequence_result):
     assert "graph" in result
     assert "min_branch_size" in result
     assert len(result["solution_sequence"]["parallel"]) == 2
+    assert "schedule" not in result
+
+
+def test_solution_sequence_schedule(subgraph_request_dict):
+    graph = subgraph_request_dict["graph"]
+    result = tasks.solution_sequence(graph, 4, n_partitions=3)
+    schedule = result["schedule"]
+    ids = {n for e in graph["edges"] for n in (e["source"], e["target"])}
+
+    assert schedule["total_cost"] == len(ids)
+    assert schedule["partitions"][schedule["critical_path"][-1]]["stage"] >= 1
+    nodes = {n["id"] for p in schedule["partitions"] for n in p["nodes"]}
+    assert nodes == ids
 
 
 @pytest.mark.skipif(matplotlib is None, reason="optional matplotlib is not installed")
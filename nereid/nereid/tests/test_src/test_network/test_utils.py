@@ -74,6 +74,22 @@ def test_thin_graph_dict_roundtrip_dict_to_dict(graph_dict_isvalid, check):
         assert is_equal_subset(rt_graph_dict[check], graph_dict[check])
 
 
+def test_thin_graph_dict_copies():
+    graph_dict = {
+        "directed": True,
+        "nodes": [{"id": "A", "metadata": {"area": [1.0]}}],
+        "edges": [{"source": "A", "target": "B", "metadata": {"key": 0, "length": 1}}],
+    }
+    _graph_dict = utils.thin_graph_dict(graph_dict)
+
+    assert _graph_dict["nodes"] == [{"id": "A", "metadata": {}}]
+    assert _graph_dict["edges"][0]["metadata"] == {"key": 0}
+
+    # the input is left as it is.
+    assert graph_dict["nodes"][0]["metadata"] == {"area": [1.0]}
+    assert graph_dict["edges"][0]["metadata"] == {"key": 0, "length": 1}
+
+
 def test_thin_graph_dict_roundtrip_graph_to_graph(graph_obj_isvalid):
     graph_obj, isvalid = graph_obj_isvalid
 
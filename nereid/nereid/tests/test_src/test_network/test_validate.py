@@ -51,3 +51,54 @@ def test_validate_network(edgelist, isvalid, result):
 )
 def test_isvalid(g, expected):
     assert expected == is_valid(g)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_validate_network_random(seed):
+    g = nx.MultiDiGraph(nx.random_k_out_graph(12, 2, 0.5, seed=seed))
+    node_cycles, edge_cycles, multiple_outs, duplicate_edges = validate_network(
+        g, max_cycles=10_000
+    )
+
+    expected = {tuple(sorted(c, key=str)) for c in nx.simple_cycles(nx.DiGraph(g))}
+    assert {tuple(c) for c in node_cycles} == expected
+    # the edge cycle is closed, and follows edges of the graph.
+    assert bool(edge_cycles) == bool(expected)
+    edges = {tuple(map(str, e)) for e in g.edges(keys=True)}
+    assert all(tuple(e) in edges for e in edge_cycles)
+    assert all(
+        a[1] == b[0]
+        for a, b in zip(edge_cycles, edge_cycles[1:] + edge_cycles[:1], strict=True)
+    )
+
+    outs = [[str(n), str(d)] for n, d in g.out_degree if d > 1]
+    assert sorted(multiple_outs) == sorted(outs)
+    n_duplicates = len(g.edges) - len(set(g.edges()))
+    assert len(duplicate_edges) == n_duplicates
+    assert not is_valid(g)
+
+
+def test_validate_network_max_cycles():
+    # a complete graph has more simple cycles than could ever be listed.
+    g = nx.complete_graph(60, create_using=nx.DiGraph)
+    g.add_edge(0, "out")
+    node_cycles, edge_cycles, multiple_outs, _ = validate_network(g, max_cycles=5)
+
+    assert len(node_cycles) == 5
+    assert len(edge_cycles) > 1
+    assert len(multiple_outs) == 60
+    assert not is_valid(g)
+
+
+def test_validate_network_rings():
+    g = nx.MultiDiGraph([(0, 1), (1, 2), (2, 0), (3, 3), (4, 5), (5, 4), (2, 6)])
+    node_cycles, *_ = validate_network(g)
+
+    assert sorted(node_cycles) == [[0, 1, 2], [3], [4, 5]]
+
+
+def test_validate_network_undirected():
+    with pytest.raises(nx.NetworkXNotImplemented):
+        validate_network(nx.MultiGraph([("a", "b")]))
+    with pytest.raises(nx.NetworkXNotImplemented):
+        is_valid(nx.MultiGraph([("a", "b")]))
@@ -2,7 +2,10 @@ import numpy
 import pytest
 
 from nereid.core.io import load_ref_data
-from nereid.src.nomograph.interpolators import bisection_search
+from nereid.src.nomograph.interpolators import (
+    bisection_search,
+    bisection_search_array,
+)
 from nereid.src.nomograph.nomo import (
     build_nomo,
     get_flow_nomograph,
@@ -179,6 +182,26 @@ def test_bisection_search(fxn, seek_value, bounds, exp, converges):
     assert abs(exp - value) < 1e-3
 
 
+def test_bisection_search_array():
+    seek = numpy.array([2, 0.5, 8, 30])
+    value, converged = bisection_search_array(
+        lambda x, a: x**a, seek, bounds=(0, 5), args=[2, 2, 3, 2]
+    )
+
+    numpy.testing.assert_allclose(value, [1.414, 0.707, 2, 5], atol=1e-3)
+    assert converged.tolist() == [True, True, True, False]
+
+
+def test_get_x_array_matches_get_x(vol_nomo):
+    nomo = vol_nomo.nomo
+    y = numpy.array([0.0, 0.2, 0.5, 0.8, 0.95, 1.2])
+    t = numpy.array([6, 12, 24, 48, 120, 24])
+
+    x, converged = nomo.get_x_array(y, t)
+    for _x, _converged, _y, _t in zip(x, converged, y, t, strict=True):
+        assert (_x, _converged) == nomo.get_x(_y, _t)
+
+
 @pytest.mark.parametrize(
     "size, ddt, performance, exp",
     [
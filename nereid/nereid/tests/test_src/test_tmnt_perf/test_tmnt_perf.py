@@ -82,3 +82,50 @@ def test_tmnt_task(
         unit = pollutant_units_map[poc]
         results = [eff_fxn(i, unit) for i in check_infs]
         numpy.testing.assert_allclose(results, check_curve)
+
+
+@pytest.mark.parametrize(
+    "tablename", ["tmnt_performance_table", "dry_weather_tmnt_performance_table"]
+)
+@pytest.mark.parametrize(
+    "inf_units", [{}, {"mg/L": "ug/L", "ug/L": "mg/L", "MPN/_100ml": "MPN/l"}]
+)
+def test_effluent_conc_array(contexts, tablename, inf_units):
+    context = contexts["default"]
+    eff_conc_mapping = tasks.effluent_function_map(tablename, context=context)
+    units = {
+        poc: inf_units.get(kwargs["unit"], kwargs["unit"])
+        for (_, poc), kwargs in eff_conc_mapping.facility_dict.items()
+    }
+    coefficients = eff_conc_mapping.coefficients(units.items())
+    assert eff_conc_mapping.coefficients(units.items()) is coefficients
+
+    inf_concs = numpy.concatenate([[0.0, numpy.nan], numpy.geomspace(1e-3, 1e6, 50)])
+    keys = list(eff_conc_mapping)
+    fac, poc = zip(*keys, strict=True)
+
+    inf, f, p = numpy.broadcast_arrays(
+        inf_concs[:, numpy.newaxis],
+        coefficients.facility_codes(fac),
+        coefficients.pollutant_codes(poc),
+    )
+    results = coefficients.effluent_conc_array(inf, f, p)
+
+    expected = [
+        [eff_conc_mapping[k](i, units[k[1]]) for k in keys] for i in inf_concs.tolist()
+    ]
+    numpy.testing.assert_array_equal(results, expected)
+
+
+def test_effluent_conc_array_undefined(eff_conc_mapping):
+    coefficients = eff_conc_mapping.coefficients()
+    fac = coefficients.facility_codes(["Sand Filter", "not a facility"])
+    poc = coefficients.pollutant_codes(["Total Suspended Solids", "not a pollutant"])
+
+    assert fac[1] == poc[1] == -1
+    assert coefficients.is_defined(fac, poc).tolist() == [True, False]
+
+    inf = numpy.array([100.0, 100.0])
+    results = coefficients.effluent_conc_array(inf, fac, poc)
+    assert results[0] < 100
+    assert results[1] == 100
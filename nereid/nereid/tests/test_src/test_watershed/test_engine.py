@@ -0,0 +1,120 @@
+from copy import deepcopy
+
+import pytest
+
+from nereid.src.watershed import engine as engine_module
+from nereid.src.watershed.engine import (
+    WatershedEngine,
+    context_key,
+    engine_cache_clear,
+    get_watershed_engine,
+)
+from nereid.src.watershed.solve_watershed import (
+    initialize_graph,
+    solve_watershed_loading,
+)
+from nereid.src.wq_parameters import init_wq_parameters
+from nereid.tests.utils import check_graph_data_identical
+
+
+@pytest.mark.parametrize("ctx_key", ["default", "default_no_dw_valid"])
+def test_watershed_engine(contexts, ctx_key):
+    context = contexts[ctx_key]
+    original = deepcopy(context)
+
+    engine = WatershedEngine(context)
+
+    assert context == original, "building the engine must not modify the context"
+    assert engine.key == context_key(context)
+    assert engine.version == context["version"]
+
+    wet = init_wq_parameters("land_surface_emc_table", context=deepcopy(context))
+    assert [p["load_col"] for p in engine.wet_weather_parameters] == [
+        p["load_col"] for p in wet
+    ]
+    assert engine.fields.has_dry_weather == bool(engine.dry_weather_parameters)
+    assert set(engine.solver_kwargs) == {
+        "wet_weather_parameters",
+        "wet_weather_facility_performance_map",
+        "nomograph_map",
+        "dry_weather_parameters",
+        "dry_weather_facility_performance_map",
+    }
+
+
+def test_get_watershed_engine_cache(contexts):
+    engine_cache_clear()
+    context = contexts["default"]
+
+    engine = get_watershed_engine(context)
+    assert get_watershed_engine(deepcopy(context)) is engine
+
+    other = deepcopy(context)
+    other["config_date"] = "changed"
+    assert context_key(other) != context_key(context)
+    other_engine = get_watershed_engine(other)
+    assert other_engine is not engine
+    assert other_engine.config_version == "changed"
+
+    # lru eviction drops the oldest engine, and a hit refreshes an engine's age.
+    get_watershed_engine(context, maxsize=2)
+    third = deepcopy(context)
+    third["config_date"] = "third"
+    get_watershed_engine(third, maxsize=2)
+    assert engine_module._engine_cache.keys() == [
+        context_key(context),
+        context_key(third),
+    ]
+
+    engine_cache_clear()
+    assert len(engine_module._engine_cache) == 0
+    assert get_watershed_engine(context) is not engine
+
+
+def test_solve_watershed_with_engine(contexts, watershed_requests):
+    context = contexts["default"]
+    watershed_request = watershed_requests[100, 0.3]
+
+    g, _ = initialize_graph(deepcopy(watershed_request), False, context)
+    ref, _ = initialize_graph(deepcopy(watershed_request), False, context)
+
+    solve_watershed_loading(g, context, engine=WatershedEngine(context))
+    solve_watershed_loading(ref, context)
+
+    check_graph_data_identical(g, ref)
+
+
+def test_solve_watershed_keeps_context(contexts, watershed_requests):
+    engine_cache_clear()
+    context = deepcopy(contexts["default"])
+    original = deepcopy(context)
+    key = context_key(context)
+
+    for _ in range(2):
+        g, _ = initialize_graph(deepcopy(watershed_requests[100, 0.3]), False, context)
+        solve_watershed_loading(g, context)
+
+    assert context == original, "solving must not modify the context"
+    assert context_key(context) == key
+    assert engine_module._engine_cache.keys() == [key]
+
+    # only the engine inputs are part of the key.
+    other = deepcopy(context)
+    other["api_recognize"] = {}
+    assert context_key(other) == key
+    assert get_watershed_engine(other) is get_watershed_engine(context)
+
+
+def test_get_watershed_engine_modified_context(contexts):
+    engine_cache_clear()
+    context = deepcopy(contexts["default"])
+    engine = get_watershed_engine(context)
+
+    # a context that is modified in place after it was used gets a new engine.
+    params = context["project_reference_data"]["land_surface_emc_table"]
+    params["parameters"] = params["parameters"][:1]
+    modified = get_watershed_engine(context)
+
+    assert modified is not engine
+    assert modified.key == context_key(context) != engine.key
+    assert len(modified.wet_weather_parameters) == 1
@@ -0,0 +1,215 @@
+from copy import deepcopy
+
+import numpy
+import pytest
+
+from nereid.src.tmnt_performance.tasks import effluent_function_map
+from nereid.src.watershed.loading import (
+    DRY_WEATHER_VOLUMES,
+    WET_WEATHER_VOLUMES,
+    LoadReductions,
+    check_pollutant_mass_balance,
+    compute_pollutant_load_reduction,
+    compute_pollutant_load_reduction_array,
+    compute_pollutant_load_reductions,
+    pollutant_keys,
+    pollutant_mass_balance_error,
+)
+from nereid.src.wq_parameters import init_wq_parameters
+
+
+@pytest.mark.parametrize(
+    "tablename, volumes",
+    [
+        ("land_surface_emc_table", WET_WEATHER_VOLUMES),
+        ("dry_weather_land_surface_emc_table", DRY_WEATHER_VOLUMES),
+    ],
+)
+def test_pollutant_keys(contexts, tablename, volumes):
+    params = init_wq_parameters(tablename, contexts["default"])
+    keys = pollutant_keys(params, volumes)
+
+    assert pollutant_keys([dict(p) for p in params], volumes) is keys
+    assert len(keys) == len(params) * len(volumes)
+
+    prefix, vol_col = volumes[-1]
+    param = params[-1]
+    assert keys.load[-1] == prefix + param["load_col"]
+    assert keys.vol_treated[-1] == f"{vol_col}_treated"
+    assert keys.outputs["effluent_conc"][-1] == prefix + param["conc_col"] + "_effluent"
+
+
+def test_compute_pollutant_load_reduction_array():
+    rng = numpy.random.default_rng(42)
+    shape = (50, 6)
+
+    vol_inflow = rng.uniform(0, 100, shape)
+    vol_retained, vol_treated = vol_inflow * 0.2, vol_inflow * 0.5
+    vol_bypassed = vol_inflow - vol_retained - vol_treated
+    influent_conc = rng.uniform(0, 10, shape)
+
+    kwargs = {
+        "inflow_load": vol_inflow * influent_conc * 0.1,
+        "influent_conc": influent_conc,
+        "effluent_conc": influent_conc * rng.uniform(0, 1, shape),
+        "vol_bypassed": vol_bypassed,
+        "vol_treated": vol_treated,
+        "vol_retained": vol_retained,
+        "vol_discharged": vol_bypassed + vol_treated,
+        "load": rng.uniform(0, 10, shape),
+        "removed_upstream": rng.uniform(0, 10, shape),
+        "load_to_conc_factor": numpy.full(shape, 10.0),
+        "conc_to_load_factor": numpy.full(shape, 0.1),
+    }
+    kwargs["vol_discharged"][0] = 0.0
+
+    batch = compute_pollutant_load_reduction_array(**kwargs)
+
+    for i in range(shape[0]):
+        row = compute_pollutant_load_reduction_array(
+            **{k: v[i] for k, v in kwargs.items()}
+        )
+        for name, values in row.items():
+            numpy.testing.assert_array_equal(batch[name][i], values)
+
+    numpy.testing.assert_allclose(
+        batch["removed"] + batch["discharged"], kwargs["inflow_load"]
+    )
+    assert (batch["discharged"] <= kwargs["inflow_load"]).all()
+    assert (batch["effluent_conc"][0] == 0).all()
+
+    error = pollutant_mass_balance_error(
+        inflow_load=kwargs["inflow_load"],
+        influent_conc=influent_conc,
+        vol_bypassed=vol_bypassed,
+        vol_treated=vol_treated,
+        vol_retained=vol_retained,
+        released_from_bypassed=batch["released_from_bypassed"],
+        released_from_treated=batch["released_from_treated"],
+        conc_to_load_factor=kwargs["conc_to_load_factor"],
+    )
+    assert not error.any()
+
+
+def test_compute_pollutant_load_reduction(contexts):
+    params = init_wq_parameters("land_surface_emc_table", contexts["default"])
+    keys = pollutant_keys(params)
+
+    data = {
+        "node_warnings": [],
+        "node_errors": [],
+        "runoff_volume_cuft_bypassed": 20.0,
+        "runoff_volume_cuft_treated": 50.0,
+        "runoff_volume_cuft_retained": 30.0,
+        "runoff_volume_cuft_discharged": 70.0,
+    }
+    for param in params:
+        data[param["conc_col"] + "_influent"] = 10.0
+        data[param["load_col"] + "_inflow"] = (
+            100.0 * 10.0 * param["conc_to_load_factor"]
+        )
+
+    def half(inf_conc, inf_unit):
+        return inf_conc / 2
+
+    effluent_function_map = {("Biofiltration", params[0]["long_name"]): half}
+    compute_pollutant_load_reduction(data, keys, effluent_function_map, "Biofiltration")
+
+    assert len(data["node_warnings"]) == len(params) - 1
+    assert data["node_errors"] == []
+
+    first, last = params[0], params[-1]
+    assert data[first["conc_col"] + "_treated_effluent"] == 5.0
+    assert data[first["conc_col"] + "_effluent"] == pytest.approx(45 / 7)
+    assert data[last["conc_col"] + "_effluent"] == pytest.approx(10.0)
+    assert data[last["load_col"] + "_removed"] == pytest.approx(
+        0.3 * data[last["load_col"] + "_inflow"]
+    )
+
+    assert check_pollutant_mass_balance([data, data], keys) == []
+    broken = {**data, keys.outputs["released_from_bypassed"][-1]: 0.0}
+    assert check_pollutant_mass_balance([data, broken], keys) == [
+        (1, f"ERROR: pollutant mass balance error for {keys.load[-1]}")
+    ]
+
+
+@pytest.mark.parametrize("facility_type", ["Biofiltration", "not a facility"])
+def test_compute_pollutant_load_reduction_compiled(contexts, facility_type):
+    context = contexts["default"]
+    params = init_wq_parameters("land_surface_emc_table", context)
+    keys = pollutant_keys(params)
+    eff_map = effluent_function_map("tmnt_performance_table", context=context)
+
+    data = {
+        "node_warnings": [],
+        "node_errors": [],
+        "runoff_volume_cuft_bypassed": 20.0,
+        "runoff_volume_cuft_treated": 50.0,
+        "runoff_volume_cuft_retained": 30.0,
+        "runoff_volume_cuft_discharged": 70.0,
+    }
+    for i, param in enumerate(params):
+        data[param["conc_col"] + "_influent"] = 10.0 * (i + 1)
+        data[param["load_col"] + "_inflow"] = (
+            100.0 * 10.0 * (i + 1) * param["conc_to_load_factor"]
+        )
+
+    compiled, mapped = deepcopy(data), deepcopy(data)
+    compute_pollutant_load_reduction(compiled, keys, eff_map, facility_type)
+    compute_pollutant_load_reduction(mapped, keys, dict(eff_map), facility_type)
+
+    assert compiled == mapped
+
+
+def test_compute_pollutant_load_reductions(contexts):
+    context = contexts["default"]
+    params = init_wq_parameters("land_surface_emc_table", context)
+    keys = pollutant_keys(params)
+    eff_map = effluent_function_map("tmnt_performance_table", context=context)
+    facility_types = ["Biofiltration", "not a facility", "Sand Filter"]
+
+    dictlist = []
+    for n, _ in enumerate(facility_types):
+        data = {
+            "node_warnings": [],
+            "runoff_volume_cuft_bypassed": 20.0 * n,
+            "runoff_volume_cuft_treated": 50.0,
+            "runoff_volume_cuft_retained": 30.0,
+            "runoff_volume_cuft_discharged": 50.0 + 20.0 * n,
+        }
+        for i, param in enumerate(params):
+            data[param["conc_col"] + "_influent"] = 10.0 * (i + n + 1)
+            data[param["load_col"] + "_inflow"] = (
+                (100.0 + 20.0 * n) * 10.0 * (i + n + 1) * param["conc_to_load_factor"]
+            )
+        dictlist.append(data)
+
+    expected = deepcopy(dictlist)
+    for data, facility_type in zip(expected, facility_types, strict=True):
+        compute_pollutant_load_reduction(data, keys, eff_map, facility_type)
+
+    batch = deepcopy(dictlist)
+    compute_pollutant_load_reductions(batch, keys, eff_map, facility_types)
+    assert batch == expected
+
+    # deferred units warn where they would have right away, even if their warnings
+    # list is replaced before the load reductions are computed.
+    deferred = deepcopy(dictlist)
+    load_reductions = LoadReductions()
+    for data, facility_type in zip(deferred, facility_types, strict=True):
+        compute_pollutant_load_reduction(
+            data, keys, eff_map, facility_type, load_reductions
+        )
+    warnings = deferred[1]["node_warnings"]
+    deferred[1]["node_warnings"] = []
+
+    totals = []
+    load_reductions.then(lambda: totals.append(deferred[0][keys.outputs["removed"][0]]))
+    assert keys.outputs["removed"][0] not in deferred[0]
+
+    load_reductions.compute()
+    assert warnings == expected[1]["node_warnings"] != []
+    assert deferred[1]["node_warnings"] == []
+    deferred[1]["node_warnings"] = warnings
+    assert deferred == expected
+    assert totals == [expected[0][keys.outputs["removed"][0]]]
@@ -0,0 +1,213 @@
+from copy import deepcopy
+
+import networkx as nx
+import numpy
+import pytest
+
+from nereid.src.watershed.node_state import NodeStateFields
+from nereid.src.watershed.solve_watershed import (
+    initialize_graph,
+    is_treatment_node_type,
+    solve_watershed_loading,
+    solve_watershed_state,
+    treatment_free_nodes,
+)
+from nereid.src.wq_parameters import init_wq_parameters
+from nereid.tests.utils import (
+    check_graph_data_equal,
+    check_graph_data_identical,
+    solve_watershed_loading_by_node,
+)
+
+
+@pytest.mark.parametrize("ctx_key", ["default", "default_no_dw_valid"])
+def test_node_state_fields(contexts, ctx_key):
+    context = contexts[ctx_key]
+    wet = init_wq_parameters("land_surface_emc_table", context=context)
+    dry = init_wq_parameters("dry_weather_land_surface_emc_table", context=context)
+
+    fields = NodeStateFields(wet, dry)
+
+    assert len(fields.names) == len(set(fields.names)) == len(fields)
+    assert all(fields.names[fields[n]] == n for n in fields.names)
+    assert set(fields.output_fields) <= set(fields.names)
+
+    assert len(fields.wet_loads.load) == len(wet)
+    assert fields.has_dry_weather == bool(dry)
+    assert len(fields.dry_loads.load) == 2 * len(dry)
+    for p in wet:
+        assert p["load_col"] in fields
+        assert p["conc_col"] + "_influent" in fields
+
+
+def test_node_state_from_graph(contexts, watershed_graph, initial_node_data):
+    g, data = watershed_graph, deepcopy(initial_node_data)
+    context = contexts["default"]
+    nx.set_node_attributes(g, data)
+
+    state = solve_watershed_state(g, context)
+
+    # the graph is not changed until the node data is updated
+    assert all("_visited" not in dct for _, dct in g.nodes(data=True))
+
+    order = {n: i for i, n in enumerate(state.nodes)}
+    assert all(order[u] < order[v] for u, v in g.edges())
+    assert state.is_leaf.sum() == sum(1 for n in g if g.in_degree(n) == 0)
+
+    outfall = state.index["0"]
+    for single, total in [
+        ("eff_area_acres", "eff_area_acres_total_cumul"),
+        ("runoff_volume_cuft", "runoff_volume_cuft_total_discharged"),
+        ("TSS_load_lbs", "TSS_load_lbs_total_discharged"),
+        ("summer_dwTSS_load_lbs", "summer_dwTSS_load_lbs_total_discharged"),
+    ]:
+        assert state[total][outfall] == pytest.approx(state[single].sum(), rel=1e-12)
+
+    state.update_node_data()
+    assert all(dct["_visited"] for _, dct in g.nodes(data=True))
+    assert isinstance(g.nodes["0"]["_has_upstream_vol_storage"], bool)
+
+
+def test_node_state_row_roundtrip(contexts, watershed_graph, initial_node_data):
+    g, data = watershed_graph, deepcopy(initial_node_data)
+    context = contexts["default"]
+    nx.set_node_attributes(g, data)
+
+    state = solve_watershed_state(g, context)
+    i = state.index["0"]
+    row = state.node_row(i)
+    values = state.values[i].copy()
+    state.set_row(i, row)
+
+    numpy.testing.assert_array_equal(values, state.values[i])
+    assert state.rows[i] is row
+
+
+def test_node_state_generations(contexts, watershed_requests):
+    context = contexts["default"]
+    g, _ = initialize_graph(deepcopy(watershed_requests[500, 0.3]), False, context)
+    state = solve_watershed_state(g, context)
+
+    generations = list(nx.topological_generations(g))
+    assert len(state.generations) == len(generations)
+    for (start, stop), gen in zip(state.generations, generations, strict=True):
+        assert set(state.nodes[start:stop]) == set(gen)
+
+    # edges are sorted by target, then by source node id
+    assert numpy.all(numpy.diff(state.edge_dst) >= 0)
+    assert len(state.edge_src) == g.number_of_edges()
+    for i in range(len(state)):
+        mask = state.edge_dst == i
+        numpy.testing.assert_array_equal(state.edge_src[mask], state.predecessors[i])
+
+    for start, stop in state.generations[1:]:
+        upstream = state.upstream_block(numpy.arange(start, stop))
+        for r, i in enumerate(range(start, stop)):
+            numpy.testing.assert_array_equal(upstream[r], state.upstream(i))
+
+
+def test_solve_watershed_state_mode(contexts, watershed_graph):
+    with pytest.raises(ValueError, match="mode"):
+        solve_watershed_state(watershed_graph, contexts["default"], mode="¯\\_(ツ)_/¯")
+
+
+@pytest.mark.parametrize("mode", ["generation", "node"])
+@pytest.mark.parametrize("ctx_key", ["default", "default_no_dw_valid"])
+@pytest.mark.parametrize("n_nodes, pct_tmnt", [(100, 0), (100, 0.3), (500, 0.6)])
+def test_solve_watershed_state_matches_solve_node(
+    contexts, watershed_requests, ctx_key, n_nodes, pct_tmnt, mode
+):
+    context = contexts[ctx_key]
+    watershed_request = deepcopy(watershed_requests[n_nodes, pct_tmnt])
+
+    g, _ = initialize_graph(deepcopy(watershed_request), False, context)
+    ref, _ = initialize_graph(deepcopy(watershed_request), False, context)
+
+    solve_watershed_loading(g, context, mode=mode)
+    solve_watershed_loading_by_node(ref, context)
+
+    check_graph_data_identical(ref, g)
+
+
+def test_node_state_post_order(contexts, watershed_requests):
+    context = contexts["default"]
+    g, _ = initialize_graph(deepcopy(watershed_requests[500, 0.3]), False, context)
+    state = solve_watershed_state(g, context)
+
+    position, size = state.post_order
+    assert sorted(position) == list(range(len(state)))
+
+    order = numpy.argsort(position)
+    for i, node in enumerate(state.nodes):
+        subtree = order[position[i] - size[i] + 1 : position[i] + 1]
+        expected = nx.ancestors(g, node) | {node}
+        assert {state.nodes[j] for j in subtree} == expected
+
+    sums = state.subtree_sums(
+        numpy.arange(len(state)), state.values[:, [state.fields["eff_area_acres"]]]
+    )
+    outfall = state.index["0"]
+    assert sums[outfall, 0] == pytest.approx(
+        state["eff_area_acres"].sum() - state["eff_area_acres"][outfall]
+    )
+
+
+def test_treatment_free_nodes(contexts, watershed_requests):
+    context = contexts["default"]
+    g, _ = initialize_graph(deepcopy(watershed_requests[500, 0.3]), False, context)
+    state = solve_watershed_state(g, context, mode="node")
+
+    is_treatment = numpy.array(
+        [
+            is_treatment_node_type(str(d.get("node_type") or "virtual"))
+            for d in state.data
+        ]
+    )
+    rows, mask = treatment_free_nodes(state, is_treatment)
+    assert 0 < len(rows) < (~state.is_leaf).sum()
+
+    blocking = {
+        n for i, n in enumerate(state.nodes) if not state.is_leaf[i] and is_treatment[i]
+    }
+    for i, node in enumerate(state.nodes):
+        upstream = nx.ancestors(g, node) | {node}
+        expected = not state.is_leaf[i] and not (upstream & blocking)
+        assert (i in set(rows.tolist())) == expected
+        if expected:
+            assert all(mask[state.index[n]] for n in upstream)
+
+
+@pytest.mark.parametrize("ctx_key", ["default", "default_no_dw_valid"])
+@pytest.mark.parametrize("n_nodes, pct_tmnt", [(100, 0), (100, 0.3), (500, 0.6)])
+def test_solve_watershed_state_subtree_mode(
+    contexts, watershed_requests, ctx_key, n_nodes, pct_tmnt
+):
+    context = contexts[ctx_key]
+    watershed_request = deepcopy(watershed_requests[n_nodes, pct_tmnt])
+
+    g, _ = initialize_graph(deepcopy(watershed_request), False, context)
+    ref, _ = initialize_graph(deepcopy(watershed_request), False, context)
+
+    solve_watershed_loading(g, context, mode="subtree")
+    solve_watershed_loading_by_node(ref, context)
+
+    # the closed form sums in a different order
+    assert all(set(g.nodes[n]) == set(ref.nodes[n]) for n in g)
+    check_graph_data_equal(ref, g)
+
+
+def test_solve_watershed_state_subtree_mode_needs_forest(
+    contexts, watershed_graph, initial_node_data
+):
+    g, data = watershed_graph, deepcopy(initial_node_data)
+    context = contexts["default"]
+
+    # networks with multiple out edges are invalid, but they are still solved.
+    g.add_edge("5", "1")
+    nx.set_node_attributes(g, data)
+
+    ref = deepcopy(g)
+    solve_watershed_loading(g, context, mode="subtree")
+    solve_watershed_loading(ref, context, mode="generation")
+
+    check_graph_data_identical(ref, g)
@@ -0,0 +1,70 @@
+from copy import deepcopy
+
+import numpy
+import pytest
+
+from nereid.src.network.utils import graph_factory
+from nereid.src.watershed.profiling import PROFILE_BIN_EDGES, NodeProfile
+from nereid.src.watershed.solve_watershed import (
+    initialize_watershed,
+    solve_watershed_loading,
+)
+
+
+@pytest.fixture
+def watershed_graph(contexts, watershed_requests):
+    context = contexts["default"]
+    watershed = deepcopy(watershed_requests[100, 0.3])
+    plan, node_data, _ = initialize_watershed(watershed, False, context)
+    g = graph_factory(watershed["graph"])
+    for n in plan.nodes:
+        g.nodes[n].update(node_data[n])
+    return g, context
+
+
+@pytest.mark.parametrize("mode", ["subtree", "generation", "node"])
+def test_solve_watershed_loading_profile(watershed_graph, mode):
+    g, context = watershed_graph
+    profile = NodeProfile()
+    solve_watershed_loading(g, context, mode=mode, profile=profile)
+
+    solved = [n for n in g if g.in_degree(n) > 0]
+    assert sorted(profile.node_ids) == sorted(solved)
+    assert (profile.node_seconds > 0).all()
+
+    histogram = profile.histogram()
+    assert sum(dct["count"] for dct in histogram) == len(solved)
+    assert all(sum(dct["bins"]) == dct["count"] for dct in histogram)
+    assert all(len(dct["bins"]) == len(PROFILE_BIN_EDGES) for dct in histogram)
+    assert [dct["total_s"] for dct in histogram] == sorted(
+        [dct["total_s"] for dct in histogram], reverse=True
+    )
+
+    node_types = {g.nodes[n].get("node_type") or "virtual" for n in solved}
+    assert {dct["node_type"] for dct in histogram} == node_types
+    assert any(
+        dct["status"] is not None and dct["status"].startswith("successful")
+        for dct in histogram
+    )
+
+    slowest = profile.slowest(5)
+    assert len(slowest) == 5
+    assert slowest[0]["seconds"] == profile.node_seconds.max()
+    assert slowest[0]["node_id"] in solved
+
+    report = profile.to_dict(top_n=3)
+    assert len(report["slowest"]) == 3
+    assert report["total_s"] == pytest.approx(profile.node_seconds.sum())
+
+
+def test_node_profile_add():
+    profile = NodeProfile(bin_edges=[0.0, 1.0])
+    profile.seconds = numpy.zeros(4)
+    profile.solved = numpy.zeros(4, dtype=bool)
+
+    profile.add(numpy.array([0, 1]), 3.0)
+    profile.add(1, 0.5)
+    profile.add(numpy.array([], dtype=int), 1.0)
+
+    numpy.testing.assert_array_equal(profile.seconds, [1.5, 2.0, 0.0, 0.0])
+    numpy.testing.assert_array_equal(profile.solved, [True, True, False, False])
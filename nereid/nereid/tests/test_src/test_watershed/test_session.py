@@ -0,0 +1,159 @@
+from copy import deepcopy
+
+import pytest
+
+from nereid.core.config import settings
+from nereid.core.session_store import get_session_store
+from nereid.src.watershed import tasks
+from nereid.src.watershed.session import apply_watershed_delta, session_watershed
+from nereid.src.watershed.tasks import (
+    create_watershed_session,
+    solve_watershed,
+    update_watershed_session,
+)
+from nereid.tests.utils import check_subgraph_response_equal
+
+
+@pytest.fixture
+def session_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_DB_PATH", str(tmp_path / "s.sqlite"))
+
+
+def test_apply_watershed_delta(watershed_requests):
+    watershed = session_watershed(watershed_requests[100, 0.3])
+    edge = watershed["graph"]["edges"][0]
+    land_surface = deepcopy(watershed["land_surfaces"][0])
+    facility_node = watershed["treatment_facilities"][0]["node_id"]
+
+    land_surface["area_acres"] = 42.0
+    delta = {
+        "remove_edges": [edge],
+        "add_edges": [{"source": edge["source"], "target": "new"}],
+        "land_surfaces": [land_surface],
+        "remove_treatment_facilities": [facility_node],
+    }
+    updated, dirty = apply_watershed_delta(watershed, delta)
+
+    assert edge not in updated["graph"]["edges"]
+    assert edge in watershed["graph"]["edges"], "the input must not change"
+    assert set(dirty) == {
+        edge["source"],
+        edge["target"],
+        "new",
+        land_surface["node_id"],
+        facility_node,
+    }
+
+    node_surfaces = [
+        dct
+        for dct in updated["land_surfaces"]
+        if dct["node_id"] == land_surface["node_id"]
+    ]
+    assert node_surfaces == [land_surface]
+    assert facility_node not in {
+        dct["node_id"] for dct in updated["treatment_facilities"]
+    }
+
+
+def test_watershed_session(contexts, watershed_requests, session_db):
+    context = contexts["default"]
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+
+    created = create_watershed_session(deepcopy(watershed_request), False, context)
+    session_id = created["session_id"]
+    assert session_id is not None
+    assert len(created["results"]) + len(created["leaf_results"]) == 100
+
+    facility = deepcopy(watershed_request["treatment_facilities"][0])
+    facility["captured_pct"] = 50
+    facility["retained_pct"] = 10
+    facility["total_volume_cuft"] = facility.get("total_volume_cuft", 0) * 2
+
+    delta = {"treatment_facilities": [facility]}
+    updated = update_watershed_session(session_id, delta, False, context)
+
+    watershed_request["treatment_facilities"][0] = facility
+    expected = solve_watershed(deepcopy(watershed_request), False, context)
+    expected_results = expected["results"] + expected["leaf_results"]
+
+    results = updated["results"] + updated["leaf_results"]
+    assert updated["session_id"] == session_id
+    assert facility["node_id"] in {dct["node_id"] for dct in results}
+    assert len(results) < 100
+    check_subgraph_response_equal(results, expected_results)
+
+    # a second delta is solved on top of the first one.
+    land_surface = deepcopy(watershed_request["land_surfaces"][0])
+    land_surface["area_acres"] *= 2
+    updated = update_watershed_session(
+        session_id, {"land_surfaces": [land_surface]}, False, context
+    )
+
+    watershed_request["land_surfaces"] = [
+        dct
+        for dct in watershed_request["land_surfaces"]
+        if dct["node_id"] != land_surface["node_id"]
+    ] + [land_surface]
+    expected = solve_watershed(deepcopy(watershed_request), False, context)
+    check_subgraph_response_equal(
+        updated["results"] + updated["leaf_results"],
+        expected["results"] + expected["leaf_results"],
+    )
+
+
+def test_watershed_session_errors(contexts, watershed_requests, session_db):
+    response = update_watershed_session("missing", {}, False, contexts["default"])
+    assert response["session_id"] is None
+    assert "does not exist" in response["errors"][0]
+
+    created = create_watershed_session(
+        deepcopy(watershed_requests[50, 0]), False, contexts["default"]
+    )
+    other = deepcopy(contexts["default"])
+    other["region"] = "other"
+    response = update_watershed_session(created["session_id"], {}, False, other)
+    assert "belongs to" in response["errors"][0]
+
+
+@pytest.mark.parametrize("attempts", [1, 3])
+def test_watershed_session_interleaved_updates(
+    contexts, watershed_requests, session_db, monkeypatch, attempts
+):
+    context = contexts["default"]
+    watershed_request = deepcopy(watershed_requests[100, 0.3])
+    session_id = create_watershed_session(deepcopy(watershed_request), False, context)[
+        "session_id"
+    ]
+
+    # deltas replace every land surface of a node, so these are on two nodes.
+    surfaces = {dct["node_id"]: dct for dct in watershed_request["land_surfaces"]}
+    first, second = deepcopy(list(surfaces.values())[:2])
+    first["area_acres"] *= 2
+    second["area_acres"] *= 3
+
+    # the second update is stored while the first one is solved.
+    interleaved: list = []
+
+    def solve_with_interleaved_update(*args, **kwargs):
+        if not interleaved:
+            interleaved.append(None)
+            interleaved[0] = update_watershed_session(
+                session_id, {"land_surfaces": [second]}, False, context
+            )
+        return solve_watershed(*args, **kwargs)
+
+    monkeypatch.setattr(tasks, "SESSION_UPDATE_ATTEMPTS", attempts)
+    monkeypatch.setattr(tasks, "solve_watershed", solve_with_interleaved_update)
+    response = update_watershed_session(
+        session_id, {"land_surfaces": [first]}, False, context
+    )
+
+    assert interleaved[0]["errors"] == []
+    land_surfaces = get_session_store().get(session_id)["watershed"]["land_surfaces"]
+    if attempts == 1:
+        assert "please retry" in response["errors"][0]
+        assert first not in land_surfaces
+    else:
+        assert response["session_id"] == session_id
+        assert first in land_surfaces
+    assert second in land_surfaces
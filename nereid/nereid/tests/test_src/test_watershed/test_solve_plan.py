@@ -0,0 +1,186 @@
+from copy import deepcopy
+
+import networkx as nx
+import numpy
+import pytest
+
+from nereid.src.network.algorithms import get_subset
+from nereid.src.network.compact import CompactGraph
+from nereid.src.network.utils import graph_factory
+from nereid.src.watershed import solve_plan as solve_plan_module
+from nereid.src.watershed.solve_plan import (
+    LOADING,
+    TREATMENT_FACILITY,
+    TREATMENT_SITE,
+    SolvePlan,
+    get_solve_plan,
+    node_strategy,
+    plan_cache_clear,
+    plan_key,
+)
+from nereid.src.watershed.solve_watershed import (
+    initialize_graph,
+    initialize_watershed,
+    solve_watershed_loading,
+)
+from nereid.src.watershed.tasks import solve_watershed
+
+
+def test_plan_key(watershed_requests):
+    graph = watershed_requests[100, 0.3]["graph"]
+    key = plan_key(graph)
+
+    other = deepcopy(graph)
+    for dct in other["nodes"]:
+        dct["metadata"] = {"ignored": True}
+    assert plan_key(other) == key
+
+    other["edges"] = other["edges"][:-1]
+    assert plan_key(other) != key
+
+    other = deepcopy(graph)
+    other["directed"] = not graph.get("directed", False)
+    assert plan_key(other) != key
+
+
+def test_get_solve_plan_cache(watershed_requests):
+    plan_cache_clear()
+    graph = watershed_requests[100, 0.3]["graph"]
+
+    plan = get_solve_plan(graph)
+    assert get_solve_plan(deepcopy(graph)) is plan
+    assert len(solve_plan_module._plan_cache) == 1
+
+    g = nx.DiGraph(graph_factory(graph))
+    assert plan.is_valid
+    assert plan.graph_nodes == list(g.nodes)
+    assert plan.nodes == [n for gen in nx.topological_generations(g) for n in gen]
+    for i, n in enumerate(plan.nodes):
+        assert [plan.nodes[p] for p in plan.predecessors[i]] == sorted(
+            g.predecessors(n)
+        )
+        assert [plan.nodes[s] for s in plan.successors[i]] == sorted(g.successors(n))
+        assert plan.is_leaf[i] == (g.in_degree(n) == 0)
+
+    plan_cache_clear()
+    assert get_solve_plan(graph) is not plan
+
+
+def test_solve_plan_invalid_graph():
+    graph = {
+        "directed": True,
+        "edges": [
+            {"source": "0", "target": "1"},
+            {"source": "1", "target": "0"},
+            {"source": "2", "target": "1"},
+        ],
+    }
+    plan = SolvePlan.from_graph(graph_factory(graph))
+
+    assert not plan.is_valid
+    assert "node_cycles" in plan.errors[0]
+    assert plan.cycle_error is not None
+    assert plan.graph_nodes == ["0", "1", "2"]
+    with pytest.raises(nx.NetworkXUnfeasible):
+        plan.check_solvable()
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("extra_edges", [[], [(0, 5), (0, 5)], [(0, 9)]])
+def test_solve_plan_from_compact(seed, extra_edges):
+    g = nx.MultiDiGraph(nx.gnr_graph(30, 0.1, seed=seed))
+    g.add_edges_from(extra_edges)
+    g = nx.relabel_nodes(g, lambda n: f"n{n}")
+    expected = SolvePlan.from_graph(g)
+    plan = SolvePlan.from_compact(CompactGraph.from_networkx(g))
+
+    assert plan.nodes == expected.nodes
+    assert plan.graph_nodes == expected.graph_nodes
+    assert plan.errors == expected.errors
+    assert plan.cycle_error == expected.cycle_error
+    for a, b in zip(plan.predecessors, expected.predecessors, strict=True):
+        assert numpy.array_equal(a, b)
+    for a, b in zip(plan.successors, expected.successors, strict=True):
+        assert numpy.array_equal(a, b)
+
+
+@pytest.mark.parametrize(
+    "node_type, strategy",
+    [
+        (None, LOADING),
+        ("land_surface", LOADING),
+        ("site_based", TREATMENT_SITE),
+        ("volume_based_facility", TREATMENT_FACILITY),
+        ("dry_weather_diversion_low_flow_facility", TREATMENT_FACILITY),
+    ],
+)
+def test_node_strategy(node_type, strategy):
+    assert node_strategy(node_type) == strategy
+
+
+def test_plan_strategies(watershed_requests):
+    graph = watershed_requests[100, 0.3]["graph"]
+    plan = SolvePlan.from_graph(graph_factory(graph))
+
+    data = [{"node_type": "land_surface"} for _ in plan.nodes]
+    data[-1]["node_type"] = "volume_based_facility"
+
+    strategies = plan.strategies(data)
+    assert strategies[-1] == TREATMENT_FACILITY
+    assert numpy.all(strategies[:-1] == LOADING)
+    assert plan.strategies(deepcopy(data)) is strategies
+
+    data[0]["node_type"] = "site_based"
+    assert plan.strategies(data)[0] == TREATMENT_SITE
+
+
+@pytest.mark.parametrize("pct_tmnt", [0, 0.3])
+def test_initialize_watershed(contexts, watershed_requests, pct_tmnt):
+    context = contexts["default"]
+    watershed_request = watershed_requests[100, pct_tmnt]
+
+    g, graph_errors = initialize_graph(deepcopy(watershed_request), False, context)
+    plan, node_data, errors = initialize_watershed(
+        deepcopy(watershed_request), False, context
+    )
+
+    assert errors == graph_errors
+    assert list(node_data) == list(g.nodes)
+    for n, dct in g.nodes(data=True):
+        assert node_data[n] == dct
+
+
+def test_solve_watershed_reuses_plan(contexts, watershed_requests):
+    plan_cache_clear()
+    context = contexts["default"]
+    watershed_request = watershed_requests[100, 0.3]
+
+    cold = solve_watershed(deepcopy(watershed_request), False, context)
+    warm = solve_watershed(deepcopy(watershed_request), False, context)
+    assert len(solve_plan_module._plan_cache) == 1
+
+    g, _ = initialize_graph(deepcopy(watershed_request), False, context)
+    solve_watershed_loading(g, context)
+    expected = [dct for _, dct in g.nodes(data=True)]
+
+    for response in [cold, warm]:
+        results = response["results"] + response["leaf_results"]
+        assert len(results) == len(expected)
+        by_id = {dct["node_id"]: dct for dct in results}
+        for dct in expected:
+            assert by_id[dct["node_id"]].keys() == dct.keys()
+            assert numpy.allclose(
+                [v for v in by_id[dct["node_id"]].values() if isinstance(v, float)],
+                [v for v in dct.values() if isinstance(v, float)],
+                equal_nan=True,
+            )
+
+
+def test_plan_subset(watershed_requests, watershed_test_case):
+    n_nodes, pct_tmnt, dirty_nodes = watershed_test_case
+    graph = watershed_requests[n_nodes, pct_tmnt]["graph"]
+    g = nx.DiGraph(graph_factory(graph))
+    plan = SolvePlan.from_graph(g)
+
+    assert plan.subset(dirty_nodes) == get_subset(g, dirty_nodes)
+    assert plan.subset(["not a node"]) == set()
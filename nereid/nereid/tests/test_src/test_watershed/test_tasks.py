@@ -6,7 +6,12 @@ import pytest
 
 from nereid.src.network.algorithms import get_subset
 from nereid.src.network.utils import graph_factory, nxGraph_to_dict
-from nereid.src.watershed.tasks import solve_watershed
+from nereid.src.watershed.tasks import (
+    iter_watershed_response,
+    solve_watershed,
+    solve_watershed_scenarios,
+    solve_watershed_stream,
+)
 from nereid.tests.utils import check_subgraph_response_equal
 
 
@@ -310,3 +315,216 @@ def test_cistern_facility_waterbalance(
     # way long ddts are the same as zero if there are dry weather inflows.
     assert 0 == treatment_results_xlong["retention_ddt_hr"], treatment_results_xlong
     assert 0 == treatment_results_xlong["retained_pct"], treatment_results_xlong
+
+
+def test_solve_watershed_dirty_nodes(contexts, watershed_requests, watershed_test_case):
+    n_nodes, pct_tmnt, dirty_nodes = watershed_test_case
+    watershed_request = deepcopy(watershed_requests[(n_nodes, pct_tmnt)])
+    context = contexts["default"]
+    response_dict = solve_watershed(
+        watershed=deepcopy(watershed_request),
+        treatment_pre_validated=False,
+        context=context,
+    )
+    results = response_dict["results"] + response_dict["leaf_results"]
+
+    new_request = deepcopy(watershed_request)
+    new_request["previous_results"] = results
+    new_request["dirty_nodes"] = dirty_nodes
+
+    dirty_response_dict = solve_watershed(
+        watershed=new_request,
+        treatment_pre_validated=False,
+        context=context,
+    )
+    dirty_results = dirty_response_dict["results"] + dirty_response_dict["leaf_results"]
+
+    g = nx.DiGraph(graph_factory(watershed_request["graph"]))
+    changed = set(dirty_nodes) | {d for n in dirty_nodes for d in nx.descendants(g, n)}
+
+    assert not any("dirty_nodes" in w for w in dirty_response_dict["warnings"])
+    assert {dct["node_id"] for dct in dirty_results} == changed
+    check_subgraph_response_equal(dirty_results, results)
+
+
+def test_solve_watershed_dirty_nodes_changed_input(contexts, watershed_requests):
+    watershed_request = deepcopy(watershed_requests[(100, 0.3)])
+    context = contexts["default"]
+    response_dict = solve_watershed(
+        watershed=deepcopy(watershed_request),
+        treatment_pre_validated=False,
+        context=context,
+    )
+    previous_results = response_dict["results"] + response_dict["leaf_results"]
+
+    land_surface = watershed_request["land_surfaces"][0]
+    land_surface["area_acres"] *= 2
+    land_surface["imp_area_acres"] *= 2
+
+    expected_dict = solve_watershed(
+        watershed=deepcopy(watershed_request),
+        treatment_pre_validated=False,
+        context=context,
+    )
+    expected = expected_dict["results"] + expected_dict["leaf_results"]
+
+    new_request = deepcopy(watershed_request)
+    new_request["previous_results"] = previous_results
+    new_request["dirty_nodes"] = [land_surface["node_id"]]
+
+    dirty_response_dict = solve_watershed(
+        watershed=new_request,
+        treatment_pre_validated=False,
+        context=context,
+    )
+    dirty_results = dirty_response_dict["results"] + dirty_response_dict["leaf_results"]
+
+    assert land_surface["node_id"] in {dct["node_id"] for dct in dirty_results}
+    assert len(dirty_results) < len(expected)
+    check_subgraph_response_equal(dirty_results, expected)
+
+
+def test_solve_watershed_dirty_nodes_missing_previous_results(
+    contexts, watershed_requests
+):
+    watershed_request = deepcopy(watershed_requests[(100, 0.3)])
+    watershed_request["dirty_nodes"] = ["0"]
+
+    response_dict = solve_watershed(
+        watershed=watershed_request,
+        treatment_pre_validated=False,
+        context=contexts["default"],
+    )
+
+    assert any("dirty_nodes" in w for w in response_dict["warnings"])
+    results = response_dict["results"] + response_dict["leaf_results"]
+    assert len(results) == 100
+
+
+@pytest.mark.parametrize("n_nodes", [100, 500])
+def test_solve_watershed_scenarios(contexts, watershed_requests, n_nodes):
+    watershed_request = deepcopy(watershed_requests[(n_nodes, 0.3)])
+    context = contexts["default"]
+    facilities = watershed_request["treatment_facilities"]
+    treated = {dct["node_id"] for dct in facilities}
+    untreated = sorted(
+        n["id"] for n in watershed_request["graph"]["nodes"] if n["id"] not in treated
+    )
+
+    # swap the facilities of two nodes, and add a facility to an untreated node.
+    swapped = [
+        {**facilities[0], "node_id": facilities[1]["node_id"]},
+        {**facilities[1], "node_id": facilities[0]["node_id"]},
+    ]
+    added = [{**facilities[2], "node_id": untreated[0]}]
+    scenarios = [
+        {"scenario_id": "swapped", "treatment_facilities": swapped},
+        {"scenario_id": "added", "treatment_facilities": added},
+        {"scenario_id": "empty", "treatment_facilities": []},
+    ]
+
+    response_dict = solve_watershed_scenarios(
+        watershed={**deepcopy(watershed_request), "scenarios": deepcopy(scenarios)},
+        treatment_pre_validated=False,
+        context=context,
+    )
+    base_dict = solve_watershed(
+        watershed=deepcopy(watershed_request),
+        treatment_pre_validated=False,
+        context=context,
+    )
+    base_results = base_dict["results"] + base_dict["leaf_results"]
+    results = response_dict["results"] + response_dict["leaf_results"]
+    assert len(results) == len(base_results)
+    check_subgraph_response_equal(results, base_results)
+
+    g = nx.DiGraph(graph_factory(watershed_request["graph"]))
+    for scenario, scenario_dict in zip(
+        scenarios, response_dict["scenarios"], strict=True
+    ):
+        assert scenario_dict["scenario_id"] == scenario["scenario_id"]
+        assert scenario_dict["errors"] == []
+
+        overrides = {dct["node_id"]: dct for dct in scenario["treatment_facilities"]}
+        changed = set(overrides) | {d for n in overrides for d in nx.descendants(g, n)}
+        scenario_results = scenario_dict["results"] + scenario_dict["leaf_results"]
+        assert {dct["node_id"] for dct in scenario_results} == changed
+
+        request = deepcopy(watershed_request)
+        request["treatment_facilities"] = [
+            dct for dct in facilities if dct["node_id"] not in overrides
+        ] + list(overrides.values())
+        expected_dict = solve_watershed(
+            watershed=request,
+            treatment_pre_validated=False,
+            context=context,
+        )
+        expected = expected_dict["results"] + expected_dict["leaf_results"]
+        check_subgraph_response_equal(scenario_results, expected)
+        check_subgraph_response_equal(
+            [dct for dct in expected if dct["node_id"] in changed], scenario_results
+        )
+
+
+@pytest.mark.parametrize("dirty", [False, True])
+def test_solve_watershed_stream(contexts, watershed_requests, dirty):
+    watershed_request = deepcopy(watershed_requests[(100, 0.3)])
+    context = contexts["default"]
+    response_dict = solve_watershed(deepcopy(watershed_request), False, context)
+    results = response_dict["results"] + response_dict["leaf_results"]
+
+    if dirty:
+        watershed_request["previous_results"] = results
+        watershed_request["dirty_nodes"] = ["3", "7"]
+        response_dict = solve_watershed(deepcopy(watershed_request), False, context)
+
+    items = list(solve_watershed_stream(deepcopy(watershed_request), False, context))
+    trailer = items.pop()["trailer"]
+    expected = response_dict["results"] + response_dict["leaf_results"]
+
+    assert trailer["errors"] == response_dict["errors"]
+    assert trailer["warnings"] == response_dict["warnings"]
+    assert set(trailer["previous_results_keys"]) == set(
+        response_dict["previous_results_keys"]
+    )
+    assert sorted(dct["node_id"] for dct in items) == sorted(
+        dct["node_id"] for dct in expected
+    )
+    check_subgraph_response_equal(items, expected)
+
+    # each node is streamed after the nodes upstream of it.
+    g = nx.DiGraph(graph_factory(watershed_request["graph"]))
+    position = {dct["node_id"]: i for i, dct in enumerate(items)}
+    for s, t in g.edges:
+        if s in position and t in position:
+            assert position[s] < position[t]
+
+    assert list(iter_watershed_response(response_dict))[:-1] == expected
+
+
+def test_solve_watershed_projection(contexts, watershed_requests):
+    context = contexts["default"]
+    watershed_request = watershed_requests[100, 0.3]
+    projection = {"fields": ["node_type"], "include_patterns": ["*_pct"]}
+
+    full = solve_watershed(deepcopy(watershed_request), False, context)
+    response = solve_watershed(deepcopy(watershed_request), False, context, projection)
+    stream = list(
+        solve_watershed_stream(deepcopy(watershed_request), False, context, projection)
+    )
+
+    assert response["previous_results_keys"] == full["previous_results_keys"]
+    by_id = {dct["node_id"]: dct for dct in full["results"] + full["leaf_results"]}
+    projected = response["results"] + response["leaf_results"]
+    assert len(projected) == len(by_id)
+    for dct in projected:
+        exp = {
+            k: v
+            for k, v in by_id[dct["node_id"]].items()
+            if k in ("node_id", "node_type") or k.endswith("_pct")
+        }
+        assert dct == exp
+
+    assert {dct["node_id"]: dct for dct in stream[:-1]} == {
+        dct["node_id"]: dct for dct in projected
+    }
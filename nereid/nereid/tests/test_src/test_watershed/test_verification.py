@@ -0,0 +1,100 @@
+from copy import deepcopy
+
+import numpy
+import pytest
+
+from nereid.src.watershed.engine import get_watershed_engine
+from nereid.src.watershed.loading import pollutant_keys
+from nereid.src.watershed.node_state import NodeState
+from nereid.src.watershed.solve_watershed import (
+    initialize_watershed,
+    iter_solve_state,
+    solve_state,
+)
+from nereid.src.watershed.tasks import solve_watershed
+from nereid.src.watershed.verification import verification_rows, verify_state
+
+
+@pytest.fixture
+def solved_state(contexts, watershed_requests):
+    context = contexts["default"]
+    engine = get_watershed_engine(context)
+    plan, node_data, _ = initialize_watershed(
+        deepcopy(watershed_requests[100, 0.3]), False, context
+    )
+    state = NodeState(engine.fields, plan, [node_data[n] for n in plan.nodes])
+    solve_state(state, engine, verify="off")
+    return state, engine
+
+
+def test_verification_rows(solved_state):
+    state, _ = solved_state
+    solved = numpy.flatnonzero(~state.is_leaf)
+
+    assert len(verification_rows(state, verify="off")) == 0
+    numpy.testing.assert_array_equal(verification_rows(state, verify="full"), solved)
+
+    rows = solved[:10]
+    numpy.testing.assert_array_equal(
+        verification_rows(state, rows, verify="sample", sample_fraction=1.0), rows
+    )
+    assert len(verification_rows(state, verify="sample", sample_fraction=0.0)) == 0
+
+    rng = numpy.random.default_rng(42)
+    sample = verification_rows(state, verify="sample", sample_fraction=0.5, rng=rng)
+    assert 0 < len(sample) < len(solved)
+    assert set(sample.tolist()) <= set(solved.tolist())
+
+    with pytest.raises(ValueError):
+        verification_rows(state, verify="¯\\_(ツ)_/¯")
+
+
+def test_verify_state(solved_state):
+    state, engine = solved_state
+    assert verify_state(state, engine, verify="full") == []
+    assert not any(state.node_errors.values())
+
+    keys = pollutant_keys(engine.wet_weather_parameters)
+    loading = next(
+        i for i in numpy.flatnonzero(~state.is_leaf).tolist() if i not in state.rows
+    )
+    released = keys.outputs["released_from_bypassed"][0]
+    treatment = next(i for i, dct in state.rows.items() if released in dct)
+
+    state["runoff_volume_cuft_bypassed"][loading] += state["runoff_volume_cuft_inflow"][
+        loading
+    ]
+    state.rows[treatment][released] += state.rows[treatment][keys.inflow[0]] + 1
+
+    assert verify_state(state, engine, verify="off") == []
+
+    errors = verify_state(state, engine, verify="full")
+    assert {i for i, _ in errors} == {loading, treatment}
+    assert "inflow did not close" in state.errors(loading)[0]
+    assert state.errors(treatment) == [
+        f"ERROR: pollutant mass balance error for {keys.load[0]}"
+    ]
+
+    state.update_node_data()
+    assert state.data[treatment]["node_errors"] == state.errors(treatment)
+
+
+def test_iter_solve_state_verify(solved_state):
+    state, engine = solved_state
+    with pytest.raises(ValueError):
+        next(iter_solve_state(state, engine, verify="¯\\_(ツ)_/¯"))
+
+
+def test_solve_watershed_verify(contexts, watershed_requests):
+    context = contexts["default"]
+    watershed_request = watershed_requests[100, 0.3]
+
+    responses = {
+        verify: solve_watershed(
+            deepcopy(watershed_request), False, context, verify=verify
+        )
+        for verify in ["off", "sample", "full"]
+    }
+    for response in responses.values():
+        assert response["results"] == responses["full"]["results"]
+        assert all(not dct["node_errors"] for dct in response["results"])
@@ -11,6 +11,10 @@ from pydantic import BaseModel
 import nereid.tests.test_data
 from nereid.models import treatment_facility_models
 from nereid.src.network.utils import clean_graph_dict
+from nereid.src.nomograph.nomo import load_nomograph_mapping
+from nereid.src.tmnt_performance.tasks import effluent_function_map
+from nereid.src.watershed.solve_watershed import solve_node
+from nereid.src.wq_parameters import init_wq_parameters
 
 TEST_PATH = Path(nereid.tests.test_data.__file__).parent.resolve()
 
@@ -86,6 +90,48 @@ def check_graph_data_equal(g, subg):
                     assert abs(og - v) < 1e-3 or (abs(og - v) / og) < 1e-6, err_stmt
 
 
+def solve_watershed_loading_by_node(g, context):
+    """reference solution that solves each node dict in place with `solve_node`."""
+    kwargs = {
+        "wet_weather_parameters": init_wq_parameters(
+            "land_surface_emc_table", context=context
+        ),
+        "dry_weather_parameters": init_wq_parameters(
+            "dry_weather_land_surface_emc_table", context=context
+        ),
+        "wet_weather_facility_performance_map": effluent_function_map(
+            "tmnt_performance_table", context=context
+        ),
+        "dry_weather_facility_performance_map": effluent_function_map(
+            "dry_weather_tmnt_performance_table", context=context
+        ),
+        "nomograph_map": load_nomograph_mapping(context=context),
+    }
+
+    for node in nx.topological_sort(g):
+        g.nodes[node]["_version"] = context.get("version", "error: no version info")
+        g.nodes[node]["_config_version"] = context.get(
+            "config_date", "error: no config version info"
+        )
+        solve_node(g, node, **kwargs)
+
+
+def check_graph_data_identical(g, other):
+    """assert that both graphs have the same attributes with identical values."""
+    for node, dct in g.nodes(data=True):
+        other_dct = other.nodes[node]
+        assert set(dct) == set(other_dct), (node, set(dct) ^ set(other_dct))
+        for k, v in dct.items():
+            err_stmt = (
+                f"node: {node}; attr: {k}, orig value: {v}; new value: {other_dct[k]}"
+            )
+            if isinstance(v, float) and numpy.isnan(v):
+                assert numpy.isnan(other_dct[k]), err_stmt
+            else:
+                assert v == other_dct[k], err_stmt
+                assert isinstance(other_dct[k], bool) == isinstance(v, bool), err_stmt
+
+
 def generate_n_random_valid_watershed_graphs(
     n_graphs: int = 3,
     min_graph_nodes: int = 20,